@@ -2,10 +2,12 @@
 
 from agentdbg.exceptions import AgentDbgGuardrailExceeded, AgentDbgLoopAbort
 from agentdbg.tracing import (
+    bind_trace_context,
     has_active_run,
     record_llm_call,
     record_state,
     record_tool_call,
+    submit_traced,
     trace,
     traced_run,
 )
@@ -25,5 +27,7 @@ __all__ = [
     "record_llm_call",
     "record_tool_call",
     "record_state",
+    "submit_traced",
+    "bind_trace_context",
     "__version__",
 ]
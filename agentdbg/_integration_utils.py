@@ -6,49 +6,54 @@ invokes them at RUN_START and in the finally block (with exception info).
 No plugin discovery or auto-loading; registration is explicit on integration import.
 """
 
+import threading
 from types import TracebackType
 from typing import Callable
 
+_RunExitCallback = Callable[
+    [
+        str,
+        type[BaseException] | None,
+        BaseException | None,
+        TracebackType | None,
+    ],
+    None,
+]
+
 # Callbacks: run_enter() takes no args; run_exit(run_id, exc_type, exc_value, traceback).
-_run_enter_callbacks: list[Callable[[], None]] = []
-_run_exit_callbacks: list[
-    Callable[
-        [
-            str,
-            type[BaseException] | None,
-            BaseException | None,
-            TracebackType | None,
-        ],
-        None,
-    ]
-] = []
+# Stored as tuples replaced on registration, so invocation iterates an immutable snapshot;
+# the sets give O(1) idempotency checks. Registration is serialized by _registry_lock.
+_run_enter_callbacks: tuple[Callable[[], None], ...] = ()
+_run_exit_callbacks: tuple[_RunExitCallback, ...] = ()
+_run_enter_registered: set[Callable[[], None]] = set()
+_run_exit_registered: set[_RunExitCallback] = set()
+_registry_lock = threading.Lock()
 
 
 def register_run_enter(fn: Callable[[], None]) -> None:
     """Register a callback to run at outermost run start. Idempotent (same fn not added twice)."""
-    if fn not in _run_enter_callbacks:
-        _run_enter_callbacks.append(fn)
+    global _run_enter_callbacks
+    with _registry_lock:
+        if fn in _run_enter_registered:
+            return
+        _run_enter_registered.add(fn)
+        _run_enter_callbacks = _run_enter_callbacks + (fn,)
 
 
-def register_run_exit(
-    fn: Callable[
-        [
-            str,
-            type[BaseException] | None,
-            BaseException | None,
-            TracebackType | None,
-        ],
-        None,
-    ],
-) -> None:
+def register_run_exit(fn: _RunExitCallback) -> None:
     """Register a callback to run at outermost run exit (finally). Receives run_id, exc_type, exc_value, traceback. Idempotent."""
-    if fn not in _run_exit_callbacks:
-        _run_exit_callbacks.append(fn)
+    global _run_exit_callbacks
+    with _registry_lock:
+        if fn in _run_exit_registered:
+            return
+        _run_exit_registered.add(fn)
+        _run_exit_callbacks = _run_exit_callbacks + (fn,)
 
 
 def _invoke_run_enter() -> None:
     """Invoke all registered run_enter callbacks. One failure does not stop others."""
-    for cb in _run_enter_callbacks:
+    callbacks = _run_enter_callbacks
+    for cb in callbacks:
         try:
             cb()
         except Exception:
@@ -62,7 +67,8 @@ def _invoke_run_exit(
     traceback: TracebackType | None,
 ) -> None:
     """Invoke all registered run_exit callbacks with run_id and exception info. One failure does not stop others."""
-    for cb in _run_exit_callbacks:
+    callbacks = _run_exit_callbacks
+    for cb in callbacks:
         try:
             cb(run_id, exc_type, exc_value, traceback)
         except Exception:
@@ -71,5 +77,9 @@ def _invoke_run_exit(
 
 def _clear_test_run_lifecycle_registry() -> None:
     """Clear all registered callbacks. For tests only."""
-    _run_enter_callbacks.clear()
-    _run_exit_callbacks.clear()
+    global _run_enter_callbacks, _run_exit_callbacks
+    with _registry_lock:
+        _run_enter_callbacks = ()
+        _run_exit_callbacks = ()
+        _run_enter_registered.clear()
+        _run_exit_registered.clear()
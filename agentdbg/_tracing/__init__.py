@@ -5,16 +5,20 @@ Uses contextvars for run_id, counts, and config. Recorders no-op when no active
 or create an implicit run when AGENTDBG_IMPLICIT_RUN=1.
 Dependencies: stdlib + agentdbg.config + agentdbg.constants + agentdbg.events + agentdbg.storage.
 
-TODO(concurrency): Safe for single-threaded agent loops. If tools run concurrently
-(e.g. thread pool), context does not propagate to worker threads and the event window
-ordering can be non-deterministic. For v0.2+: propagate context into workers
-(contextvars.copy_context().run(...)) and use a thread-safe window (e.g. lock around
-appends) with a well-defined ordering rule so loop detection remains meaningful.
+Concurrency: contextvars do not flow into worker threads on their own. Use
+submit_traced(executor, fn, ...) or bind_trace_context(fn) to run worker code in a copy
+of the caller's context; workers then share the run's counts, event window, and event
+count. Events from concurrent workers are appended in completion order, so loop
+detection across them is best-effort.
 """
 
 from agentdbg._tracing._lifecycle import trace, traced_run
 from agentdbg._tracing._recorders import record_llm_call, record_tool_call, record_state
-from agentdbg._tracing._context import has_active_run
+from agentdbg._tracing._context import (
+    bind_trace_context,
+    has_active_run,
+    submit_traced,
+)
 
 __all__ = [
     "trace",
@@ -23,4 +27,6 @@ __all__ = [
     "record_llm_call",
     "record_tool_call",
     "record_state",
+    "submit_traced",
+    "bind_trace_context",
 ]
@@ -0,0 +1,205 @@
+"""
+Batched event writer: recorders enqueue serialized events; a daemon thread appends them
+to events.jsonl in batches, so a burst of events costs one write, not one each.
+Depends: agentdbg.config, agentdbg.storage.
+
+Events are serialized when enqueued (later mutation of user objects cannot change what
+is written). Order is preserved: all appends for a run go through the one buffer, and
+flush() writes everything enqueued before it returns. Run end flushes synchronously
+before finalize_run; an atexit hook flushes whatever is left.
+
+Durability: background batches fsync a run's file at most every _FSYNC_INTERVAL_S
+(written data is visible to readers immediately either way); flush() fsyncs every
+file written since its last sync, so a finished run is always on disk.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+from agentdbg.config import AgentDbgConfig
+from agentdbg.storage import append_event_lines, event_to_line, sync_events
+
+logger = logging.getLogger(__name__)
+
+# Drain once this many events are pending, or after this long with fewer pending.
+_MAX_BATCH = 64
+_MAX_DELAY_S = 0.01
+# Background batches fsync a given events.jsonl at most this often.
+_FSYNC_INTERVAL_S = 0.5
+
+
+class _EventBuffer:
+    """Pending (run_id, config, line) items plus the daemon thread that drains them."""
+
+    def __init__(
+        self,
+        max_batch: int = _MAX_BATCH,
+        max_delay_s: float = _MAX_DELAY_S,
+        fsync_interval_s: float = _FSYNC_INTERVAL_S,
+        start_thread: bool = True,
+    ):
+        """With start_thread=False no writer thread is started; events wait for flush()."""
+        self._max_batch = max_batch
+        self._max_delay_s = max_delay_s
+        self._fsync_interval_s = fsync_interval_s
+        self._cond = threading.Condition()
+        self._pending: list[tuple[str, AgentDbgConfig, bytes]] = []
+        # Held while a batch is taken and written, so batches reach disk in order.
+        self._write_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._start_thread = start_thread
+        self._closed = False
+        # Guarded by _write_lock. Keyed by (run_id, data_dir).
+        self._synced_at: dict[tuple[str, Path], float] = {}
+        self._unsynced: dict[tuple[str, Path], tuple[str, AgentDbgConfig]] = {}
+
+    def put(self, run_id: str, event: dict, config: AgentDbgConfig) -> None:
+        """Serialize event and queue it for the run's events.jsonl."""
+        line = event_to_line(event)
+        with self._cond:
+            self._pending.append((run_id, config, line))
+            if self._thread is None and self._start_thread and not self._closed:
+                self._thread = threading.Thread(
+                    target=self._drain_forever, name="agentdbg-writer", daemon=True
+                )
+                self._thread.start()
+            n = len(self._pending)
+            if n == 1 or n >= self._max_batch:
+                self._cond.notify()
+
+    def flush(self, *, sync: bool = True) -> None:
+        """
+        Write every queued event now. With sync (the default) also fsync every file
+        written since its last sync; otherwise fsync only files not synced within
+        the interval. A run whose append fails does not stop the other runs in the
+        batch from being written; the first such error is raised once all were
+        attempted, later ones are logged.
+        """
+        error: Exception | None = None
+        with self._write_lock:
+            with self._cond:
+                batch = self._pending
+                self._pending = []
+            now = time.monotonic()
+            for run_id, config, lines in _group_batch(batch):
+                key = (run_id, config.data_dir)
+                do_sync = (
+                    sync
+                    or now - self._synced_at.get(key, -self._fsync_interval_s)
+                    >= self._fsync_interval_s
+                )
+                try:
+                    append_event_lines(run_id, lines, config, fsync=do_sync)
+                except Exception as e:
+                    if error is None:
+                        error = e
+                    else:
+                        logger.warning(
+                            "agentdbg: failed to write events for run %s",
+                            run_id,
+                            exc_info=True,
+                        )
+                    continue
+                if do_sync:
+                    self._synced_at[key] = now
+                    self._unsynced.pop(key, None)
+                else:
+                    self._unsynced[key] = (run_id, config)
+            if sync:
+                self._sync_pending()
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """Stop the writer thread, then flush what is queued. Later events wait for flush()."""
+        with self._cond:
+            self._closed = True
+            thread = self._thread
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def _sync_pending(self) -> None:
+        """fsync files written without sync; forget sync times of finished bursts."""
+        unsynced = self._unsynced
+        self._unsynced = {}
+        self._synced_at.clear()
+        for run_id, config in unsynced.values():
+            try:
+                sync_events(run_id, config)
+            except OSError:
+                logger.warning(
+                    "agentdbg: failed to fsync events for run %s", run_id, exc_info=True
+                )
+
+    def _drain_forever(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                if len(self._pending) < self._max_batch:
+                    self._cond.wait(self._max_delay_s)
+            try:
+                self.flush(sync=False)
+            except Exception:
+                logger.warning(
+                    "agentdbg: failed to write buffered events", exc_info=True
+                )
+
+    def _reset_after_fork(self) -> None:
+        """The child has no writer thread and must not write the parent's events."""
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending = []
+        self._thread = None
+        self._synced_at = {}
+        self._unsynced = {}
+
+
+def _group_batch(
+    batch: list[tuple[str, AgentDbgConfig, bytes]],
+) -> Iterator[tuple[str, AgentDbgConfig, list[bytes]]]:
+    """Yield (run_id, config, lines) per consecutive run of the same events file."""
+    i = 0
+    n = len(batch)
+    while i < n:
+        run_id, config, _ = batch[i]
+        data_dir: Path = config.data_dir
+        j = i + 1
+        while j < n and batch[j][0] == run_id and batch[j][1].data_dir == data_dir:
+            j += 1
+        yield run_id, config, [item[2] for item in batch[i:j]]
+        i = j
+
+
+_buffer = _EventBuffer()
+
+
+def _buffer_event(run_id: str, event: dict, config: AgentDbgConfig) -> None:
+    """Queue event for run_id; it is written within _MAX_DELAY_S or at the next flush."""
+    _buffer.put(run_id, event, config)
+
+
+def _flush_events() -> None:
+    """Write all queued events before returning."""
+    _buffer.flush()
+
+
+def _flush_events_at_exit() -> None:
+    try:
+        _buffer.flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_events_at_exit)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_buffer._reset_after_fork)
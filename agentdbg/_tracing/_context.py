@@ -1,59 +1,165 @@
 """
 Context vars, implicit-run state, _ensure_run, and atexit finalization.
-Depends: agentdbg.config, agentdbg.constants, agentdbg.events, agentdbg.guardrails, agentdbg.storage, _redact.
+Depends: agentdbg.config, agentdbg.constants, agentdbg.events, agentdbg.guardrails, agentdbg.storage, _buffer, _redact.
 """
 
 import atexit
 import os
 import sys
-from contextvars import ContextVar
-from datetime import datetime
-from typing import Any, Callable
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextvars import ContextVar, copy_context
+from functools import lru_cache, wraps
+from typing import Any, Callable, Iterator, ParamSpec, TypeVar
 
 from agentdbg.config import AgentDbgConfig, load_config
 from agentdbg.constants import default_counts
-from agentdbg.events import EventType, new_event, utc_now_iso_ms_z
+from agentdbg.events import EventType, make_event_factory
 from agentdbg.guardrails import GuardrailParams, check_after_event
-from agentdbg.storage import append_event, create_run, finalize_run
+from agentdbg.loopdetect import SignatureWindow
+from agentdbg.storage import create_run, finalize_run
 
-from agentdbg._tracing._redact import _redact_and_truncate, _redact_argv
+from agentdbg._tracing._buffer import _buffer_event, _flush_events
+from agentdbg._tracing._redact import _redact_and_truncate_shared, _redact_argv
 
 
-_run_id_var: ContextVar[str | None] = ContextVar("agentdbg_run_id", default=None)
-_counts_var: ContextVar[dict | None] = ContextVar("agentdbg_counts", default=None)
-_config_var: ContextVar[AgentDbgConfig | None] = ContextVar(
-    "agentdbg_config", default=None
-)
-_event_window_var: ContextVar[list[dict] | None] = ContextVar(
-    "agentdbg_event_window", default=None
-)
-_loop_emitted_var: ContextVar[set[str] | None] = ContextVar(
-    "agentdbg_loop_emitted", default=None
-)
+class _RunCtx:
+    """
+    State of one run, read by recorders through a single context var (or the implicit-run
+    global). Mutable members are shared by every context copied from the run, so worker
+    threads (see bind_trace_context) record into the same counts and window.
+    event_counter, started_at and guardrail_params are None for the implicit run, which
+    has no guardrails.
+    """
+
+    __slots__ = (
+        "run_id",
+        "counts",
+        "config",
+        "window",
+        "emitted",
+        "started_at",
+        "started_monotonic_ns",
+        "event_counter",
+        "guardrail_params",
+        "new_event",
+    )
+
+    def __init__(
+        self,
+        run_id: str,
+        counts: dict[str, int],
+        config: AgentDbgConfig,
+        started_monotonic_ns: int,
+        started_at: str | None = None,
+        event_counter: Iterator[int] | None = None,
+        guardrail_params: GuardrailParams | None = None,
+    ) -> None:
+        self.run_id = run_id
+        self.counts = counts
+        self.config = config
+        # Loop-detection signatures of the last loop_window events (see loopdetect).
+        self.window = SignatureWindow(config.loop_window)
+        self.emitted: set[str] = set()
+        self.started_at = started_at
+        self.started_monotonic_ns = started_monotonic_ns
+        # next() on itertools.count is atomic under the GIL.
+        self.event_counter = event_counter
+        # The run's own params; a nested traced_run / @trace overrides them via
+        # _guardrail_params_var for its block only.
+        self.guardrail_params = guardrail_params
+        # new_event with run_id bound: new_event(event_type, name, payload, meta).
+        self.new_event = make_event_factory(run_id)
+
+
+_run_ctx_var: ContextVar[_RunCtx | None] = ContextVar("agentdbg_run", default=None)
+# Set only by a nested traced_run / @trace, overriding ctx.guardrail_params for its block.
 _guardrail_params_var: ContextVar[GuardrailParams | None] = ContextVar(
     "agentdbg_guardrail_params", default=None
 )
-_started_at_var: ContextVar[str | None] = ContextVar(
-    "agentdbg_started_at", default=None
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Guards counts[...] increments when recorders run in several threads of one run.
+_counts_lock = threading.Lock()
+
+# Static RUN_START fields; cwd and argv are read per run since the process may change them.
+_PYTHON_VERSION = (
+    f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
 )
-_event_count_var: ContextVar[int] = ContextVar("agentdbg_event_count", default=0)
+_PLATFORM = sys.platform
+
+# One-slot cache for _default_run_name_timestamp: (epoch minute, formatted local time).
+_run_name_ts_cache: tuple[int, str] = (-1, "")
+
+# Number of explicit runs currently open in any context. When zero (and implicit runs
+# are off), _ensure_run returns without touching the context vars.
+_active_run_count = 0
+_active_run_lock = threading.Lock()
+
+# AGENTDBG_IMPLICIT_RUN is read once per process, not on every recorder call.
+_implicit_run_enabled = os.environ.get("AGENTDBG_IMPLICIT_RUN", "").strip() == "1"
 
 # Implicit run: stored so atexit can finalize (RUN_END + run.json status).
-_implicit_run_id: str | None = None
-_implicit_counts: dict | None = None
-_implicit_config: AgentDbgConfig | None = None
-_implicit_started_at: str | None = None
-_implicit_event_window: list[dict] = []
-_implicit_loop_emitted: set[str] = set()
+_implicit_run: _RunCtx | None = None
+
+
+def _increment_count(counts: dict[str, int], key: str) -> None:
+    """Increment counts[key] under _counts_lock (recorders may run in worker threads)."""
+    with _counts_lock:
+        counts[key] += 1
+
+
+def bind_trace_context(func: Callable[P, R]) -> Callable[P, R]:
+    """
+    Return a callable that runs func in a copy of the current context, so recorder
+    calls made from another thread attach to the active run. Use for thread targets
+    and loop.run_in_executor(None, bind_trace_context(fn), ...).
+    """
+    ctx = copy_context()
+
+    @wraps(func)
+    def _bound(*args: P.args, **kwargs: P.kwargs) -> R:
+        # A Context can only be entered by one thread at a time; copy per call so the
+        # bound callable can be used concurrently.
+        return ctx.copy().run(func, *args, **kwargs)
+
+    return _bound
+
+
+def submit_traced(
+    executor: Executor, fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs
+) -> Future[R]:
+    """
+    executor.submit(fn, *args, **kwargs), but fn runs in a copy of the caller's context
+    so recorder calls in the worker attach to the caller's active run.
+    """
+    ctx = copy_context()
+    return executor.submit(ctx.run, fn, *args, **kwargs)
 
 
 def has_active_run() -> bool:
     """Return True only when an explicit traced run is active in this context."""
-    return (
-        _run_id_var.get() is not None
-        and _counts_var.get() is not None
-        and _config_var.get() is not None
-    )
+    return _run_ctx_var.get() is not None
+
+
+def _adjust_active_run_count(delta: int) -> None:
+    """Add delta (+1 on run start, -1 on run end) to the open explicit run count."""
+    global _active_run_count
+    with _active_run_lock:
+        _active_run_count += delta
+
+
+@lru_cache(maxsize=512)
+def _entrypoint_cached(filename: str, func_name: str, cwd: str) -> str:
+    """Format path/to/file.py:function_name with filename relative to cwd when possible."""
+    try:
+        rel = os.path.relpath(filename, cwd)
+    except ValueError:
+        rel = filename
+    return f"{rel}:{func_name}"
 
 
 def _entrypoint(func: Callable[..., Any]) -> str:
@@ -63,18 +169,26 @@ def _entrypoint(func: Callable[..., Any]) -> str:
         filename = code.co_filename if code else None
         if filename:
             try:
-                rel = os.path.relpath(filename, os.getcwd())
-            except (ValueError, OSError):
-                rel = filename
-            return f"{rel}:{func.__name__}"
+                cwd = os.getcwd()
+            except OSError:
+                return f"{filename}:{func.__name__}"
+            return _entrypoint_cached(filename, func.__name__, cwd)
     except Exception:
         pass
     return getattr(func, "__name__", None) or "run"
 
 
 def _default_run_name_timestamp() -> str:
-    """Local timestamp for default run names, e.g. 2025-02-18 14:12."""
-    return datetime.now().strftime("%Y-%m-%d %H:%M")
+    """Local timestamp for default run names, e.g. 2025-02-18 14:12. Reformatted at most once per minute."""
+    global _run_name_ts_cache
+    now = time.time()
+    minute = int(now // 60)
+    cached_minute, cached = _run_name_ts_cache
+    if minute == cached_minute:
+        return cached
+    formatted = time.strftime("%Y-%m-%d %H:%M", time.localtime(now))
+    _run_name_ts_cache = (minute, formatted)
+    return formatted
 
 
 def _resolve_run_name(
@@ -98,8 +212,8 @@ def _run_start_payload(run_name: str | None) -> dict[str, Any]:
     """Build RUN_START payload (argv not yet redacted)."""
     return {
         "run_name": run_name,
-        "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
-        "platform": sys.platform,
+        "python_version": _PYTHON_VERSION,
+        "platform": _PLATFORM,
         "cwd": os.getcwd(),
         "argv": list(sys.argv),
     }
@@ -111,38 +225,33 @@ def _run_start_payload_for_event(
     """Build RUN_START payload with argv values redacted per redact_keys, then apply full redaction/truncation."""
     payload = _run_start_payload(run_name)
     payload["argv"] = _redact_argv(payload["argv"], config)
-    return _redact_and_truncate(payload, config)
+    # The payload is freshly built, so it is scrubbed in place of being copied.
+    return _redact_and_truncate_shared(payload, config)
 
 
-def _append_event_and_check_guardrails(
-    run_id: str, event: dict, config: AgentDbgConfig, counts: dict
-) -> None:
+def _append_event_and_check_guardrails(ctx: _RunCtx, event: dict) -> None:
     """
-    Append event to storage, then if in an explicit run with guardrails, increment
-    event count and run guardrail checks. Raises AgentDbgGuardrailExceeded when a limit is exceeded.
+    Queue event for ctx's run (see _buffer), then if ctx is an explicit run with guardrails,
+    increment its event count and run guardrail checks. Raises AgentDbgGuardrailExceeded when
+    a limit is exceeded. ctx is the caller's current run, so it is not looked up again.
     """
-    append_event(run_id, event, config)
+    _buffer_event(ctx.run_id, event, ctx.config)
+    if ctx.event_counter is None or ctx.started_at is None:
+        return
     params = _guardrail_params_var.get()
     if params is None:
-        return
-    count = _event_count_var.get()
-    count += 1
-    _event_count_var.set(count)
-    started_at = _started_at_var.get()
-    if started_at is None:
-        return
-    check_after_event(event, counts, count, started_at, params, now_iso=None)
+        params = ctx.guardrail_params
+        if params is None:
+            return
+    count = next(ctx.event_counter)
+    check_after_event(event, ctx.counts, count, ctx.started_at, params, now_iso=None)
 
 
-def _run_end_payload(status: str, counts: dict, started_at: str) -> dict[str, Any]:
-    """Build RUN_END payload; duration_ms from started_at to now."""
-    now = utc_now_iso_ms_z()
-    try:
-        start_dt = datetime.fromisoformat(started_at.replace("Z", "+00:00"))
-        end_dt = datetime.fromisoformat(now.replace("Z", "+00:00"))
-        duration_ms = max(0, int((end_dt - start_dt).total_seconds() * 1000))
-    except (ValueError, TypeError):
-        duration_ms = 0
+def _run_end_payload(
+    status: str, counts: dict, started_monotonic_ns: int
+) -> dict[str, Any]:
+    """Build RUN_END payload; duration_ms on the monotonic clock since the run's start reading."""
+    duration_ms = max(0, (time.monotonic_ns() - started_monotonic_ns) // 1_000_000)
     return {
         "status": status,
         "summary": {
@@ -156,29 +265,23 @@ def _run_end_payload(status: str, counts: dict, started_at: str) -> dict[str, An
 
 def _finalize_implicit_run() -> None:
     """Atexit hook: write RUN_END and finalize run.json for the implicit run, if any."""
-    global _implicit_run_id, _implicit_counts, _implicit_config, _implicit_started_at
-    global _implicit_event_window, _implicit_loop_emitted
-    if (
-        _implicit_run_id is None
-        or _implicit_config is None
-        or _implicit_started_at is None
-    ):
+    global _implicit_run
+    ctx = _implicit_run
+    if ctx is None:
         return
-    run_id = _implicit_run_id
-    counts = _implicit_counts or default_counts()
-    config = _implicit_config
-    started_at = _implicit_started_at
-    _implicit_run_id = None
-    _implicit_counts = None
-    _implicit_config = None
-    _implicit_started_at = None
-    _implicit_event_window = []
-    _implicit_loop_emitted = set()
+    _implicit_run = None
     try:
-        payload = _run_end_payload("ok", counts, started_at)
-        ev = new_event(EventType.RUN_END, run_id, "run_end", payload)
-        append_event(run_id, ev, config)
-        finalize_run(run_id, "ok", counts, config)
+        payload = _run_end_payload("ok", ctx.counts, ctx.started_monotonic_ns)
+        ev = ctx.new_event(EventType.RUN_END, "run_end", payload)
+        _buffer_event(ctx.run_id, ev, ctx.config)
+        _flush_events()
+        finalize_run(
+            ctx.run_id,
+            "ok",
+            ctx.counts,
+            ctx.config,
+            duration_ms=payload["summary"]["duration_ms"],
+        )
     except Exception:
         pass
 
@@ -186,56 +289,30 @@ def _finalize_implicit_run() -> None:
 atexit.register(_finalize_implicit_run)
 
 
-def _ensure_run() -> tuple[str, dict, AgentDbgConfig, list[dict], set[str]] | None:
+def _ensure_run() -> _RunCtx | None:
     """
-    Return (run_id, counts, config, event_window, loop_emitted) for the current run, or None if no run.
+    Return the current run's _RunCtx, or None if no run.
     If AGENTDBG_IMPLICIT_RUN=1 and no run is active, create an implicit run (once per process)
     and return it. Implicit run never sets contextvars, so it does not hijack subsequent
     traced runs or leave a "current run" for the rest of the process.
     """
-    global _implicit_run_id, _implicit_counts, _implicit_config, _implicit_started_at
-    global _implicit_event_window, _implicit_loop_emitted
-    run_id = _run_id_var.get()
-    if run_id is not None:
-        counts = _counts_var.get()
-        config = _config_var.get()
-        if counts is not None and config is not None:
-            window = _event_window_var.get()
-            if window is None:
-                window = []
-                _event_window_var.set(window)
-            emitted = _loop_emitted_var.get()
-            if emitted is None:
-                emitted = set()
-                _loop_emitted_var.set(emitted)
-            return (run_id, counts, config, window, emitted)
-    if os.environ.get("AGENTDBG_IMPLICIT_RUN", "").strip() == "1":
-        if (
-            _implicit_run_id is not None
-            and _implicit_counts is not None
-            and _implicit_config is not None
-        ):
-            return (
-                _implicit_run_id,
-                _implicit_counts,
-                _implicit_config,
-                _implicit_event_window,
-                _implicit_loop_emitted,
-            )
+    global _implicit_run
+    if _active_run_count == 0 and not _implicit_run_enabled:
+        return None
+    ctx = _run_ctx_var.get()
+    if ctx is not None:
+        return ctx
+    if _implicit_run_enabled:
+        if _implicit_run is not None:
+            return _implicit_run
         config = load_config()
         run_name = _resolve_run_name("implicit", None)
         meta = create_run(run_name, config)
         run_id = meta["run_id"]
-        counts = default_counts()
-        started_at = meta["started_at"]
-        _implicit_run_id = run_id
-        _implicit_counts = counts
-        _implicit_config = config
-        _implicit_started_at = started_at
-        _implicit_event_window = []
-        _implicit_loop_emitted = set()
+        ctx = _RunCtx(run_id, default_counts(), config, time.monotonic_ns())
+        _implicit_run = ctx
         payload = _run_start_payload_for_event(run_name, config)
-        ev = new_event(EventType.RUN_START, run_id, run_name, payload)
-        append_event(run_id, ev, config)
-        return (run_id, counts, config, _implicit_event_window, _implicit_loop_emitted)
+        ev = ctx.new_event(EventType.RUN_START, run_name, payload)
+        _buffer_event(run_id, ev, config)
+        return ctx
     return None
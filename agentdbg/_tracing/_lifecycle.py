@@ -1,11 +1,12 @@
 """
 Run lifecycle: _run_context context manager, trace decorator, traced_run.
-Depends: agentdbg.config, agentdbg.events, agentdbg.exceptions, agentdbg.guardrails, agentdbg.storage, _redact, _context.
+Depends: agentdbg.config, agentdbg.events, agentdbg.exceptions, agentdbg.guardrails, agentdbg.storage, _buffer, _redact, _context.
 """
 
 import asyncio
+import itertools
 import sys
-import traceback
+import time
 from types import TracebackType
 from contextlib import contextmanager
 from functools import wraps
@@ -13,26 +14,24 @@ from typing import Any, Callable, Generator, ParamSpec, TypeVar
 
 from agentdbg.config import load_config
 from agentdbg.constants import default_counts
-from agentdbg.events import EventType, new_event
+from agentdbg.events import EventType
 from agentdbg.exceptions import AgentDbgGuardrailExceeded, _AgentDbgAbortSignal
 from agentdbg.guardrails import GuardrailParams, merge_guardrail_params
-from agentdbg.storage import append_event, create_run, finalize_run
+from agentdbg.storage import create_run, finalize_run
 
 from agentdbg._tracing._context import (
+    _adjust_active_run_count,
     _append_event_and_check_guardrails,
-    _config_var,
-    _counts_var,
-    _event_count_var,
-    _event_window_var,
+    _RunCtx,
     _guardrail_params_var,
-    _loop_emitted_var,
+    _increment_count,
     _resolve_run_name,
     _run_end_payload,
-    _run_id_var,
+    _run_ctx_var,
     _run_start_payload_for_event,
-    _started_at_var,
 )
-from agentdbg._tracing._redact import _redact_and_truncate
+from agentdbg._tracing._buffer import _buffer_event, _flush_events
+from agentdbg._tracing._redact import _LazyStack, _redact_and_truncate
 from agentdbg._integration_utils import _invoke_run_enter, _invoke_run_exit
 
 
@@ -40,21 +39,23 @@ P = ParamSpec("P")
 R = TypeVar("R")
 
 
-def _error_payload(exc: BaseException) -> dict[str, Any]:
-    """Build ERROR payload."""
+def _error_payload(exc: BaseException, capture_stacks: bool = True) -> dict[str, Any]:
+    """Build ERROR payload. The stack is formatted lazily, and only if capture_stacks."""
     return {
         "error_type": type(exc).__name__,
         "message": str(exc),
-        "stack": traceback.format_exc(),
+        "stack": _LazyStack(exc) if capture_stacks else None,
     }
 
 
-def _guardrail_error_payload(exc: AgentDbgGuardrailExceeded) -> dict[str, Any]:
+def _guardrail_error_payload(
+    exc: AgentDbgGuardrailExceeded, capture_stacks: bool = True
+) -> dict[str, Any]:
     """Build ERROR payload for guardrail abort (includes guardrail, threshold, actual)."""
     return {
         "error_type": type(exc).__name__,
         "message": exc.message,
-        "stack": traceback.format_exc(),
+        "stack": _LazyStack(exc) if capture_stacks else None,
         "guardrail": exc.guardrail,
         "threshold": exc.threshold,
         "actual": exc.actual,
@@ -74,8 +75,7 @@ def _run_context(
     then on success emit RUN_END "ok" and finalize; on exception emit ERROR,
     RUN_END "error", finalize, and reraise. Reset context vars in finally.
     """
-    existing_run_id = _run_id_var.get()
-    if existing_run_id is not None:
+    if _run_ctx_var.get() is not None:
         # Nested context: reuse the existing run.  If the caller supplied
         # guardrail_params (e.g. traced_run(stop_on_loop=True) inside @trace),
         # apply them for the duration of this block so they aren't silently
@@ -96,16 +96,20 @@ def _run_context(
     meta = create_run(run_name, config)
     run_id = meta["run_id"]
     started_at = meta["started_at"]
+    started_monotonic_ns = time.monotonic_ns()
     counts = default_counts()
 
-    token_run = _run_id_var.set(run_id)
-    token_counts = _counts_var.set(counts)
-    token_config = _config_var.set(config)
-    token_window = _event_window_var.set([])
-    token_emitted = _loop_emitted_var.set(set())
-    token_guardrail = _guardrail_params_var.set(params)
-    token_started_at = _started_at_var.set(started_at)
-    token_event_count = _event_count_var.set(0)
+    ctx = _RunCtx(
+        run_id,
+        counts,
+        config,
+        started_monotonic_ns,
+        started_at=started_at,
+        event_counter=itertools.count(1),
+        guardrail_params=params,
+    )
+    token_run = _run_ctx_var.set(ctx)
+    _adjust_active_run_count(1)
     exc_info: tuple[
         type[BaseException] | None, BaseException | None, TracebackType | None
     ] = (
@@ -116,53 +120,66 @@ def _run_context(
 
     def _finish_run(status: str) -> None:
         _invoke_run_exit(run_id, *exc_info)
-        payload_end = _run_end_payload(status, counts, started_at)
-        ev_end = new_event(EventType.RUN_END, run_id, "run_end", payload_end)
-        append_event(run_id, ev_end, config)
-        finalize_run(run_id, status, counts, config)
+        payload_end = _run_end_payload(status, counts, started_monotonic_ns)
+        ev_end = ctx.new_event(EventType.RUN_END, "run_end", payload_end)
+        _buffer_event(run_id, ev_end, config)
+        _flush_events()
+        finalize_run(
+            run_id,
+            status,
+            counts,
+            config,
+            duration_ms=payload_end["summary"]["duration_ms"],
+        )
 
     try:
         payload = _run_start_payload_for_event(run_name, config)
-        ev = new_event(EventType.RUN_START, run_id, run_name, payload)
-        _append_event_and_check_guardrails(run_id, ev, config, counts)
+        ev = ctx.new_event(EventType.RUN_START, run_name, payload)
+        _append_event_and_check_guardrails(ctx, ev)
         _invoke_run_enter()
         yield
     except _AgentDbgAbortSignal as signal:
         exc_info = sys.exc_info()
         cause = signal.cause
-        err_payload = _redact_and_truncate(_guardrail_error_payload(cause), config)
-        err_ev = new_event(EventType.ERROR, run_id, type(cause).__name__, err_payload)
-        append_event(run_id, err_ev, config)
-        counts["errors"] = counts.get("errors", 0) + 1
+        err_payload = _redact_and_truncate(
+            _guardrail_error_payload(cause, config.capture_stacks), config
+        )
+        err_ev = ctx.new_event(EventType.ERROR, type(cause).__name__, err_payload)
+        _buffer_event(run_id, err_ev, config)
+        _increment_count(counts, "errors")
         _finish_run("error")
         raise cause from signal
     except AgentDbgGuardrailExceeded as e:
         exc_info = sys.exc_info()
-        err_payload = _redact_and_truncate(_guardrail_error_payload(e), config)
-        err_ev = new_event(EventType.ERROR, run_id, type(e).__name__, err_payload)
-        append_event(run_id, err_ev, config)
-        counts["errors"] = counts.get("errors", 0) + 1
+        err_payload = _redact_and_truncate(
+            _guardrail_error_payload(e, config.capture_stacks), config
+        )
+        err_ev = ctx.new_event(EventType.ERROR, type(e).__name__, err_payload)
+        _buffer_event(run_id, err_ev, config)
+        _increment_count(counts, "errors")
         _finish_run("error")
         raise
     except Exception as e:
         exc_info = sys.exc_info()
-        err_payload = _redact_and_truncate(_error_payload(e), config)
-        err_ev = new_event(EventType.ERROR, run_id, type(e).__name__, err_payload)
-        _append_event_and_check_guardrails(run_id, err_ev, config, counts)
-        counts["errors"] = counts.get("errors", 0) + 1
+        err_payload = _redact_and_truncate(
+            _error_payload(e, config.capture_stacks), config
+        )
+        err_ev = ctx.new_event(EventType.ERROR, type(e).__name__, err_payload)
+        _append_event_and_check_guardrails(ctx, err_ev)
+        _increment_count(counts, "errors")
         _finish_run("error")
         raise
     else:
         _finish_run("ok")
     finally:
-        _run_id_var.reset(token_run)
-        _counts_var.reset(token_counts)
-        _config_var.reset(token_config)
-        _event_window_var.reset(token_window)
-        _loop_emitted_var.reset(token_emitted)
-        _guardrail_params_var.reset(token_guardrail)
-        _started_at_var.reset(token_started_at)
-        _event_count_var.reset(token_event_count)
+        # SystemExit / KeyboardInterrupt skip _finish_run; their events still go to disk
+        # before the run is torn down (and must not mask the propagating exception).
+        try:
+            _flush_events()
+        except Exception:
+            pass
+        _adjust_active_run_count(-1)
+        _run_ctx_var.reset(token_run)
 
 
 def trace(
@@ -209,6 +226,13 @@ def trace(
 
             @wraps(func)
             async def async_inner(*args: P.args, **kwargs: P.kwargs) -> R:
+                if _run_ctx_var.get() is not None:
+                    # Nested: same as _run_context's reuse branch, without the generator.
+                    token = _guardrail_params_var.set(params)
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        _guardrail_params_var.reset(token)
                 with _run_context(name=_name, func=func, guardrail_params=params):
                     return await func(*args, **kwargs)
 
@@ -216,6 +240,13 @@ def trace(
 
         @wraps(func)
         def inner(*args: P.args, **kwargs: P.kwargs) -> R:
+            if _run_ctx_var.get() is not None:
+                # Nested: same as _run_context's reuse branch, without the generator.
+                token = _guardrail_params_var.set(params)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    _guardrail_params_var.reset(token)
             with _run_context(name=_name, func=func, guardrail_params=params):
                 return func(*args, **kwargs)
 
@@ -5,15 +5,16 @@ Depends: agentdbg.events, agentdbg.storage, agentdbg.loopdetect, _redact, _conte
 
 from typing import Any
 
-from agentdbg.config import AgentDbgConfig
-from agentdbg.events import EventType, new_event
+from agentdbg.events import EventType
 from agentdbg.exceptions import AgentDbgLoopAbort
-from agentdbg.loopdetect import detect_loop, pattern_key as loop_pattern_key
+from agentdbg.loopdetect import detect_loop_signatures, pattern_key as loop_pattern_key
 
 from agentdbg._tracing._context import (
+    _RunCtx,
     _append_event_and_check_guardrails,
     _ensure_run,
     _guardrail_params_var,
+    _increment_count,
 )
 from agentdbg._tracing._redact import (
     _apply_redaction_truncation,
@@ -22,18 +23,16 @@ from agentdbg._tracing._redact import (
 )
 
 
-def _maybe_emit_loop_warning(
-    run_id: str,
-    counts: dict[str, int],
-    config: AgentDbgConfig,
-    window: list[dict],
-    emitted: set[str],
-) -> None:
+def _maybe_emit_loop_warning(ctx: _RunCtx) -> None:
     """
     If the last N events contain a repeating pattern not yet emitted, emit LOOP_WARNING,
-    increment counts["loop_warnings"], and add the pattern key to emitted.
+    increment counts["loop_warnings"], and add the pattern key to ctx.emitted.
     """
-    payload = detect_loop(window, config.loop_window, config.loop_repetitions)
+    counts, config = ctx.counts, ctx.config
+    emitted = ctx.emitted
+    payload = detect_loop_signatures(
+        ctx.window.snapshot(), config.loop_window, config.loop_repetitions
+    )
     if payload is None:
         return
     key = loop_pattern_key(payload)
@@ -43,6 +42,8 @@ def _maybe_emit_loop_warning(
         # the calling framework (e.g. LangChain, OpenAI Agents SDK).  Re-raise
         # so the loop keeps being interrupted on every detection opportunity.
         params = _guardrail_params_var.get()
+        if params is None:
+            params = ctx.guardrail_params
         if params is not None and params.stop_on_loop:
             repetitions = payload.get("repetitions", 0)
             if repetitions >= params.stop_on_loop_min_repetitions:
@@ -62,15 +63,15 @@ def _maybe_emit_loop_warning(
     name = (
         pattern if len(pattern) <= max_name_len else pattern[: max_name_len - 1] + "..."
     )
-    ev = new_event(EventType.LOOP_WARNING, run_id, name, payload)
+    ev = ctx.new_event(EventType.LOOP_WARNING, name, payload)
     # Record the dedup key and increment the count BEFORE the guardrail
     # check.  _append_event_and_check_guardrails may raise AgentDbgLoopAbort
     # when stop_on_loop is enabled; if the calling framework swallows that
     # exception (e.g. OpenAI Agents SDK), subsequent spans would re-trigger
     # the same detection and emit duplicate LOOP_WARNINGs.
     emitted.add(key)
-    counts["loop_warnings"] = counts.get("loop_warnings", 0) + 1
-    _append_event_and_check_guardrails(run_id, ev, config, counts)
+    _increment_count(counts, "loop_warnings")
+    _append_event_and_check_guardrails(ctx, ev)
 
 
 def record_llm_call(
@@ -86,18 +87,23 @@ def record_llm_call(
     error: str | BaseException | dict[str, Any] | None = None,
 ) -> None:
     """
-    Record an LLM call event. No-op if no active run (unless AGENTDBG_IMPLICIT_RUN=1).
+    Record an LLM call event. No-op if no active run (unless AGENTDBG_IMPLICIT_RUN=1)
+    or if LLM_CALL is in config.disabled_event_types.
     Applies redaction and truncation from config, appends event, increments llm_calls.
     When status is "error", error may be an exception, string, or dict (type, message, details?, stack?).
     """
     ctx = _ensure_run()
     if ctx is None:
         return
-    run_id, counts, config, window, emitted = ctx
+    config = ctx.config
+    if EventType.LLM_CALL in config.disabled_event_types:
+        return
     status_val = "ok" if status not in ("ok", "error") else status
     error_obj: dict[str, Any] | None = None
     if status_val == "error" and error is not None:
         error_obj = _build_error_payload(error, config, include_stack=True)
+    # A constant-key dict literal builds in one step; copying a prototype and then
+    # assigning each field was measured slower (see also make_event_factory).
     payload = {
         "model": model,
         "prompt": prompt,
@@ -110,13 +116,23 @@ def record_llm_call(
         "error": error_obj,
     }
     payload, safe_meta = _apply_redaction_truncation(payload, meta or {}, config)
-    ev = new_event(EventType.LLM_CALL, run_id, model, payload, meta=safe_meta)
-    counts["llm_calls"] = counts.get("llm_calls", 0) + 1
-    _append_event_and_check_guardrails(run_id, ev, config, counts)
-    window.append(ev)
-    if len(window) > config.loop_window:
-        window[:] = window[-config.loop_window :]
-    _maybe_emit_loop_warning(run_id, counts, config, window, emitted)
+    # Redaction leaves payload and meta JSON-safe (walked, or scanned and found clean);
+    # the fast-skip path returns them untouched.
+    trusted = not config.redact_fast_skip
+    ev = ctx.new_event(
+        EventType.LLM_CALL,
+        model,
+        payload,
+        safe_meta,
+        _trusted_meta=trusted,
+        _trusted_payload=trusted,
+    )
+    _increment_count(ctx.counts, "llm_calls")
+    _append_event_and_check_guardrails(ctx, ev)
+    if config.loop_detection_enabled:
+        # A loop needs the newest signature loop_repetitions times in the window.
+        if ctx.window.push(ev) >= config.loop_repetitions:
+            _maybe_emit_loop_warning(ctx)
 
 
 def record_tool_call(
@@ -128,14 +144,17 @@ def record_tool_call(
     error: str | BaseException | dict[str, Any] | None = None,
 ) -> None:
     """
-    Record a tool call event. No-op if no active run (unless AGENTDBG_IMPLICIT_RUN=1).
+    Record a tool call event. No-op if no active run (unless AGENTDBG_IMPLICIT_RUN=1)
+    or if TOOL_CALL is in config.disabled_event_types.
     Applies redaction and truncation, appends event, increments tool_calls.
     When status is "error", error may be an exception, string, or dict (type, message, details?, stack?).
     """
     ctx = _ensure_run()
     if ctx is None:
         return
-    run_id, counts, config, window, emitted = ctx
+    config = ctx.config
+    if EventType.TOOL_CALL in config.disabled_event_types:
+        return
     status_val = "ok" if status not in ("ok", "error") else status
     error_obj: dict[str, Any] | None = None
     if status_val == "error" and error is not None:
@@ -148,13 +167,20 @@ def record_tool_call(
         "error": error_obj,
     }
     payload, safe_meta = _apply_redaction_truncation(payload, meta or {}, config)
-    ev = new_event(EventType.TOOL_CALL, run_id, name, payload, meta=safe_meta)
-    counts["tool_calls"] = counts.get("tool_calls", 0) + 1
-    _append_event_and_check_guardrails(run_id, ev, config, counts)
-    window.append(ev)
-    if len(window) > config.loop_window:
-        window[:] = window[-config.loop_window :]
-    _maybe_emit_loop_warning(run_id, counts, config, window, emitted)
+    trusted = not config.redact_fast_skip
+    ev = ctx.new_event(
+        EventType.TOOL_CALL,
+        name,
+        payload,
+        safe_meta,
+        _trusted_meta=trusted,
+        _trusted_payload=trusted,
+    )
+    _increment_count(ctx.counts, "tool_calls")
+    _append_event_and_check_guardrails(ctx, ev)
+    if config.loop_detection_enabled:
+        if ctx.window.push(ev) >= config.loop_repetitions:
+            _maybe_emit_loop_warning(ctx)
 
 
 def record_state(
@@ -163,18 +189,28 @@ def record_state(
     diff: Any = None,
 ) -> None:
     """
-    Record a state update event. No-op if no active run (unless AGENTDBG_IMPLICIT_RUN=1).
+    Record a state update event. No-op if no active run (unless AGENTDBG_IMPLICIT_RUN=1)
+    or if STATE_UPDATE is in config.disabled_event_types.
     Applies redaction and truncation; does not increment any count.
     """
     ctx = _ensure_run()
     if ctx is None:
         return
-    run_id, counts, config, window, emitted = ctx
+    config = ctx.config
+    if EventType.STATE_UPDATE in config.disabled_event_types:
+        return
     payload = {"state": state, "diff": diff}
     payload, safe_meta = _apply_redaction_truncation(payload, meta or {}, config)
-    ev = new_event(EventType.STATE_UPDATE, run_id, "state", payload, meta=safe_meta)
-    _append_event_and_check_guardrails(run_id, ev, config, counts)
-    window.append(ev)
-    if len(window) > config.loop_window:
-        window[:] = window[-config.loop_window :]
-    _maybe_emit_loop_warning(run_id, counts, config, window, emitted)
+    trusted = not config.redact_fast_skip
+    ev = ctx.new_event(
+        EventType.STATE_UPDATE,
+        "state",
+        payload,
+        safe_meta,
+        _trusted_meta=trusted,
+        _trusted_payload=trusted,
+    )
+    _append_event_and_check_guardrails(ctx, ev)
+    if config.loop_detection_enabled:
+        if ctx.window.push(ev) >= config.loop_repetitions:
+            _maybe_emit_loop_warning(ctx)
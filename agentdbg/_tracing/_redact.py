@@ -4,7 +4,9 @@ Only depends on agentdbg.constants and agentdbg.config (for AgentDbgConfig type)
 """
 
 import re
+import sys
 import traceback
+from itertools import islice
 from typing import Any
 
 from agentdbg.config import AgentDbgConfig
@@ -13,11 +15,30 @@ from agentdbg.constants import DEPTH_LIMIT, REDACTED_MARKER, TRUNCATED_MARKER
 # TODO: Remove the _RECURSION_LIMIT and use DEPTH_LIMIT instead
 _RECURSION_LIMIT = DEPTH_LIMIT
 
+# Bound on AgentDbgConfig.redact_key_cache, so payloads with unbounded key sets
+# (e.g. dicts keyed by ids) cannot grow it without limit.
+_MAX_CACHED_KEYS = 1024
 
-def _key_matches_redact(key: str, redact_keys: list[str]) -> bool:
-    """True if key matches any redact key (case-insensitive substring)."""
-    k = key.lower()
-    return any(rk.lower() in k for rk in redact_keys)
+# TRUNCATED_MARKER is ASCII; its UTF-8 length is fixed at import.
+_MARKER_BYTES_LEN = len(TRUNCATED_MARKER.encode("utf-8"))
+
+
+class _LazyStack:
+    """
+    Formatted traceback of exc, produced on first str(). A stack under a redacted key
+    is never formatted; otherwise the redaction walk (or the JSON writer) calls str().
+    """
+
+    __slots__ = ("_exc", "_text")
+
+    def __init__(self, exc: BaseException) -> None:
+        self._exc = exc
+        self._text: str | None = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = "".join(traceback.format_exception(self._exc))
+        return self._text
 
 
 # Matches --option=value or -o=value (option name can have letters, digits, hyphens, underscores).
@@ -30,15 +51,23 @@ def _redact_argv(argv: list[str], config: AgentDbgConfig) -> list[str]:
     Option name is matched against config.redact_keys (with hyphens normalized to underscores).
     Returns a new list; does not mutate input.
     """
-    if not argv or not config.redact:
+    pattern = config.redact_pattern
+    if not argv or not config.redact or pattern is None:
         return list(argv)
+    option_value = _ARGV_OPTION_VALUE.match
+    keys_set = config.redact_keys_set
+    search = pattern.search
     out: list[str] = []
     for item in argv:
-        match = _ARGV_OPTION_VALUE.match(item)
+        # Positional args and bare --flags cannot carry a value; skip the regex.
+        if "=" not in item:
+            out.append(item)
+            continue
+        match = option_value(item)
         if match:
             prefix, key, _value = match.groups()
-            key_normalized = key.replace("-", "_")
-            if _key_matches_redact(key_normalized, config.redact_keys):
+            key_normalized = key.replace("-", "_").lower()
+            if key_normalized in keys_set or search(key_normalized) is not None:
                 out.append(f"{prefix}{key}={REDACTED_MARKER}")
                 continue
         out.append(item)
@@ -49,48 +78,202 @@ def _truncate_string(s: str, max_bytes: int) -> str:
     """Truncate string so result (including TRUNCATED_MARKER) fits in max_bytes. O(n), single encode/decode."""
     if max_bytes <= 0:
         return s
-    enc = "utf-8"
-    b = s.encode(enc)
-    if len(b) <= max_bytes:
+    # Fast paths: UTF-8 needs at most 4 bytes per code point, and ASCII exactly 1,
+    # so most strings can be shown to fit without encoding them.
+    n = len(s)
+    if n * 4 <= max_bytes:
         return s
-    marker_bytes = len(TRUNCATED_MARKER.encode(enc))
-    limit = max(0, max_bytes - marker_bytes)
-    b_trunc = b[:limit]
-    return b_trunc.decode(enc, errors="ignore") + TRUNCATED_MARKER
+    limit = max(0, max_bytes - _MARKER_BYTES_LEN)
+    if s.isascii():
+        return s if n <= max_bytes else s[:limit] + TRUNCATED_MARKER
+    if n <= max_bytes:
+        b = s.encode("utf-8")
+        if len(b) <= max_bytes:
+            return s
+    else:
+        # More code points than bytes allowed: it cannot fit. Every code point takes at
+        # least one byte, so the first limit code points cover the kept prefix; encode
+        # only those instead of the whole (possibly huge) string.
+        b = s[:limit].encode("utf-8")
+    # Decode straight from a view of the prefix instead of copying it into a new bytes.
+    return str(memoryview(b)[:limit], "utf-8", "ignore") + TRUNCATED_MARKER
 
 
-def _redact_and_truncate(
+# Node kinds for the _redact_and_truncate walker. Exact built-in types are looked up
+# in _NODE_KINDS; subclasses (str enums, OrderedDict, ...) fall back to _classify_node.
+_SCALAR, _STR, _DICT, _SEQ, _OTHER = range(5)
+_NODE_KINDS: dict[type, int] = {
+    type(None): _SCALAR,
+    bool: _SCALAR,
+    int: _SCALAR,
+    float: _SCALAR,
+    str: _STR,
+    dict: _DICT,
+    list: _SEQ,
+    tuple: _SEQ,
+}
+
+
+_INLINE_SCALARS = frozenset((type(None), bool, int, float))
+
+
+def _classify_node(obj: Any) -> int:
+    """Node kind for values whose exact type is not in _NODE_KINDS."""
+    if isinstance(obj, (bool, int, float)):
+        return _SCALAR
+    if isinstance(obj, str):
+        return _STR
+    if isinstance(obj, dict):
+        return _DICT
+    if isinstance(obj, (list, tuple)):
+        return _SEQ
+    return _OTHER
+
+
+def _scrub_node(
     obj: Any,
-    config: AgentDbgConfig,
-    depth: int = 0,
+    depth: int,
+    max_bytes: int,
+    stack: list[tuple[Any, Any, int]],
 ) -> Any:
     """
-    Recursively redact keys matching config.redact_keys and truncate large strings.
-    Limit recursion to _RECURSION_LIMIT. Returns a new structure; does not mutate input.
+    Convert one node for _redact_and_truncate. Scalars and strings are finished here;
+    dicts and sequences get an empty output container that is filled later from stack.
     """
     if depth > _RECURSION_LIMIT:
         return TRUNCATED_MARKER
-    if obj is None or isinstance(obj, (bool, int, float)):
+    kind = _NODE_KINDS.get(type(obj))
+    if kind is None:
+        kind = _classify_node(obj)
+    if kind == _SCALAR:
         return obj
-    if isinstance(obj, str):
-        return _truncate_string(obj, config.max_field_bytes)
-    if isinstance(obj, dict):
+    if kind == _STR:
+        return _truncate_string(obj, max_bytes)
+    if kind == _DICT:
         out: dict[str, Any] = {}
-        for k, v in obj.items():
-            key_str = str(k)
-            if config.redact and _key_matches_redact(key_str, config.redact_keys):
-                out[key_str] = REDACTED_MARKER
-            else:
-                out[key_str] = _redact_and_truncate(v, config, depth + 1)
+        stack.append((obj, out, depth + 1))
         return out
-    if isinstance(obj, (list, tuple)):
-        return [_redact_and_truncate(item, config, depth + 1) for item in obj]
-    s = str(obj)
-    return (
-        _truncate_string(s, config.max_field_bytes)
-        if len(s.encode("utf-8")) > config.max_field_bytes
-        else s
-    )
+    if kind == _SEQ:
+        out_list: list[Any] = [None] * len(obj)
+        stack.append((obj, out_list, depth + 1))
+        return out_list
+    return _truncate_string(str(obj), max_bytes)
+
+
+def _redact_and_truncate(
+    obj: Any,
+    config: AgentDbgConfig,
+    depth: int = 0,
+) -> Any:
+    """
+    Redact keys matching config.redact_keys and truncate large strings in nested dicts/lists.
+    Walks the structure with an explicit stack instead of recursion; values deeper than
+    _RECURSION_LIMIT become TRUNCATED_MARKER. Returns a new structure; does not mutate input.
+    When config.redact_fast_skip is set there is nothing to redact or truncate, and obj is
+    returned as-is (storage stringifies any non-JSON values on write).
+    """
+    if config.redact_fast_skip:
+        return obj
+    pattern = config.redact_pattern if config.redact else None
+    keys_set = config.redact_keys_set
+    key_cache = config.redact_key_cache
+    max_bytes = config.max_field_bytes
+    # Strings this short fit whatever their content (UTF-8 is at most 4 bytes per code point).
+    short_str = max_bytes // 4 if max_bytes > 0 else sys.maxsize
+    # Work items: (source container, output container, depth of its children).
+    stack: list[tuple[Any, Any, int]] = []
+    result = _scrub_node(obj, depth, max_bytes, stack)
+    while stack:
+        src, dst, child_depth = stack.pop()
+        # Leaves within the depth limit are copied inline (no call per node): exact
+        # scalar types, and strs short enough to need no truncation check.
+        inline = child_depth <= _RECURSION_LIMIT
+        if type(dst) is dict:
+            for k, v in src.items():
+                key_str = str(k)
+                if pattern is None:
+                    hit = False
+                else:
+                    hit = key_cache.get(key_str)
+                    if hit is None:
+                        key_lower = key_str.lower()
+                        hit = (
+                            key_lower in keys_set
+                            or pattern.search(key_lower) is not None
+                        )
+                        if len(key_cache) < _MAX_CACHED_KEYS:
+                            key_cache[key_str] = hit
+                if hit:
+                    # Past the depth limit every value is cut, redacted or not.
+                    dst[key_str] = REDACTED_MARKER if inline else TRUNCATED_MARKER
+                elif inline and (
+                    type(v) in _INLINE_SCALARS
+                    or (type(v) is str and len(v) <= short_str)
+                ):
+                    dst[key_str] = v
+                else:
+                    dst[key_str] = _scrub_node(v, child_depth, max_bytes, stack)
+        else:
+            for i, item in enumerate(src):
+                if inline and (
+                    type(item) in _INLINE_SCALARS
+                    or (type(item) is str and len(item) <= short_str)
+                ):
+                    dst[i] = item
+                else:
+                    dst[i] = _scrub_node(item, child_depth, max_bytes, stack)
+    return result
+
+
+def _needs_scrub(obj: Any, config: AgentDbgConfig) -> bool:
+    """
+    True unless _redact_and_truncate(obj, config) would return an equal value: only
+    exact JSON types, str keys that are not redacted, strings within max_field_bytes,
+    nothing past the depth limit. Scans without copying; stops at the first hit.
+    """
+    pattern = config.redact_pattern if config.redact else None
+    keys_set = config.redact_keys_set
+    key_cache = config.redact_key_cache
+    max_bytes = config.max_field_bytes
+    short_str = max_bytes // 4 if max_bytes > 0 else sys.maxsize
+    fits_ascii = max_bytes if max_bytes > 0 else sys.maxsize
+    stack: list[tuple[Any, int]] = []
+    children: Any = (obj,)
+    child_depth = 0
+    while True:
+        if children and child_depth > _RECURSION_LIMIT:
+            return True
+        for v in children:
+            t = type(v)
+            if t in _INLINE_SCALARS:
+                continue
+            if t is str:
+                if len(v) > short_str and not (v.isascii() and len(v) <= fits_ascii):
+                    return True
+            elif t is dict:
+                for k in v:
+                    if type(k) is not str:
+                        return True
+                    if pattern is not None:
+                        hit = key_cache.get(k)
+                        if hit is None:
+                            key_lower = k.lower()
+                            hit = (
+                                key_lower in keys_set
+                                or pattern.search(key_lower) is not None
+                            )
+                            if len(key_cache) < _MAX_CACHED_KEYS:
+                                key_cache[k] = hit
+                        if hit:
+                            return True
+                stack.append((v.values(), child_depth + 1))
+            elif t is list:
+                stack.append((v, child_depth + 1))
+            else:
+                return True
+        if not stack:
+            return False
+        children, child_depth = stack.pop()
 
 
 def _normalize_usage(usage: Any) -> dict[str, int | None] | None:
@@ -120,13 +303,106 @@ def _normalize_usage(usage: Any) -> dict[str, int | None] | None:
     }
 
 
+def _redact_and_truncate_shared(obj: Any, config: AgentDbgConfig) -> Any:
+    """
+    _redact_and_truncate, but copy-on-write: unchanged subtrees (and obj itself, when
+    nothing changes) are returned as-is, and only the containers on the path to a
+    redacted, truncated or converted value are rebuilt. Recursion is bounded by the
+    depth limit.
+    """
+    if config.redact_fast_skip:
+        return obj
+    pattern = config.redact_pattern if config.redact else None
+    keys_set = config.redact_keys_set
+    key_cache = config.redact_key_cache
+    max_bytes = config.max_field_bytes
+    short_str = max_bytes // 4 if max_bytes > 0 else sys.maxsize
+
+    def scrub(node: Any, depth: int) -> Any:
+        if depth > _RECURSION_LIMIT:
+            return TRUNCATED_MARKER
+        t = type(node)
+        if t is dict:
+            inline = depth < _RECURSION_LIMIT
+            out: dict[str, Any] | None = None
+            for i, (k, v) in enumerate(node.items()):
+                key_str = k if type(k) is str else str(k)
+                if pattern is None:
+                    hit = False
+                else:
+                    hit = key_cache.get(key_str)
+                    if hit is None:
+                        key_lower = key_str.lower()
+                        hit = (
+                            key_lower in keys_set
+                            or pattern.search(key_lower) is not None
+                        )
+                        if len(key_cache) < _MAX_CACHED_KEYS:
+                            key_cache[key_str] = hit
+                if hit:
+                    new = REDACTED_MARKER if inline else TRUNCATED_MARKER
+                elif inline and (
+                    type(v) in _INLINE_SCALARS
+                    or (type(v) is str and len(v) <= short_str)
+                ):
+                    new = v
+                else:
+                    new = scrub(v, depth + 1)
+                if out is None:
+                    if new is v and key_str is k:
+                        continue
+                    # First change: copy the unchanged items before it.
+                    out = dict(islice(node.items(), i))
+                out[key_str] = new
+            return node if out is None else out
+        if t is list:
+            inline = depth < _RECURSION_LIMIT
+            out_list: list[Any] | None = None
+            for i, v in enumerate(node):
+                if inline and (
+                    type(v) in _INLINE_SCALARS
+                    or (type(v) is str and len(v) <= short_str)
+                ):
+                    new = v
+                else:
+                    new = scrub(v, depth + 1)
+                if out_list is None:
+                    if new is v:
+                        continue
+                    out_list = node[:i]
+                out_list.append(new)
+            return node if out_list is None else out_list
+        kind = _NODE_KINDS.get(t)
+        if kind is None:
+            kind = _classify_node(node)
+        if kind == _SCALAR:
+            return node
+        if kind == _STR:
+            return _truncate_string(node, max_bytes)
+        # Tuples and dict/list subclasses always become a plain list or dict.
+        if kind == _DICT:
+            return scrub(dict(node), depth)
+        if kind == _SEQ:
+            return scrub(list(node), depth)
+        return _truncate_string(str(node), max_bytes)
+
+    return scrub(obj, 0)
+
+
 def _apply_redaction_truncation(
     payload: Any, meta: Any, config: AgentDbgConfig
 ) -> tuple[Any, Any]:
     """Apply redaction and truncation to payload and meta; returns (payload, meta)."""
+    if config.redact_fast_skip or not (
+        _needs_scrub(payload, config) or _needs_scrub(meta, config)
+    ):
+        # Nothing to redact or truncate: skip building a copy of the tree.
+        return payload, meta if meta is not None else {}
+    # Events are serialized when queued, so sharing the caller's unchanged subtrees
+    # is safe; only the changed paths are copied.
     return (
-        _redact_and_truncate(payload, config),
-        _redact_and_truncate(meta, config) if meta is not None else {},
+        _redact_and_truncate_shared(payload, config),
+        _redact_and_truncate_shared(meta, config) if meta is not None else {},
     )
 
 
@@ -138,6 +414,7 @@ def _build_error_payload(
     """
     Build a consistent error object for TOOL_CALL/LLM_CALL payloads.
     Returns None if exc_or_message is None; otherwise dict with error_type, message, optional details, optional stack.
+    An exception's stack is its own traceback, omitted when config.capture_stacks is off.
     Uses error_type (same as ERROR event payload per SPEC) for consumer consistency.
     Result is redacted/truncated per config.
     """
@@ -148,7 +425,11 @@ def _build_error_payload(
             "error_type": type(exc_or_message).__name__,
             "message": str(exc_or_message),
             "details": None,
-            "stack": traceback.format_exc() if include_stack else None,
+            "stack": (
+                _LazyStack(exc_or_message)
+                if include_stack and config.capture_stacks
+                else None
+            ),
         }
     elif isinstance(exc_or_message, str):
         err = {
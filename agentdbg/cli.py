@@ -2,13 +2,16 @@
 Typer CLI for AgentDbg.
 
 Commands: list, export, view. Entrypoint: main() for console script agentdbg.cli:main.
+The viewer server (fastapi, uvicorn) is imported only by view, keeping list/export startup light.
 """
 
 import json
 import socket
+import sys
 import threading
 import time
 import webbrowser
+from itertools import zip_longest
 from pathlib import Path
 from typing import Annotated
 
@@ -18,9 +21,13 @@ from typer import Exit
 import agentdbg.storage as storage
 from agentdbg.config import load_config
 from agentdbg.constants import SPEC_VERSION
-from agentdbg.server import create_app
 from agentdbg import __version__
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 EXIT_NOT_FOUND = 2
 EXIT_INTERNAL = 10
 
@@ -54,18 +61,53 @@ def _wait_for_port(host: str, port: int, timeout_s: float = 5.0) -> bool:
     """Block until *host*:*port* accepts a TCP connection, or *timeout_s* elapses.
 
     Used to avoid opening the browser before the viewer server is reachable
-    (race-condition prevention).  Pure-stdlib, no new dependencies.
+    (race-condition prevention).  Pure-stdlib, no new dependencies.  Retries with
+    exponential backoff from 2 ms (capped at 50 ms), so a server that comes up
+    quickly is noticed within a few milliseconds.
 
     Returns ``True`` if the port became reachable, ``False`` on timeout.
     """
     deadline = time.monotonic() + timeout_s
-    while time.monotonic() < deadline:
+    delay = 0.002
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
         try:
-            with socket.create_connection((host, port), timeout=0.1):
+            with socket.create_connection(
+                (host, port), timeout=max(min(0.1, remaining), 0.001)
+            ):
                 return True
         except OSError:
-            time.sleep(0.05)
-    return False
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            delay = min(delay * 1.5, 0.05)
+
+
+def _json_dumps_bytes(obj, *, indent: bool = False) -> bytes:
+    """
+    Serialize obj to UTF-8 JSON bytes; uses orjson when installed, else stdlib json.
+    Data orjson rejects (e.g. non-str keys, ints beyond 64 bits) falls back to stdlib json.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode(
+        "utf-8"
+    )
+
+
+def _write_stdout_bytes(data: bytes) -> None:
+    """Write UTF-8 data to stdout: to its binary buffer when it has one, else as text."""
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        # Text-only stream (e.g. a StringIO swapped in by a host app or test harness).
+        sys.stdout.write(data.decode("utf-8"))
+        return
+    sys.stdout.flush()
+    buffer.write(data)
+    buffer.flush()
 
 
 def _run_table_rows(runs: list[dict]) -> list[list[str]]:
@@ -91,21 +133,19 @@ def _format_text_table(rows: list[list[str]], headers: list[str]) -> str:
     """Format rows as a simple text table (no external libs)."""
     if not rows:
         return "\n".join(["\t".join(headers), ""])
-    col_widths = [len(h) for h in headers]
-    for row in rows:
-        for i, cell in enumerate(row):
-            if i < len(col_widths):
-                col_widths[i] = max(col_widths[i], len(str(cell)))
-    lines = []
+    ncols = len(headers)
+    # Stringify each cell once; cells beyond the header columns are dropped.
+    scells = [[str(cell) for cell in row[:ncols]] for row in rows]
+    col_widths = [
+        max(len(h), *map(len, col))
+        for h, col in zip(headers, zip_longest(*scells, fillvalue=""))
+    ]
+    col_widths += [len(h) for h in headers[len(col_widths) :]]
     sep = "\t"
-    lines.append(sep.join(h.ljust(col_widths[i]) for i, h in enumerate(headers)))
-    for row in rows:
-        lines.append(
-            sep.join(
-                str(row[i]).ljust(col_widths[i])
-                for i in range(min(len(row), len(col_widths)))
-            )
-        )
+    lines = [sep.join(h.ljust(w) for h, w in zip(headers, col_widths))]
+    lines.extend(
+        sep.join(c.ljust(w) for c, w in zip(row, col_widths)) for row in scells
+    )
     return "\n".join(lines)
 
 
@@ -120,7 +160,7 @@ def list_cmd(
         runs = storage.list_runs(limit=limit, config=config)
         if json_out:
             out = {"spec_version": SPEC_VERSION, "runs": runs}
-            print(json.dumps(out, ensure_ascii=False))
+            _write_stdout_bytes(_json_dumps_bytes(out) + b"\n")
         else:
             headers = [
                 "run_id",
@@ -150,18 +190,14 @@ def export_cmd(
     try:
         config = load_config()
         try:
-            run_id = storage.resolve_run_id(run_id, config)
+            run_id, run_meta = storage.resolve_and_load_meta(run_id, config)
         except FileNotFoundError:
             raise Exit(EXIT_NOT_FOUND)
-        try:
-            run_meta = storage.load_run_meta(run_id, config)
-        except (ValueError, FileNotFoundError):
-            raise Exit(EXIT_NOT_FOUND)
         events = storage.load_events(run_id, config)
         payload = {"spec_version": SPEC_VERSION, "run": run_meta, "events": events}
         out.parent.mkdir(parents=True, exist_ok=True)
-        with open(out, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
+        with open(out, "wb") as f:
+            f.write(_json_dumps_bytes(payload, indent=True))
     except Exit:
         raise
     except Exception as e:
@@ -189,18 +225,13 @@ def view_cmd(
             else:
                 run_id = runs[0].get("run_id") or ""
         if run_id:
+            # One scan both resolves the prefix and confirms run.json is readable.
             try:
-                run_id = storage.resolve_run_id(run_id, config)
+                run_id, _ = storage.resolve_and_load_meta(run_id, config)
             except FileNotFoundError as e:
                 if not json_out:
                     typer.echo(f"Run not found: {e}", err=True)
                 raise Exit(EXIT_NOT_FOUND)
-            try:
-                storage.load_run_meta(run_id, config)
-            except (ValueError, FileNotFoundError) as e:
-                if not json_out:
-                    typer.echo(f"Run not found: {e}", err=True)
-                raise Exit(EXIT_NOT_FOUND)
 
         url = f"http://{host}:{port}/" + (f"?run_id={run_id}" if run_id else "")
         if json_out:
@@ -212,8 +243,11 @@ def view_cmd(
             }
             print(json.dumps(out, ensure_ascii=False))
 
+        # Deferred: fastapi/uvicorn are only needed to serve, not for list/export.
         import uvicorn
 
+        from agentdbg.server import create_app
+
         fastapi_app = create_app()
         log_level = "warning" if json_out else "info"
 
@@ -1,7 +1,14 @@
 """Configuration for AgentDbg: redaction, loop detection, guardrails, and data directory."""
 
+import copy
+import json
 import os
+import re
+import stat
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
 from typing import Any
 
@@ -12,6 +19,8 @@ try:
 except ImportError:
     yaml = None  # type: ignore[assignment]
 
+_YAML_LOADER = getattr(yaml, "CSafeLoader", None) or getattr(yaml, "SafeLoader", None)
+
 # Defaults (mirror env defaults)
 _DEFAULT_REDACT = True
 _DEFAULT_REDACT_KEYS = [
@@ -25,11 +34,46 @@ _DEFAULT_REDACT_KEYS = [
 _DEFAULT_MAX_FIELD_BYTES = 20000
 _DEFAULT_LOOP_WINDOW = 12
 _DEFAULT_LOOP_REPETITIONS = 3
+_DEFAULT_CAPTURE_STACKS = True
+# Recorder event types that disabled_event_types may switch off. Run lifecycle, ERROR
+# and LOOP_WARNING events are always written.
+_DISABLEABLE_EVENT_TYPES = frozenset({"LLM_CALL", "TOOL_CALL", "STATE_UPDATE"})
 
 _MIN_MAX_FIELD_BYTES = 100
+# max_field_bytes at or above this is treated as "never truncate" by redact_fast_skip.
+_UNBOUNDED_FIELD_BYTES = 1 << 30
 _MIN_LOOP_WINDOW = 4
 _MIN_LOOP_REPETITIONS = 2
 
+# Parsed YAML files: str(path) -> (st_mtime_ns, st_size, data). LRU, bounded.
+_YAML_CACHE_MAX = 32
+_YAML_CACHE: OrderedDict[str, tuple[int, int, dict[str, Any]]] = OrderedDict()
+_yaml_cache_lock = threading.Lock()
+
+# load_config results, keyed by (home, project root, env values, YAML stamps). LRU, bounded.
+_CONFIG_CACHE_MAX = 4
+_CONFIG_ENV_KEYS = (
+    "AGENTDBG_REDACT",
+    "AGENTDBG_REDACT_KEYS",
+    "AGENTDBG_MAX_FIELD_BYTES",
+    "AGENTDBG_LOOP_WINDOW",
+    "AGENTDBG_LOOP_REPETITIONS",
+    "AGENTDBG_DATA_DIR",
+    "AGENTDBG_CAPTURE_STACKS",
+    "AGENTDBG_DISABLED_EVENT_TYPES",
+    "AGENTDBG_STOP_ON_LOOP",
+    "AGENTDBG_STOP_ON_LOOP_MIN_REPETITIONS",
+    "AGENTDBG_MAX_LLM_CALLS",
+    "AGENTDBG_MAX_TOOL_CALLS",
+    "AGENTDBG_MAX_EVENTS",
+    "AGENTDBG_MAX_DURATION_S",
+)
+_config_cache: OrderedDict[tuple, "AgentDbgConfig"] = OrderedDict()
+_config_cache_lock = threading.Lock()
+
+# Opt-in: keep a config.yaml.json sidecar so later processes skip the YAML parser.
+_YAML_JSON_CACHE_ENV = "AGENTDBG_YAML_JSON_CACHE"
+
 
 @dataclass
 class AgentDbgConfig:
@@ -42,20 +86,122 @@ class AgentDbgConfig:
     loop_repetitions: int
     data_dir: Path
     guardrails: GuardrailParams
+    capture_stacks: bool = _DEFAULT_CAPTURE_STACKS
+    disabled_event_types: frozenset[str] = frozenset()
+
+    @cached_property
+    def redact_keys_set(self) -> frozenset[str]:
+        """redact_keys lowercased and deduplicated; a key equal to one of them is an O(1) hit."""
+        return frozenset(rk.lower() for rk in self.redact_keys)
+
+    @cached_property
+    def redact_pattern(self) -> re.Pattern[str] | None:
+        """
+        Compiled matcher for redact_keys (lowercased, substring alternation), or None if empty.
+        Built once per config instance; load_config returns a new instance when its inputs change.
+        """
+        if not self.redact_keys_set:
+            return None
+        return re.compile(
+            "|".join(re.escape(rk) for rk in sorted(self.redact_keys_set))
+        )
+
+    @cached_property
+    def redact_key_cache(self) -> dict[str, bool]:
+        """
+        Per-config memo of key -> matches redact_pattern. Payload keys repeat across
+        events, so most lookups skip lower() and the regex; filled by _redact_and_truncate.
+        """
+        return {}
+
+    @cached_property
+    def loop_detection_enabled(self) -> bool:
+        """False when loop_window / loop_repetitions are too small for detect_loop to ever fire."""
+        return self.loop_window >= 2 and self.loop_repetitions >= 2
+
+    @cached_property
+    def redact_fast_skip(self) -> bool:
+        """
+        True when redaction is off and max_field_bytes is effectively unbounded, so the
+        redaction/truncation walk would not change any value and can be skipped.
+        """
+        return not self.redact and self.max_field_bytes >= _UNBOUNDED_FIELD_BYTES
+
+
+def _json_sidecar_path(path: Path) -> Path:
+    return path.with_name(path.name + ".json")
+
+
+def _load_json_sidecar(path: Path, yaml_st: os.stat_result) -> dict[str, Any] | None:
+    """Return the sidecar's data if it exists and is not older than the YAML; else None."""
+    sidecar = _json_sidecar_path(path)
+    try:
+        if sidecar.stat().st_mtime_ns < yaml_st.st_mtime_ns:
+            return None
+        with open(sidecar, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _write_json_sidecar(path: Path, data: dict[str, Any]) -> None:
+    """Atomically write data next to path as JSON. Best effort: errors are ignored."""
+    sidecar = _json_sidecar_path(path)
+    tmp = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+    try:
+        text = json.dumps(data, ensure_ascii=False)
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, sidecar)
+    except (OSError, TypeError, ValueError):
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
 
 
 def _load_yaml(path: Path) -> dict[str, Any]:
-    """Load YAML from path. Return {} if file missing, invalid, or yaml unavailable."""
+    """
+    Load YAML from path. Return {} if file missing, invalid, or yaml unavailable.
+    Parsed results are cached by (mtime_ns, size), so unchanged files are not re-parsed;
+    callers get a deep copy and may mutate it. With AGENTDBG_YAML_JSON_CACHE=1 the parse
+    is also stored in a config.yaml.json sidecar, used while it is not older than the YAML.
+    """
     if yaml is None:
         return {}
-    if not path.is_file():
-        return {}
     try:
-        with open(path, encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-        return data if isinstance(data, dict) else {}
-    except Exception:
+        st = path.stat()
+    except OSError:
         return {}
+    if not stat.S_ISREG(st.st_mode):
+        return {}
+    key = str(path)
+    with _yaml_cache_lock:
+        cached = _YAML_CACHE.get(key)
+        if (
+            cached is not None
+            and cached[0] == st.st_mtime_ns
+            and cached[1] == st.st_size
+        ):
+            _YAML_CACHE.move_to_end(key)
+            return copy.deepcopy(cached[2])
+    use_sidecar = os.environ.get(_YAML_JSON_CACHE_ENV, "").strip() == "1"
+    data = _load_json_sidecar(path, st) if use_sidecar else None
+    if data is None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = yaml.load(f, Loader=_YAML_LOADER)
+        except Exception:
+            return {}
+        data = data if isinstance(data, dict) else {}
+        if use_sidecar:
+            _write_json_sidecar(path, data)
+    with _yaml_cache_lock:
+        _YAML_CACHE[key] = (st.st_mtime_ns, st.st_size, data)
+        _YAML_CACHE.move_to_end(key)
+        while len(_YAML_CACHE) > _YAML_CACHE_MAX:
+            _YAML_CACHE.popitem(last=False)
+    return copy.deepcopy(data)
 
 
 def _apply_yaml(config: dict[str, Any], key: str, default: Any) -> Any:
@@ -63,7 +209,7 @@ def _apply_yaml(config: dict[str, Any], key: str, default: Any) -> Any:
     if key not in config:
         return default
     val = config[key]
-    if key == "redact":
+    if key in ("redact", "capture_stacks"):
         return bool(val) if val is not None else default
     if key == "redact_keys":
         if isinstance(val, list) and all(isinstance(x, str) for x in val):
@@ -88,9 +234,18 @@ def _apply_yaml(config: dict[str, Any], key: str, default: Any) -> Any:
         if val is None:
             return default
         return Path(val) if isinstance(val, (str, Path)) else default
+    if key == "disabled_event_types":
+        if isinstance(val, list) and all(isinstance(x, str) for x in val):
+            return _parse_event_types(val)
+        return default
     return default
 
 
+def _parse_event_types(names: list[str]) -> frozenset[str]:
+    """Upper-cased recorder event type names; unknown or non-recorder types are dropped."""
+    return frozenset(n.strip().upper() for n in names) & _DISABLEABLE_EVENT_TYPES
+
+
 def _guardrails_from_dict(data: dict[str, Any] | None) -> GuardrailParams:
     """Build GuardrailParams from a YAML guardrails section (user or project)."""
     if not data or not isinstance(data, dict):
@@ -227,17 +382,76 @@ def load_config(project_root: Path | None = None) -> AgentDbgConfig:
     1. Environment variables
     2. .agentdbg/config.yaml in project root (if present)
     3. ~/.agentdbg/config.yaml
+
+    Memoized on the AGENTDBG_* env values, home and project directories, and the YAML
+    files' (mtime, size), so changing any of them yields a new config. The returned
+    instance may be shared between callers; treat it as read-only.
     """
-    base = Path.home() / ".agentdbg"
+    home = Path.home()
+    # TODO: `cwd()` might not be the best default for CLI root:
+    #       If the tool is called from another location, CWD
+    #       will not set the root to the project, but the place
+    #       where CLI was called from.
+    root = project_root if project_root is not None else Path.cwd()
+    user_config_path = home / ".agentdbg" / "config.yaml"
+    project_config_path = root / ".agentdbg" / "config.yaml"
+    key = (
+        str(home),
+        str(root),
+        tuple(os.environ.get(k) for k in _CONFIG_ENV_KEYS),
+        _file_stamp(user_config_path),
+        _file_stamp(project_config_path),
+    )
+    with _config_cache_lock:
+        config = _config_cache.get(key)
+        if config is not None:
+            _config_cache.move_to_end(key)
+            return config
+    config = _load_config_uncached(home, user_config_path, project_config_path)
+    with _config_cache_lock:
+        _config_cache[key] = config
+        while len(_config_cache) > _CONFIG_CACHE_MAX:
+            _config_cache.popitem(last=False)
+    return config
+
+
+def reload_config(project_root: Path | None = None) -> AgentDbgConfig:
+    """
+    Drop every memoized config and parsed YAML file, then load_config(project_root).
+    For callers that change config inputs the memo cannot see (e.g. a YAML file
+    rewritten within the filesystem's mtime granularity with the same size).
+    """
+    with _config_cache_lock:
+        _config_cache.clear()
+    with _yaml_cache_lock:
+        _YAML_CACHE.clear()
+    return load_config(project_root)
+
+
+def _file_stamp(path: Path) -> tuple[int, int] | None:
+    """(mtime_ns, size) of path, or None if it cannot be stat'ed."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load_config_uncached(
+    home: Path, user_config_path: Path, project_config_path: Path
+) -> AgentDbgConfig:
+    """load_config without memoization; paths are resolved by the caller."""
+    base = home / ".agentdbg"
     redact = _DEFAULT_REDACT
     redact_keys = _DEFAULT_REDACT_KEYS.copy()
     max_field_bytes = _DEFAULT_MAX_FIELD_BYTES
     loop_window = _DEFAULT_LOOP_WINDOW
     loop_repetitions = _DEFAULT_LOOP_REPETITIONS
     data_dir = base
+    capture_stacks = _DEFAULT_CAPTURE_STACKS
+    disabled_event_types: frozenset[str] = frozenset()
 
     # 3. User config
-    user_config_path = base / "config.yaml"
     user_cfg = _load_yaml(user_config_path)
     if user_cfg:
         redact = _apply_yaml(user_cfg, "redact", redact)
@@ -246,18 +460,16 @@ def load_config(project_root: Path | None = None) -> AgentDbgConfig:
         loop_window = _apply_yaml(user_cfg, "loop_window", loop_window)
         loop_repetitions = _apply_yaml(user_cfg, "loop_repetitions", loop_repetitions)
         data_dir = _apply_yaml(user_cfg, "data_dir", data_dir)
+        capture_stacks = _apply_yaml(user_cfg, "capture_stacks", capture_stacks)
+        disabled_event_types = _apply_yaml(
+            user_cfg, "disabled_event_types", disabled_event_types
+        )
 
     guardrails = GuardrailParams()
     if user_cfg and "guardrails" in user_cfg:
         guardrails = _guardrails_from_dict(user_cfg.get("guardrails"))
 
     # 2. Project config (overrides user)
-    # TODO: `cwd()` might not be the best default for CLI root:
-    #       If the tool is called from another location, CWD
-    #       will not set the root to the project, but the place
-    #       where CLI was called from.
-    root = project_root if project_root is not None else Path.cwd()
-    project_config_path = root / ".agentdbg" / "config.yaml"
     proj_cfg = _load_yaml(project_config_path)
     if proj_cfg:
         redact = _apply_yaml(proj_cfg, "redact", redact)
@@ -266,6 +478,10 @@ def load_config(project_root: Path | None = None) -> AgentDbgConfig:
         loop_window = _apply_yaml(proj_cfg, "loop_window", loop_window)
         loop_repetitions = _apply_yaml(proj_cfg, "loop_repetitions", loop_repetitions)
         data_dir = _apply_yaml(proj_cfg, "data_dir", data_dir)
+        capture_stacks = _apply_yaml(proj_cfg, "capture_stacks", capture_stacks)
+        disabled_event_types = _apply_yaml(
+            proj_cfg, "disabled_event_types", disabled_event_types
+        )
         if "guardrails" in proj_cfg:
             guardrails = _guardrails_from_dict(proj_cfg.get("guardrails"))
 
@@ -304,6 +520,17 @@ def load_config(project_root: Path | None = None) -> AgentDbgConfig:
         if env_data:
             data_dir = Path(env_data).expanduser()
 
+    if "AGENTDBG_CAPTURE_STACKS" in os.environ:
+        capture_stacks = os.environ["AGENTDBG_CAPTURE_STACKS"].strip().lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+
+    if "AGENTDBG_DISABLED_EVENT_TYPES" in os.environ:
+        env_types = os.environ["AGENTDBG_DISABLED_EVENT_TYPES"]
+        disabled_event_types = _parse_event_types(env_types.split(","))
+
     guardrails = _apply_env_to_guardrails(guardrails)
 
     return AgentDbgConfig(
@@ -314,4 +541,6 @@ def load_config(project_root: Path | None = None) -> AgentDbgConfig:
         loop_repetitions=loop_repetitions,
         data_dir=data_dir,
         guardrails=guardrails,
+        capture_stacks=capture_stacks,
+        disabled_event_types=disabled_event_types,
     )
@@ -5,10 +5,10 @@ All events are JSON-serializable dicts.
 Pure functions, stdlib only, unit-testable.
 """
 
-import uuid
-from datetime import datetime, timezone
+import os
+import time
 from enum import Enum
-from typing import Any
+from typing import Any, Callable
 
 from agentdbg.constants import DEPTH_LIMIT, SPEC_VERSION, TRUNCATED_MARKER
 
@@ -33,32 +33,171 @@ class EventType(str, Enum):
     LOOP_WARNING = "LOOP_WARNING"
 
 
+# (whole UTC second, "YYYY-MM-DDTHH:MM:SS." prefix) for the last second formatted.
+_ts_prefix_cache: tuple[int, str] = (-1, "")
+
+
 def utc_now_iso_ms_z() -> str:
     """Return current UTC time as ISO8601 with milliseconds and trailing Z."""
-    now = datetime.now(timezone.utc)
+    global _ts_prefix_cache
     # Format: 2026-02-15T20:31:05.123Z
-    return now.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    sec, rem = divmod(time.time_ns(), 1_000_000_000)
+    cached_sec, prefix = _ts_prefix_cache
+    if cached_sec != sec:
+        tm = time.gmtime(sec)
+        prefix = (
+            f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+            f"T{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}."
+        )
+        _ts_prefix_cache = (sec, prefix)
+    return f"{prefix}{rem // 1_000_000:03d}Z"
 
 
-def _json_safe_value(value: Any, depth: int) -> Any:
-    """Convert value to a JSON-serializable form; non-serializable types become str.
-    When depth is exceeded, returns TRUNCATED_MARKER (consistent with redaction)."""
+def _fast_uuid4_str() -> str:
+    """Random (version 4) UUID string, like str(uuid.uuid4()) without building a UUID object."""
+    b = bytearray(os.urandom(16))
+    b[6] = (b[6] & 0x0F) | 0x40  # version 4
+    b[8] = (b[8] & 0x3F) | 0x80  # RFC 4122 variant
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# Node kinds for _json_safe_value. Exact built-in types are looked up in _JSON_KINDS;
+# subclasses (str enums, OrderedDict, ...) fall back to _classify_json_node.
+_PRIMITIVE, _DICT, _SEQ, _OTHER = range(4)
+_JSON_KINDS: dict[type, int] = {
+    type(None): _PRIMITIVE,
+    bool: _PRIMITIVE,
+    int: _PRIMITIVE,
+    float: _PRIMITIVE,
+    str: _PRIMITIVE,
+    dict: _DICT,
+    list: _SEQ,
+    tuple: _SEQ,
+}
+
+
+def _classify_json_node(value: Any) -> int:
+    """Node kind for values whose exact type is not in _JSON_KINDS."""
+    if isinstance(value, (bool, int, float, str)):
+        return _PRIMITIVE
+    if isinstance(value, dict):
+        return _DICT
+    if isinstance(value, (list, tuple)):
+        return _SEQ
+    return _OTHER
+
+
+def _json_safe_node(value: Any, depth: int, stack: list[tuple[Any, Any, int]]) -> Any:
+    """
+    Convert one node for _json_safe_value. Primitives are finished here; dicts and
+    sequences get an empty output container that is filled later from stack.
+    """
     if depth > _MAX_JSON_DEPTH:
         return TRUNCATED_MARKER
-    if value is None or isinstance(value, (bool, int, float, str)):
+    kind = _JSON_KINDS.get(type(value))
+    if kind is None:
+        kind = _classify_json_node(value)
+    if kind == _PRIMITIVE:
         return value
-    if isinstance(value, dict):
-        return {str(k): _json_safe_value(v, depth + 1) for k, v in value.items()}
-    if isinstance(value, (list, tuple)):
-        return [_json_safe_value(item, depth + 1) for item in value]
+    if kind == _DICT:
+        out: dict[str, Any] = {}
+        stack.append((value, out, depth + 1))
+        return out
+    if kind == _SEQ:
+        out_list: list[Any] = [None] * len(value)
+        stack.append((value, out_list, depth + 1))
+        return out_list
     return str(value)
 
 
+def _json_safe_value(value: Any, depth: int) -> Any:
+    """Convert value to a JSON-serializable form; non-serializable types become str.
+    When depth is exceeded, returns TRUNCATED_MARKER (consistent with redaction).
+    Walks the structure with an explicit stack instead of recursion."""
+    stack: list[tuple[Any, Any, int]] = []
+    result = _json_safe_node(value, depth, stack)
+    while stack:
+        src, dst, child_depth = stack.pop()
+        if type(dst) is dict:
+            for k, v in src.items():
+                dst[str(k)] = _json_safe_node(v, child_depth, stack)
+        else:
+            for i, item in enumerate(src):
+                dst[i] = _json_safe_node(item, child_depth, stack)
+    return result
+
+
+def _is_json_safe(obj: Any) -> bool:
+    """
+    True if _json_safe_value would return an equal tree: only dict (str keys), list,
+    str, int, float, bool and None, nothing deeper than _MAX_JSON_DEPTH. Iterative.
+    """
+    stack = [(obj, 0)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        value, depth = pop()
+        if depth > _MAX_JSON_DEPTH:
+            return False
+        if value is None or isinstance(value, (bool, int, float, str)):
+            continue
+        if isinstance(value, dict):
+            depth += 1
+            for k, v in value.items():
+                if type(k) is not str:
+                    return False
+                push((v, depth))
+        elif isinstance(value, list):
+            depth += 1
+            for v in value:
+                push((v, depth))
+        else:
+            return False
+    return True
+
+
 def _ensure_json_safe(obj: Any) -> Any:
-    """Ensure object is JSON-serializable; mutates only by building new structures."""
+    """
+    Ensure object is JSON-serializable. Already-safe input is returned as-is; otherwise
+    a converted copy is built (the input is never mutated).
+    """
+    if _is_json_safe(obj):
+        return obj
     return _json_safe_value(obj, 0)
 
 
+# Wire value of each EventType, resolved once: Enum.value is a descriptor lookup per access.
+# Keyed by member; plain strings equal to a member's value hit the same entry.
+_EVENT_TYPE_VALUES: dict[EventType | str, str] = {m: m.value for m in EventType}
+
+
+def _event_type_str(event_type: EventType | str) -> str:
+    """Wire value of an event type (enum member or plain string)."""
+    value = _EVENT_TYPE_VALUES.get(event_type)
+    return value if value is not None else str(event_type)
+
+
+def _safe_dict(value: Any) -> dict[str, Any]:
+    """JSON-safe dict for an event's payload or meta: None -> {}, non-dict -> {"value": ...}."""
+    # TODO: safe_payload defaults to {} if payload is None
+    # However, for some event types it might be meaningful
+    # to preserve `None`
+    if value is None:
+        return {}
+    safe = _ensure_json_safe(value)
+    if not isinstance(safe, dict):
+        safe = {"value": safe}
+    return safe
+
+
+def _trusted_dict(value: Any) -> dict[str, Any]:
+    """_safe_dict for a value the caller has already made JSON-safe: no walk."""
+    if value is None:
+        return {}
+    return value if isinstance(value, dict) else {"value": value}
+
+
 def new_event(
     event_type: EventType | str,
     run_id: str,
@@ -67,6 +206,8 @@ def new_event(
     parent_id: str | None = None,
     duration_ms: int | None = None,
     meta: dict[str, Any] | None = None,
+    _trusted_meta: bool = False,
+    _trusted_payload: bool = False,
 ) -> dict[str, Any]:
     """
     Build an event dict with required fields.
@@ -82,35 +223,71 @@ def new_event(
         parent_id: Optional parent event UUID.
         duration_ms: Optional duration in milliseconds.
         meta: Optional freeform meta dict; made JSON-safe if needed.
+        _trusted_meta: Internal. meta is already JSON-safe (e.g. redaction output);
+            skip the safety walk.
+        _trusted_payload: Internal. Same as _trusted_meta, for payload.
 
     Returns:
         Event dict with spec_version, event_id, run_id, parent_id, event_type,
         ts, duration_ms, name, payload, meta.
     """
-    type_str = (
-        event_type.value if isinstance(event_type, EventType) else str(event_type)
-    )
-    event_id = str(uuid.uuid4())
-    ts = utc_now_iso_ms_z()
-    # TODO: safe_payload defaults to {} if payload is None
-    # However, for some event types it might be meaningful
-    # to preserve `None`
-    safe_payload = _ensure_json_safe(payload) if payload is not None else {}
-    if not isinstance(safe_payload, dict):
-        safe_payload = {"value": safe_payload}
-    safe_meta = _ensure_json_safe(meta) if meta is not None else {}
-    if not isinstance(safe_meta, dict):
-        safe_meta = {"value": safe_meta}
-
     return {
         "spec_version": SPEC_VERSION,
-        "event_id": event_id,
+        "event_id": _fast_uuid4_str(),
         "run_id": run_id,
         "parent_id": parent_id,
-        "event_type": type_str,
-        "ts": ts,
+        "event_type": _event_type_str(event_type),
+        "ts": utc_now_iso_ms_z(),
         "duration_ms": duration_ms,
         "name": str(name),
-        "payload": safe_payload,
-        "meta": safe_meta,
+        "payload": _trusted_dict(payload) if _trusted_payload else _safe_dict(payload),
+        "meta": _trusted_dict(meta) if _trusted_meta else _safe_dict(meta),
     }
+
+
+def make_event_factory(run_id: str) -> Callable[..., dict[str, Any]]:
+    """
+    Return new_event specialized for one run:
+    factory(event_type, name, payload, meta, _trusted_meta=False, _trusted_payload=False).
+
+    Each event is a copy of a per-run template with the constant fields (spec_version,
+    run_id, parent_id=None, duration_ms=None) already set; the result is the same dict,
+    in the same key order, that new_event would build.
+
+    Events stay plain dicts rather than slotted objects: the tracer serializes each one
+    when it is queued (see _tracing._buffer) and keeps no reference afterwards, so an
+    object would only be converted back to a dict for json.dumps.
+    """
+    template: dict[str, Any] = {
+        "spec_version": SPEC_VERSION,
+        "event_id": None,
+        "run_id": run_id,
+        "parent_id": None,
+        "event_type": None,
+        "ts": None,
+        "duration_ms": None,
+        "name": None,
+        "payload": None,
+        "meta": None,
+    }
+
+    def factory(
+        event_type: EventType | str,
+        name: str,
+        payload: Any,
+        meta: dict[str, Any] | None = None,
+        _trusted_meta: bool = False,
+        _trusted_payload: bool = False,
+    ) -> dict[str, Any]:
+        event = template.copy()
+        event["event_id"] = _fast_uuid4_str()
+        event["event_type"] = _event_type_str(event_type)
+        event["ts"] = utc_now_iso_ms_z()
+        event["name"] = str(name)
+        event["payload"] = (
+            _trusted_dict(payload) if _trusted_payload else _safe_dict(payload)
+        )
+        event["meta"] = _trusted_dict(meta) if _trusted_meta else _safe_dict(meta)
+        return event
+
+    return factory
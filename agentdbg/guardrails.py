@@ -6,6 +6,7 @@ No I/O, no network. Used by the tracing layer to abort runs when limits are exce
 
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 from typing import Any
 
 from agentdbg.events import utc_now_iso_ms_z
@@ -123,6 +124,10 @@ def _parse_iso_z(ts: str) -> datetime:
     return datetime.fromisoformat(normalized)
 
 
+# A run's start timestamp is the same for every event it checks; parse it once.
+_parse_started_at = lru_cache(maxsize=64)(_parse_iso_z)
+
+
 def check_after_event(
     event: dict,
     counts: dict,
@@ -198,7 +203,7 @@ def check_after_event(
     if params.max_duration_s is not None:
         now_str = now_iso if now_iso is not None else utc_now_iso_ms_z()
         try:
-            start_dt = _parse_iso_z(started_at_iso)
+            start_dt = _parse_started_at(started_at_iso)
             end_dt = _parse_iso_z(now_str)
             elapsed_s = (end_dt - start_dt).total_seconds()
         except (ValueError, TypeError):
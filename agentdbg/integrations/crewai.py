@@ -160,7 +160,7 @@ def _ensure_crewai_hooks_registered() -> None:
 def _get_active_run_id() -> str | None:
     """Return current run id from active run (same as recorders use); None if no run."""
     ctx = _ensure_run()
-    return ctx[0] if ctx else None
+    return ctx.run_id if ctx is not None else None
 
 
 def _before_llm_call(context: Any) -> bool | None:
@@ -4,6 +4,7 @@ LangChain/LangGraph callback handler that forwards LLM and tool events to AgentD
 Uses only AgentDbg SDK: record_llm_call, record_tool_call. No CLI or server imports.
 """
 
+from collections.abc import Hashable
 from typing import Any
 
 from agentdbg.exceptions import AgentDbgGuardrailExceeded, _AgentDbgAbortSignal
@@ -116,8 +117,8 @@ class AgentDbgLangChainCallbackHandler(BaseCallbackHandler):
 
     def __init__(self) -> None:
         super().__init__()
-        self._pending_llm: dict[str, dict[str, Any]] = {}
-        self._pending_tool: dict[str, dict[str, Any]] = {}
+        self._pending_llm: dict[Hashable, dict[str, Any]] = {}
+        self._pending_tool: dict[Hashable, dict[str, Any]] = {}
         self._key_counter = 0
         self._abort_exception: AgentDbgGuardrailExceeded | None = None
 
@@ -136,14 +137,17 @@ class AgentDbgLangChainCallbackHandler(BaseCallbackHandler):
         self._abort_exception = None
         self.raise_error = False
 
-    def _key(self, run_id: Any = None, parent_run_id: Any = None, **kwargs: Any) -> str:
-        """Composite key for pending calls; reduces collisions and handles missing run_id."""
-        if run_id is not None:
-            return f"{run_id}:{parent_run_id or ''}"
-        if parent_run_id is not None:
-            return f"parent:{parent_run_id}"
+    def _key(
+        self, run_id: Any = None, parent_run_id: Any = None, **kwargs: Any
+    ) -> Hashable:
+        """
+        Composite key for pending calls; reduces collisions and handles missing run_id.
+        A (run_id, parent_run_id) tuple (no string formatting), or an int when both are None.
+        """
+        if run_id is not None or parent_run_id is not None:
+            return (run_id, parent_run_id or None)
         self._key_counter += 1
-        return f"fallback:{self._key_counter}"
+        return self._key_counter
 
     def _check_aborted(self) -> None:
         """If a guardrail abort was already triggered, raise
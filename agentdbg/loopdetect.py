@@ -5,10 +5,31 @@ Stdlib only. Pure functions, no I/O. Used to emit LOOP_WARNING when the last N
 events contain a consecutively repeating signature subsequence.
 """
 
+import threading
+from collections import deque
+from collections.abc import Sequence
+from itertools import islice
+
 # Sentinel for evidence_event_ids when an event has no event_id (better UX than "")
 MISSING_EVENT_ID = "__MISSING__"
 
 
+_EMPTY: dict = {}
+
+
+def _sig_llm(event: dict) -> str:
+    model = (event.get("payload") or _EMPTY).get("model") or "UNKNOWN"
+    return "LLM_CALL:" + str(model)
+
+
+def _sig_tool(event: dict) -> str:
+    tool_name = (event.get("payload") or _EMPTY).get("tool_name") or "UNKNOWN"
+    return "TOOL_CALL:" + str(tool_name)
+
+
+_SIG_DISPATCH = {"LLM_CALL": _sig_llm, "TOOL_CALL": _sig_tool}
+
+
 def compute_signature(event: dict) -> str:
     """
     Produce a stable string signature for an event for loop detection.
@@ -18,61 +39,166 @@ def compute_signature(event: dict) -> str:
     - Else: event_type (or empty string)
     """
     t = event.get("event_type")
-    if t == "LLM_CALL":
-        model = event.get("payload", {}).get("model", "") or "UNKNOWN"
-        return "LLM_CALL:" + str(model)
-    if t == "TOOL_CALL":
-        tool_name = event.get("payload", {}).get("tool_name", "") or "UNKNOWN"
-        return "TOOL_CALL:" + str(tool_name)
+    sig = _SIG_DISPATCH.get(t)
+    if sig is not None:
+        return sig(event)
     return str(t or "")
 
 
+# Signature entry for incremental detection: (interned signature id, signature, event_id).
+# Ids are small ints, so detect_loop_signatures compares ints rather than strings.
+SignatureEntry = tuple[int, str, str]
+
+
+class SignatureWindow:
+    """
+    The last maxlen signatures of a run, as SignatureEntry tuples in ring, plus how often
+    each interned signature occurs in it. A tail loop with r repetitions needs the
+    newest signature at least r times, so push() tells the caller when
+    detect_loop_signatures cannot fire. Signatures that leave the window are forgotten,
+    so memory stays bounded by maxlen however many distinct signatures a run produces.
+    Thread-safe; scan snapshot() rather than ring when other threads may push.
+    """
+
+    __slots__ = ("ring", "interned", "_counts", "_next_id", "_lock")
+
+    def __init__(self, maxlen: int) -> None:
+        self.ring: deque[SignatureEntry] = deque(maxlen=maxlen)
+        self.interned: dict[str, int] = {}
+        self._counts: dict[int, int] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ring)
+
+    def push(self, event: dict) -> int:
+        """Append event's signature; return how many times it now occurs in the window."""
+        sig = compute_signature(event)
+        event_id = event.get("event_id") or MISSING_EVENT_ID
+        with self._lock:
+            interned = self.interned
+            counts = self._counts
+            ring = self.ring
+            if ring and len(ring) == ring.maxlen:
+                old_id, old_sig, _ = ring[0]
+                left = counts[old_id] - 1
+                if left:
+                    counts[old_id] = left
+                else:
+                    del counts[old_id]
+                    del interned[old_sig]
+            sig_id = interned.get(sig)
+            if sig_id is None:
+                # Ids are never reused, so entries still in the ring keep distinct ids.
+                sig_id = interned[sig] = self._next_id
+                self._next_id += 1
+            ring.append((sig_id, sig, event_id))
+            n = counts.get(sig_id, 0) + 1
+            counts[sig_id] = n
+        return n
+
+    def snapshot(self) -> list[SignatureEntry]:
+        """Copy of ring taken under the lock, safe to scan while other threads push."""
+        with self._lock:
+            return list(self.ring)
+
+
 def detect_loop(
-    events: list[dict],
+    events: Sequence[dict] | deque[dict],
     window: int,
     repetitions: int,
 ) -> dict | None:
     """
     Detect a consecutively repeating signature subsequence near the end of the run.
 
-    Only considers the last `window` events. Finds the smallest pattern length m (>= 1)
-    such that the last m*repetitions signatures form the same m-length block repeated
-    `repetitions` times. Returns a LOOP_WARNING payload or None.
+    Only considers the last `window` events (events may be a list or a bounded deque).
+    Finds the smallest pattern length m (>= 1) such that the last m*repetitions
+    signatures form the same m-length block repeated `repetitions` times. Returns a
+    LOOP_WARNING payload or None.
     """
     if not events or repetitions < 2 or window < 2:
         return None
 
-    events_window = events[-window:] if len(events) >= window else events
-    n = len(events_window)
-    sigs = [compute_signature(e) for e in events_window]
+    if isinstance(events, list):
+        events_window = events[-window:] if len(events) >= window else events
+    else:
+        # Copy only the tail, walking back from the end of the deque.
+        events_window = list(islice(reversed(events), window))
+        events_window.reverse()
+    if len(events_window) // repetitions < 1:
+        return None
+
+    ring: list[SignatureEntry] = []
+    interned: dict[str, int] = {}
+    for e in events_window:
+        sig = compute_signature(e)
+        sig_id = interned.setdefault(sig, len(interned))
+        ring.append((sig_id, sig, e.get("event_id") or MISSING_EVENT_ID))
+    return detect_loop_signatures(ring, window, repetitions)
+
+
+def detect_loop_signatures(
+    ring: Sequence[SignatureEntry] | deque[SignatureEntry],
+    window: int,
+    repetitions: int,
+) -> dict | None:
+    """
+    detect_loop over SignatureEntry tuples (e.g. a SignatureWindow's ring or snapshot), so
+    signatures are not recomputed per call. Same result as detect_loop on the
+    corresponding events.
+    """
+    n = min(len(ring), window)
+    if n < 2 or repetitions < 2 or window < 2:
+        return None
 
     # m * repetitions must fit in the window
     max_m = n // repetitions
     if max_m < 1:
         return None
 
+    # Newest first: the tail is a block of length m repeated `repetitions` times iff
+    # rev[i] == rev[i + m] for i < m * (repetitions - 1), i.e. iff z[m] >= m * (repetitions - 1).
+    # One O(n) Z-array answers every m.
+    it = reversed(ring)
+    rev = [next(it)[0] for _ in range(n)]
+    z = _z_array(rev)
+
     for m in range(1, max_m + 1):
-        L = m * repetitions
-        if L > n:
-            continue
-        tail = sigs[-L:]
-        block = tail[:m]
-        # Check tail == block repeated 'repetitions' times
-        if all(tail[i * m : (i + 1) * m] == block for i in range(repetitions)):
-            evidence_events = events_window[-L:]
-            evidence_event_ids = [
-                e.get("event_id") or MISSING_EVENT_ID for e in evidence_events
-            ]
-            pattern = " -> ".join(block)
+        if z[m] >= m * (repetitions - 1):
+            L = m * repetitions
+            if isinstance(ring, list):
+                entries = ring[-L:]
+            else:
+                # Copy only the tail, as detect_loop does for deques.
+                entries = list(islice(reversed(ring), L))
+                entries.reverse()
             return {
-                "pattern": pattern,
+                "pattern": " -> ".join(entry[1] for entry in entries[:m]),
                 "repetitions": repetitions,
-                "window_size": len(events_window),
-                "evidence_event_ids": evidence_event_ids,
+                "window_size": n,
+                "evidence_event_ids": [entry[2] for entry in entries],
             }
     return None
 
 
+def _z_array(seq: list[int]) -> list[int]:
+    """z[i] = length of the longest common prefix of seq and seq[i:] (z[0] = len(seq))."""
+    n = len(seq)
+    z = [0] * n
+    if n:
+        z[0] = n
+    left = right = 0
+    for i in range(1, n):
+        k = min(right - i, z[i - left]) if i < right else 0
+        while i + k < n and seq[k] == seq[i + k]:
+            k += 1
+        z[i] = k
+        if i + k > right:
+            left, right = i, i + k
+    return z
+
+
 def pattern_key(payload: dict) -> str:
     """
     Stable key for deduplication from LOOP_WARNING payload.
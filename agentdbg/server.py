@@ -4,76 +4,218 @@ Minimal FastAPI server for the local viewer.
 Serves GET /api/runs, GET /api/runs/{run_id}, GET /api/runs/{run_id}/events,
 and GET / with static index.html. No CORS by default.
 Config is loaded once at app creation and cached on app.state.
+Run metadata and events carry an ETag derived from the backing file's stat, so
+repeat polls with If-None-Match get 304 without reading or serializing the file.
+Static UI assets are read once at app creation and served from memory with an ETag.
+Responses of 1 KiB or more are gzip-compressed for clients that accept it.
+Run list, metadata and events are serialized straight to bytes (orjson when installed),
+bypassing FastAPI's response-model validation and jsonable_encoder. Serialized events
+bodies are also cached by ETag, so unconditional re-fetches of an unchanged run skip
+the JSONL parse.
 """
 
+import functools
+import hashlib
+import json
+import logging
+import os
 from pathlib import Path
 
-from fastapi import Depends, FastAPI, HTTPException, Request, Response
-from fastapi.responses import FileResponse
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 
 import agentdbg.storage as storage
 from agentdbg.config import AgentDbgConfig, load_config
 from agentdbg.constants import SPEC_VERSION
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
 UI_STATIC_DIR = Path(__file__).resolve().parent / "ui_static"
 UI_INDEX_PATH = UI_STATIC_DIR / "index.html"
 UI_STYLES_PATH = UI_STATIC_DIR / "styles.css"
 UI_APP_JS_PATH = UI_STATIC_DIR / "app.js"
 FAVICON_PATH = UI_STATIC_DIR / "favicon.svg"
 
+# Serialized /events bodies kept per app, keyed by (run_id, events.jsonl ETag).
+# Small: entries can be megabytes, and a live run adds a new key on every change.
+_EVENTS_BODY_CACHE_SIZE = 8
+
+# /events?offset=&limit= paging: default and maximum page size.
+_EVENTS_PAGE_DEFAULT = 500
+_EVENTS_PAGE_MAX = 10_000
+
 
 def _get_config(request: Request) -> AgentDbgConfig:
     """Return config cached on app state (set at app creation)."""
     return request.app.state.config
 
 
+def _file_etag(st: os.stat_result | None) -> str:
+    """Strong ETag from inode, mtime_ns and size; changes on every append or rewrite."""
+    if st is None:
+        return '"0"'
+    return f'"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match lists etag (weak or strong) or is '*'."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _json_bytes(payload: dict) -> bytes:
+    """
+    Serialize data already known to be JSON-safe (it was loaded from JSON). Data orjson
+    rejects (e.g. ints beyond 64 bits, kept by the stdlib reader) falls back to stdlib json.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload)
+        except TypeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def _json_response(payload: dict, headers: dict[str, str] | None = None) -> Response:
+    """JSON response from data already known to be JSON-safe (it was loaded from JSON)."""
+    return Response(
+        content=_json_bytes(payload), media_type="application/json", headers=headers
+    )
+
+
+def _load_static(path: Path) -> tuple[bytes, str] | None:
+    """Read a UI asset once; return (content, strong ETag), or None if it is missing."""
+    try:
+        content = path.read_bytes()
+    except OSError as e:
+        # Its route answers 404 for the life of the app without touching the disk again.
+        logger.warning("agentdbg viewer: UI asset unavailable %s: %s", path, e)
+        return None
+    digest = hashlib.md5(content, usedforsecurity=False).hexdigest()
+    return content, f'"{digest}"'
+
+
+def _static_response(
+    request: Request,
+    asset: tuple[bytes, str],
+    media_type: str,
+    cache_control: str = "no-cache",
+) -> Response:
+    """Serve an in-memory asset, or 304 when the client already has this version."""
+    content, etag = asset
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
 def create_app() -> FastAPI:
     """Create and return the FastAPI application for the local viewer."""
     app = FastAPI(title="AgentDbg Viewer")
+    # zlib's default level: nearly level 9's ratio on event JSON for much less CPU.
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
     app.state.config = load_config()
+    favicon = _load_static(FAVICON_PATH)
+    styles = _load_static(UI_STYLES_PATH)
+    app_js = _load_static(UI_APP_JS_PATH)
+    index_html = _load_static(UI_INDEX_PATH)
+
+    @functools.lru_cache(maxsize=_EVENTS_BODY_CACHE_SIZE)
+    def events_body(
+        run_id: str, etag: str, offset: int | None, limit: int | None
+    ) -> bytes:
+        """Events envelope for run_id as of the events.jsonl version named by etag."""
+        config = app.state.config
+        if offset is None and limit is None:
+            events = storage.load_events(run_id, config)
+            return _json_bytes(
+                {"spec_version": SPEC_VERSION, "run_id": run_id, "events": events}
+            )
+        offset = offset or 0
+        limit = limit or _EVENTS_PAGE_DEFAULT
+        events, total = storage.load_events_page(run_id, config, offset, limit)
+        next_offset = offset + limit if offset + limit < total else None
+        return _json_bytes(
+            {
+                "spec_version": SPEC_VERSION,
+                "run_id": run_id,
+                "events": events,
+                "offset": offset,
+                "limit": limit,
+                "total": total,
+                "next_offset": next_offset,
+            }
+        )
 
     class RenameRunRequest(BaseModel):
         run_name: str
 
     @app.get("/api/runs")
-    def get_runs(config: AgentDbgConfig = Depends(_get_config)) -> dict:
+    def get_runs(config: AgentDbgConfig = Depends(_get_config)) -> Response:
         """List recent runs. Response: { spec_version, runs }."""
         runs = storage.list_runs(limit=50, config=config)
-        return {"spec_version": SPEC_VERSION, "runs": runs}
+        return _json_response({"spec_version": SPEC_VERSION, "runs": runs})
 
     @app.get("/api/runs/{run_id}")
     def get_run_meta(
-        run_id: str, config: AgentDbgConfig = Depends(_get_config)
-    ) -> dict:
-        """Return run.json metadata for the given run_id."""
+        run_id: str,
+        request: Request,
+        config: AgentDbgConfig = Depends(_get_config),
+    ) -> Response:
+        """Return run.json metadata for the given run_id. 304 if If-None-Match matches."""
         try:
-            return storage.load_run_meta(run_id, config)
+            # Stat before reading: a concurrent rewrite then yields a stale tag, never stale data.
+            etag = _file_etag(storage.stat_run_meta(run_id, config))
+            if _etag_matches(request, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            meta = storage.load_run_meta(run_id, config)
         except ValueError:
             raise HTTPException(status_code=400, detail="invalid run_id")
         except FileNotFoundError:
             raise HTTPException(status_code=404, detail="run not found")
+        return _json_response(meta, {"ETag": etag, "Cache-Control": "no-cache"})
 
     @app.get("/api/runs/{run_id}/events")
     def get_run_events(
-        run_id: str, config: AgentDbgConfig = Depends(_get_config)
-    ) -> dict:
-        """Return events array for the run. 404 if run not found."""
-        try:
-            storage.load_run_meta(run_id, config)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="invalid run_id")
-        except FileNotFoundError:
-            raise HTTPException(status_code=404, detail="run not found")
+        run_id: str,
+        request: Request,
+        offset: int | None = Query(None, ge=0),
+        limit: int | None = Query(None, ge=1, le=_EVENTS_PAGE_MAX),
+        config: AgentDbgConfig = Depends(_get_config),
+    ) -> Response:
+        """
+        Return events array for the run. 404 if run not found; 304 if unchanged.
+        With offset and/or limit, return that page plus total and next_offset.
+        """
         try:
-            events = storage.load_events(run_id, config)
+            # Existence only: run.json is not parsed for the events endpoint.
+            if not storage.run_exists(run_id, config):
+                raise HTTPException(status_code=404, detail="run not found")
+            etag = _file_etag(storage.stat_events(run_id, config))
         except ValueError:
             raise HTTPException(status_code=400, detail="invalid run_id")
-        return {
-            "spec_version": SPEC_VERSION,
-            "run_id": run_id,
-            "events": events,
-        }
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        # The stat precedes the read, so a cached body is never older than its tag.
+        return Response(
+            content=events_body(run_id, etag, offset, limit),
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
 
     @app.get("/api/runs/{run_id}/paths")
     def get_run_paths(
@@ -135,40 +277,36 @@ def create_app() -> FastAPI:
         return Response(status_code=204)
 
     @app.get("/favicon.svg")
-    def serve_favicon() -> FileResponse:
+    def serve_favicon(request: Request) -> Response:
         """Serve favicon to avoid 404 and improve polish."""
-        if not FAVICON_PATH.is_file():
+        if favicon is None:
             raise HTTPException(status_code=404, detail="favicon not found")
-        return FileResponse(FAVICON_PATH, media_type="image/svg+xml")
+        return _static_response(
+            request, favicon, "image/svg+xml", cache_control="public, max-age=3600"
+        )
 
     @app.get("/styles.css")
-    def serve_styles() -> Response:
+    def serve_styles(request: Request) -> Response:
         """Serve UI stylesheet."""
-        if not UI_STYLES_PATH.is_file():
+        if styles is None:
             raise HTTPException(status_code=404, detail="styles not found")
-        response = FileResponse(UI_STYLES_PATH, media_type="text/css")
-        response.headers["Cache-Control"] = "no-cache"
-        return response
+        return _static_response(request, styles, "text/css")
 
     @app.get("/app.js")
-    def serve_app_js() -> Response:
+    def serve_app_js(request: Request) -> Response:
         """Serve UI application script."""
-        if not UI_APP_JS_PATH.is_file():
+        if app_js is None:
             raise HTTPException(status_code=404, detail="app.js not found")
-        response = FileResponse(UI_APP_JS_PATH, media_type="application/javascript")
-        response.headers["Cache-Control"] = "no-cache"
-        return response
+        return _static_response(request, app_js, "application/javascript")
 
     @app.get("/")
-    def serve_ui() -> Response:
+    def serve_ui(request: Request) -> Response:
         """Serve the static HTML UI with content-type text/html."""
-        if not UI_INDEX_PATH.is_file():
+        if index_html is None:
             raise HTTPException(
                 status_code=404,
                 detail="UI not found: agentdbg/ui_static/index.html is missing",
             )
-        response = FileResponse(UI_INDEX_PATH, media_type="text/html")
-        response.headers["Cache-Control"] = "no-cache"
-        return response
+        return _static_response(request, index_html, "text/html")
 
     return app
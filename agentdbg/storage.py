@@ -7,24 +7,56 @@ Uses config.data_dir (default ~/.agentdbg). Stdlib only.
 
 import json
 import logging
+import mmap
 import os
+import re
 import shutil
+import stat
 import tempfile
+import threading
 import uuid
+from bisect import bisect_left
+from collections import OrderedDict
 from datetime import datetime, timezone
+from operator import itemgetter
 from pathlib import Path
+from typing import BinaryIO, Iterator
 
 from agentdbg.config import AgentDbgConfig
 from agentdbg.constants import SPEC_VERSION, default_counts
 from agentdbg.events import utc_now_iso_ms_z
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 RUN_JSON = "run.json"
 EVENTS_JSONL = "events.jsonl"
 
 logger = logging.getLogger(__name__)
 
+# Parsed run.json by path, validated against (st_ino, st_mtime_ns, st_size). LRU, bounded
+# by _meta_cache_cap: at least _META_CACHE_MAX, raised by list_runs to the number of runs
+# it scans so that a full scan never evicts its own entries.
+_META_CACHE_MAX = 512
+_meta_cache_cap = _META_CACHE_MAX
+_META_CACHE: OrderedDict[str, tuple[tuple[int, int, int], dict, str]] = OrderedDict()
+_meta_cache_lock = threading.Lock()
+
+# Start offsets of the event lines in events.jsonl by path: (st_ino, bytes scanned, starts).
+# events.jsonl is append-only, so an index is extended from where its scan stopped.
+# _line_index_lock guards only the dict; the scans themselves run without it.
+_LINE_INDEX_MAX = 16
+_LINE_INDEX: OrderedDict[str, tuple[int, int, list[int]]] = OrderedDict()
+_line_index_lock = threading.Lock()
+# Bytes that bytes.strip() removes.
+_ASCII_WHITESPACE = frozenset(b" \t\n\r\x0b\x0c")
+
 # run_id MUST be UUIDv4. We enforce canonical form (lowercase with hyphens).
-_RUN_ID_MAX_LEN = 36
+_UUID4_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}"
+)
 
 
 def validate_run_id_format(run_id: str) -> str:
@@ -35,20 +67,8 @@ def validate_run_id_format(run_id: str) -> str:
     if not run_id or not isinstance(run_id, str):
         raise ValueError("invalid run_id")
     run_id = run_id.strip()
-    if (
-        len(run_id) > _RUN_ID_MAX_LEN
-        or ".." in run_id
-        or "/" in run_id
-        or "\\" in run_id
-    ):
-        raise ValueError("invalid run_id")
-    try:
-        u = uuid.UUID(run_id)
-    except (ValueError, TypeError, AttributeError):
-        raise ValueError("invalid run_id")
-    if u.version != 4:
-        raise ValueError("invalid run_id")
-    if str(u) != run_id:
+    # The pattern admits only hex digits and hyphens, so no separators or "..".
+    if _UUID4_RE.fullmatch(run_id) is None:
         raise ValueError("invalid run_id")
     return run_id
 
@@ -61,19 +81,11 @@ def _runs_dir(config: AgentDbgConfig) -> Path:
 def _run_dir(run_id: str, config: AgentDbgConfig) -> Path:
     """
     Return the run directory: <data_dir>/runs/<run_id>/.
-    Validates run_id format and ensures resolved path is under runs base (defense-in-depth).
+    Validates run_id format. A canonical UUID is a single path component of hex digits
+    and hyphens, so the joined path is always directly under the runs base; no
+    filesystem resolution is needed to confirm it.
     """
-    validate_run_id_format(run_id)
-    base = _runs_dir(config)
-    path = base / run_id
-    try:
-        resolved = path.resolve()
-        base_resolved = base.resolve()
-        if not resolved.is_relative_to(base_resolved):
-            raise ValueError("invalid run_id")
-    except (ValueError, OSError):
-        raise ValueError("invalid run_id")
-    return path
+    return _runs_dir(config) / validate_run_id_format(run_id)
 
 
 def _run_json_path(run_id: str, config: AgentDbgConfig) -> Path:
@@ -122,17 +134,92 @@ def create_run(run_name: str | None, config: AgentDbgConfig) -> dict:
     }
 
 
+def event_to_line(event: dict) -> bytes:
+    """
+    Serialize one event to its UTF-8 events.jsonl line (including the trailing newline).
+    Values that are not JSON-native are written as str(value). Uses orjson when installed
+    (the orjson extra); events orjson rejects (e.g. non-str keys, ints beyond 64 bits)
+    fall back to stdlib json. NaN and infinities are written as null by orjson and as
+    NaN/Infinity by stdlib json; the readers accept both.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(event, default=str, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass
+    return (json.dumps(event, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def _json_loads(data: bytes) -> object:
+    """
+    Decode one JSON document with orjson when installed. Input orjson rejects but stdlib
+    json accepts (NaN, Infinity, as written by the stdlib serializer) is decoded with
+    json.loads; ValueError if neither can decode it.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
 def append_event(run_id: str, event: dict, config: AgentDbgConfig) -> None:
     """
     Append one event as a single JSON line to events.jsonl and flush.
 
-    Does not create the run dir; call create_run first.
+    Does not create the run dir; call create_run first. Values that are not JSON-native
+    are written as str(value).
     """
+    append_event_lines(run_id, [event_to_line(event)], config)
+
+
+_writev = getattr(os, "writev", None)
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX") if _writev is not None else 0
+except (ValueError, OSError, AttributeError):
+    _IOV_MAX = 16  # POSIX minimum
+
+
+def append_event_lines(
+    run_id: str, lines: list[bytes], config: AgentDbgConfig, *, fsync: bool = True
+) -> None:
+    """
+    Append pre-serialized event lines (from event_to_line) to events.jsonl with one
+    (gather) write, and one fsync unless fsync=False. Does not create the run dir; call
+    create_run first.
+    """
+    if not lines:
+        return
     path = _events_path(run_id, config)
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(event, ensure_ascii=False) + "\n")
-        f.flush()
-        os.fsync(f.fileno())
+    with open(path, "ab", buffering=0) as f:
+        fd = f.fileno()
+        if _writev is not None and len(lines) <= _IOV_MAX:
+            # Gather write straight from the line buffers: no joined copy of the batch.
+            written = _writev(fd, lines)
+            total = sum(map(len, lines))
+            if written < total:
+                _write_all(fd, b"".join(lines)[written:])
+        else:
+            _write_all(fd, b"".join(lines))
+        if fsync:
+            os.fsync(fd)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write all of data to fd, continuing after short writes."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def sync_events(run_id: str, config: AgentDbgConfig) -> None:
+    """fsync events.jsonl, making lines appended with fsync=False durable."""
+    fd = os.open(_events_path(run_id, config), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 def finalize_run(
@@ -140,25 +227,28 @@ def finalize_run(
     status: str,
     counts: dict,
     config: AgentDbgConfig,
+    *,
+    duration_ms: int | None = None,
 ) -> None:
     """
     Update run.json with ended_at, duration_ms, status, and counts.
 
-    started_at is read from existing run.json (written at create_run). Uses atomic
+    Callers that timed the run (monotonic clock) pass duration_ms; otherwise it is
+    computed from started_at in run.json (written at create_run). Uses atomic
     write (temp file then replace). status must be "ok" or "error".
     """
     path = _run_json_path(run_id, config)
-    if not path.is_file():
+    try:
+        meta = _read_run_meta(str(path))[0]
+    except (FileNotFoundError, NotADirectoryError):
         raise FileNotFoundError(f"run.json not found for run_id={run_id}")
 
-    with open(path, "r", encoding="utf-8") as f:
-        meta = json.load(f)
-
     ended_at = utc_now_iso_ms_z()
-    started_at = meta.get("started_at") or ended_at
-    start_dt = datetime.fromisoformat(started_at.replace("Z", "+00:00"))
-    end_dt = datetime.fromisoformat(ended_at.replace("Z", "+00:00"))
-    duration_ms = max(0, int((end_dt - start_dt).total_seconds() * 1000))
+    if duration_ms is None:
+        started_at = meta.get("started_at") or ended_at
+        start_dt = datetime.fromisoformat(started_at.replace("Z", "+00:00"))
+        end_dt = datetime.fromisoformat(ended_at.replace("Z", "+00:00"))
+        duration_ms = max(0, int((end_dt - start_dt).total_seconds() * 1000))
 
     merged_counts = default_counts()
     for k in merged_counts:
@@ -175,15 +265,26 @@ def finalize_run(
 
 
 def _atomic_write_json(path: Path, data: dict) -> None:
-    """Write JSON to path atomically (temp file then rename)."""
+    """
+    Write JSON to path atomically (temp file then rename). The document is serialized
+    up front (orjson when installed) and written with a single write.
+    """
+    blob = None
+    if orjson is not None:
+        try:
+            blob = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            pass
+    if blob is None:
+        blob = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
     fd, tmp = tempfile.mkstemp(
         dir=path.parent,
         prefix=path.name + ".",
         suffix=".tmp",
     )
     try:
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
             f.flush()
             os.fsync(f.fileno())
         os.replace(tmp, path)
@@ -203,6 +304,15 @@ def resolve_run_id(prefix: str, config: AgentDbgConfig) -> str:
     match returns it, if multiple returns the most recent by started_at.
     Raises FileNotFoundError if no run matches. Rejects prefix with path traversal.
     """
+    return resolve_and_load_meta(prefix, config)[0]
+
+
+def resolve_and_load_meta(prefix: str, config: AgentDbgConfig) -> tuple[str, dict]:
+    """
+    resolve_run_id plus that run's run.json, from one scan of the runs directory
+    (the scan already reads run.json for every match). Returns (run_id, meta).
+    Raises FileNotFoundError like resolve_run_id.
+    """
     if not prefix or not prefix.strip():
         raise FileNotFoundError("Run ID is required")
     prefix = prefix.strip()
@@ -212,38 +322,79 @@ def resolve_run_id(prefix: str, config: AgentDbgConfig) -> str:
     if not runs_base.is_dir():
         raise FileNotFoundError(f"No runs directory at {runs_base}")
 
-    candidates: list[tuple[datetime | None, str]] = []
-    for entry in runs_base.iterdir():
-        if not entry.is_dir():
-            continue
-        rid = entry.name
-        try:
-            validate_run_id_format(rid)
-        except ValueError:
-            continue
-        if rid != prefix and not rid.startswith(prefix):
-            continue
-        run_json = entry / RUN_JSON
-        if not run_json.is_file():
-            continue
-        try:
-            with open(run_json, "r", encoding="utf-8") as f:
-                meta = json.load(f)
-        except (json.JSONDecodeError, OSError):
-            continue
-        started_str = meta.get("started_at")
-        started_dt = _parse_iso8601_utc(started_str) if started_str else None
-        candidates.append((started_dt, rid))
+    candidates: list[tuple[str, str, dict]] = []
+    with os.scandir(runs_base) as it:
+        for entry in it:
+            rid = entry.name
+            if rid != prefix and not rid.startswith(prefix):
+                continue
+            if not entry.is_dir():
+                continue
+            try:
+                validate_run_id_format(rid)
+            except ValueError:
+                continue
+            try:
+                meta, started_key = _read_run_meta(os.path.join(entry.path, RUN_JSON))
+            except (ValueError, OSError):
+                continue
+            candidates.append((started_key, rid, meta))
 
     if not candidates:
         raise FileNotFoundError(f"No run found matching '{prefix}'")
 
-    def sort_key(item: tuple[datetime | None, str]) -> tuple[bool, datetime]:
-        dt, _ = item
-        return (dt is None, dt or datetime.min.replace(tzinfo=timezone.utc))
+    _, run_id, meta = max(candidates, key=itemgetter(0))
+    return run_id, meta
+
 
-    candidates.sort(key=sort_key, reverse=True)
-    return candidates[0][1]
+def _copy_meta(meta: dict) -> dict:
+    """Copy of a cached run.json dict deep enough that callers cannot alter the cache."""
+    return {k: dict(v) if isinstance(v, dict) else v for k, v in meta.items()}
+
+
+def _read_run_meta(path: str) -> tuple[dict, str]:
+    """
+    Return (run.json dict, started_at sort key) for path. Reparses only when the file's
+    stat changes; otherwise serves a copy from _META_CACHE.
+    Raises OSError if missing or unreadable, ValueError if not a JSON object.
+    """
+    st = os.stat(path)
+    if not stat.S_ISREG(st.st_mode):
+        raise FileNotFoundError(path)
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    with _meta_cache_lock:
+        cached = _META_CACHE.get(path)
+        if cached is not None and cached[0] == stamp:
+            _META_CACHE.move_to_end(path)
+            return _copy_meta(cached[1]), cached[2]
+    # Stat precedes the read, so a concurrent rewrite can only make the stamp stale.
+    with open(path, "rb") as f:
+        raw = f.read()
+    meta = _json_loads(raw)
+    if not isinstance(meta, dict):
+        raise ValueError(f"run.json is not a JSON object: {path}")
+    started_key = _started_sort_key(meta.get("started_at"))
+    with _meta_cache_lock:
+        _META_CACHE[path] = (stamp, meta, started_key)
+        _META_CACHE.move_to_end(path)
+        while len(_META_CACHE) > _meta_cache_cap:
+            _META_CACHE.popitem(last=False)
+    return _copy_meta(meta), started_key
+
+
+def _fit_meta_cache(runs_dir: str, paths: list[str]) -> None:
+    """
+    Before list_runs reads paths (every run.json under runs_dir): forget cached run.json
+    files under runs_dir that are no longer there, and size the cache to hold them all.
+    """
+    global _meta_cache_cap
+    live = set(paths)
+    prefix = os.path.join(runs_dir, "")
+    with _meta_cache_lock:
+        gone = [p for p in _META_CACHE if p.startswith(prefix) and p not in live]
+        for p in gone:
+            del _META_CACHE[p]
+        _meta_cache_cap = max(_META_CACHE_MAX, len(paths))
 
 
 def load_run_meta(run_id: str, config: AgentDbgConfig) -> dict:
@@ -251,10 +402,74 @@ def load_run_meta(run_id: str, config: AgentDbgConfig) -> dict:
     Load run metadata from run.json. Raises FileNotFoundError if run or run.json missing.
     """
     path = _run_json_path(run_id, config)
-    if not path.is_file():
+    try:
+        return _read_run_meta(str(path))[0]
+    except (FileNotFoundError, NotADirectoryError):
         raise FileNotFoundError(f"No run found for run_id '{run_id}'")
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+
+
+def stat_run_meta(run_id: str, config: AgentDbgConfig) -> os.stat_result:
+    """
+    Stat run.json without reading it. Raises FileNotFoundError if run or run.json missing.
+    """
+    path = _run_json_path(run_id, config)
+    try:
+        st = path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        raise FileNotFoundError(f"No run found for run_id '{run_id}'")
+    return st
+
+
+def run_exists(run_id: str, config: AgentDbgConfig) -> bool:
+    """
+    True if the run has a run.json; nothing is read or parsed.
+    Raises ValueError for an invalid run_id.
+    """
+    try:
+        stat_run_meta(run_id, config)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def stat_events(run_id: str, config: AgentDbgConfig) -> os.stat_result | None:
+    """Stat events.jsonl without reading it; None if the run has no events file yet."""
+    try:
+        return _events_path(run_id, config).stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _started_sort_key(started_at: object) -> str:
+    """
+    Chronological sort key for a started_at value. The YYYY-MM-DDTHH:MM:SS.sssZ form
+    written by utc_now_iso_ms_z is fixed-width UTC, so it is its own key and needs no
+    parsing; other ISO8601 shapes are normalized to that form. Missing or invalid
+    values give "", which sorts oldest.
+    """
+    if not isinstance(started_at, str):
+        return ""
+    s = started_at.strip()
+    if (
+        len(s) == 24
+        and s[4] == "-"
+        and s[7] == "-"
+        and s[10] == "T"
+        and s[13] == ":"
+        and s[16] == ":"
+        and s[19] == "."
+        and s[23] == "Z"
+    ):
+        return s
+    dt = _parse_iso8601_utc(s)
+    if dt is None:
+        return ""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    dt = dt.astimezone(timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
 
 
 def _parse_iso8601_utc(s: str) -> datetime | None:
@@ -272,71 +487,246 @@ def _parse_iso8601_utc(s: str) -> datetime | None:
         return None
 
 
+_PARALLEL_SCAN_MIN = 16
+_PARALLEL_SCAN_WORKERS = 8
+
+
+def _try_read_run_meta(path: str) -> tuple[dict, str] | None:
+    """_read_run_meta, or None if run.json is missing, unreadable, or invalid."""
+    try:
+        return _read_run_meta(path)
+    except (ValueError, OSError):
+        return None
+
+
 def list_runs(limit: int, config: AgentDbgConfig) -> list[dict]:
     """
     List most recent runs by started_at descending. Does not parse events.jsonl.
 
-    Sort uses parsed datetime for started_at so ordering is correct even if formats
-    differ (e.g. with/without milliseconds). Runs with missing/invalid started_at
-    sort last. Returns list of run metadata dicts (from run.json only), up to limit.
+    Sort uses _started_sort_key, so ordering is correct even if formats differ
+    (e.g. with/without milliseconds). Runs with missing/invalid started_at sort
+    last. Returns list of run metadata dicts (from run.json only), up to limit.
     """
-    runs_base = _runs_dir(config)
-    if not runs_base.is_dir():
+    runs_dir = str(_runs_dir(config))
+    try:
+        it = os.scandir(runs_dir)
+    except (FileNotFoundError, NotADirectoryError):
         return []
-
-    candidates: list[tuple[datetime | None, dict]] = []
-    for entry in runs_base.iterdir():
-        if not entry.is_dir():
-            continue
-        run_json = entry / RUN_JSON
-        if not run_json.is_file():
-            continue
-        try:
-            with open(run_json, "r", encoding="utf-8") as f:
-                meta = json.load(f)
-        except (json.JSONDecodeError, OSError):
-            continue
-        started_str = meta.get("started_at")
-        started_dt = _parse_iso8601_utc(started_str) if started_str else None
-        candidates.append((started_dt, meta))
-
-    # None sorts before datetime in Python 3, so put (None, meta) last when desc
-    def sort_key(item: tuple[datetime | None, dict]) -> tuple[bool, datetime]:
-        dt, _ = item
-        return (dt is None, dt or datetime.min.replace(tzinfo=timezone.utc))
-
-    candidates.sort(key=sort_key, reverse=True)
+    # DirEntry.is_dir() uses the type from the directory read: no stat per entry.
+    with it:
+        paths = [os.path.join(e.path, RUN_JSON) for e in it if e.is_dir()]
+    _fit_meta_cache(runs_dir, paths)
+
+    # Reads release the GIL, so a cold scan overlaps file latency across threads.
+    # Cached run.json files cost only a stat; they are not worth a pool.
+    uncached = sum(1 for p in paths if p not in _META_CACHE)
+    if uncached >= _PARALLEL_SCAN_MIN:
+        # Deferred: tracing imports storage but never lists runs.
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=_PARALLEL_SCAN_WORKERS) as pool:
+            loaded = list(pool.map(_try_read_run_meta, paths))
+    else:
+        loaded = [_try_read_run_meta(p) for p in paths]
+    candidates = [(key, meta) for meta, key in filter(None, loaded)]
+    candidates.sort(key=itemgetter(0), reverse=True)
     return [meta for _, meta in candidates[:limit]]
 
 
+_READ_CHUNK_BYTES = 64 * 1024
+
+
+def _iter_jsonl_lines(
+    f: BinaryIO, chunk_size: int = _READ_CHUNK_BYTES
+) -> Iterator[bytes]:
+    """
+    Yield the lines of binary file f (without the newline), reading chunk_size bytes at
+    a time and locating newlines with bytes.find. A line that spans chunks is joined
+    once from its pieces.
+    """
+    pending: list[bytes] = []
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        start = 0
+        idx = chunk.find(b"\n")
+        while idx >= 0:
+            if pending:
+                pending.append(chunk[start:idx])
+                yield b"".join(pending)
+                pending.clear()
+            else:
+                yield chunk[start:idx]
+            start = idx + 1
+            idx = chunk.find(b"\n", start)
+        if start < len(chunk):
+            pending.append(chunk[start:])
+    if pending:
+        yield b"".join(pending)
+
+
+def _iter_mmap_lines(mm: mmap.mmap) -> Iterator[bytes]:
+    """Yield the lines of a read-only mapping (without the newline), found with mm.find."""
+    pos = 0
+    size = len(mm)
+    find = mm.find
+    while pos < size:
+        end = find(b"\n", pos)
+        if end < 0:
+            yield mm[pos:]
+            return
+        yield mm[pos:end]
+        pos = end + 1
+
+
 def load_events(run_id: str, config: AgentDbgConfig) -> list[dict]:
     """
     Read events.jsonl for the run and return a list of event dicts.
 
-    Returns [] if the file is missing or empty.
+    Returns [] if the file is missing or empty. The file is memory-mapped and scanned
+    for newlines in place, so only one line at a time is copied into Python (files that
+    cannot be mapped are streamed in 64 KiB chunks). Each line is decoded with orjson
+    when installed, falling back to stdlib json for lines orjson rejects (NaN,
+    Infinity); corrupt lines are logged and skipped.
     """
     path = _events_path(run_id, config)
-    if not path.is_file():
+    try:
+        f = open(path, "rb", buffering=0)
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
         return []
+    loads = _json_loads
     events: list[dict] = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line_no, line in enumerate(f, start=1):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                events.append(json.loads(line))
-            except json.JSONDecodeError as e:
-                logger.warning(
-                    "load_events: skipping corrupt JSONL line run_id=%s line=%s: %s",
-                    run_id,
-                    line_no,
-                    e,
-                )
-                continue
+    append = events.append
+    with f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):  # empty file, or not mappable
+            mm = None
+        lines = _iter_mmap_lines(mm) if mm is not None else _iter_jsonl_lines(f)
+        try:
+            for line_no, line in enumerate(lines, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    append(loads(line))
+                except ValueError as e:
+                    logger.warning(
+                        "load_events: skipping corrupt JSONL line run_id=%s line=%s: %s",
+                        run_id,
+                        line_no,
+                        e,
+                    )
+        finally:
+            if mm is not None:
+                mm.close()
     return events
 
 
+def _scan_line_starts(mm: mmap.mmap, pos: int) -> tuple[list[int], int]:
+    """
+    Return (starts, end): start offsets of the non-blank newline-terminated lines in mm
+    from pos on, and the offset just past the last newline. A Python loop over mm.find,
+    one iteration per line.
+    """
+    starts: list[int] = []
+    find = mm.find
+    while True:
+        end = find(b"\n", pos)
+        if end < 0:
+            return starts, pos
+        # Whitespace-only lines are not events (load_events strips and skips them);
+        # only lines starting with whitespace need the full check.
+        if end > pos and (mm[pos] not in _ASCII_WHITESPACE or mm[pos:end].strip()):
+            starts.append(pos)
+        pos = end + 1
+
+
+def _event_line_starts(
+    path: str, ino: int, mm: mmap.mmap
+) -> tuple[list[int], int, int]:
+    """
+    Return (starts, count, scanned): start offsets of the non-blank newline-terminated
+    lines in mm, how many of them are valid for this mapping, and the offset just past
+    the last newline. Only bytes not seen before are scanned, outside _line_index_lock so
+    a large file does not block paging of other runs. The list is shared and only ever
+    appended to, so callers read just its first count entries.
+    """
+    with _line_index_lock:
+        cached = _LINE_INDEX.get(path)
+        if cached is not None and cached[0] == ino and cached[1] <= len(mm):
+            _, base_pos, starts = cached
+        else:
+            base_pos, starts = 0, []
+        base_count = len(starts)
+    added, pos = _scan_line_starts(mm, base_pos)
+    count = base_count + len(added)
+    with _line_index_lock:
+        cached = _LINE_INDEX.get(path)
+        if cached is not None and cached[2] is starts:
+            if pos > cached[1]:
+                # A concurrent scan of this file may have appended part of added.
+                starts.extend(added[bisect_left(added, cached[1]) :])
+                _LINE_INDEX[path] = (ino, pos, starts)
+        else:
+            starts = starts[:base_count] + added
+            _LINE_INDEX[path] = (ino, pos, starts)
+        _LINE_INDEX.move_to_end(path)
+        while len(_LINE_INDEX) > _LINE_INDEX_MAX:
+            _LINE_INDEX.popitem(last=False)
+    return starts, count, pos
+
+
+def load_events_page(
+    run_id: str, config: AgentDbgConfig, offset: int, limit: int
+) -> tuple[list[dict], int]:
+    """
+    Read up to limit events starting at event index offset. Returns (events, total).
+
+    Only the requested lines are decoded; line positions come from an in-memory index
+    that later calls extend incrementally. Event indices count non-blank lines, as
+    load_events does, so a corrupt line (logged and skipped) leaves the page one event
+    short. Lines are decoded like load_events (orjson, then stdlib json for NaN/Infinity).
+    """
+    path = _events_path(run_id, config)
+    try:
+        f = open(path, "rb", buffering=0)
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return [], 0
+    loads = _json_loads
+    events: list[dict] = []
+    with f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return [], 0
+        except OSError:  # not mappable: page through a full load instead
+            all_events = load_events(run_id, config)
+            return all_events[offset : offset + limit], len(all_events)
+        with mm:
+            size = len(mm)
+            starts, indexed, scanned = _event_line_starts(
+                str(path), os.fstat(f.fileno()).st_ino, mm
+            )
+            total = indexed
+            if scanned < size and mm[scanned:].strip():
+                total += 1  # unterminated last line, possibly still being written
+            for i in range(offset, min(offset + limit, total)):
+                start = starts[i] if i < indexed else scanned
+                end = mm.find(b"\n", start)
+                try:
+                    events.append(loads(mm[start : end if end >= 0 else size]))
+                except ValueError as e:
+                    logger.warning(
+                        "load_events_page: skipping corrupt JSONL line run_id=%s event=%s: %s",
+                        run_id,
+                        i,
+                        e,
+                    )
+    return events, total
+
+
 def get_run_paths(run_id: str, config: AgentDbgConfig) -> dict:
     """
     Return local filesystem paths for a run.
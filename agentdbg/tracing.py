@@ -5,10 +5,12 @@ Re-export shim: public API lives in agentdbg._tracing.
 """
 
 from agentdbg._tracing import (
+    bind_trace_context,
     has_active_run,
     record_llm_call,
     record_tool_call,
     record_state,
+    submit_traced,
     trace,
     traced_run,
 )
@@ -20,4 +22,6 @@ __all__ = [
     "record_llm_call",
     "record_tool_call",
     "record_state",
+    "submit_traced",
+    "bind_trace_context",
 ]
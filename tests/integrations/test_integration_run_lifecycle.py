@@ -126,3 +126,28 @@ def test_run_exit_callback_event_before_run_end_and_exc_when_raises(temp_data_di
     assert flush_indices[0] < run_end_indices[0], (
         "run_exit-recorded event must appear before RUN_END"
     )
+
+
+def test_registration_is_idempotent_and_does_not_affect_in_flight_invocation(
+    temp_data_dir,
+):
+    """Registering the same fn twice is a no-op; a callback registered mid-invocation runs next time."""
+    calls = []
+
+    def late():
+        calls.append("late")
+
+    def on_enter():
+        calls.append("enter")
+        register_run_enter(late)
+
+    register_run_enter(on_enter)
+    register_run_enter(on_enter)
+
+    with traced_run(name="first"):
+        pass
+    assert calls == ["enter"]
+
+    with traced_run(name="second"):
+        pass
+    assert calls == ["enter", "enter", "late"]
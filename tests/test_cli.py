@@ -7,6 +7,8 @@ Covers: list (empty dir exit 0), export (missing run exit 2), list --json (valid
 
 import json
 import socket
+import subprocess
+import sys
 import threading
 import time
 
@@ -103,6 +105,42 @@ def test_export_success_path_writes_run_and_events(empty_data_dir):
     assert data["events"][0].get("event_type") == EventType.TOOL_CALL.value
 
 
+@pytest.mark.parametrize("use_orjson", [True, False], ids=["orjson", "json"])
+def test_list_json_and_export_handle_data_orjson_rejects(
+    empty_data_dir, monkeypatch, use_orjson
+):
+    """Wide ints and non-str keys are written with either serializer, not EXIT_INTERNAL."""
+    import agentdbg.cli as cli_mod
+    import agentdbg.storage as storage_mod
+    from agentdbg.config import load_config
+    from agentdbg.storage import create_run
+
+    if not use_orjson:
+        monkeypatch.setattr(cli_mod, "orjson", None)
+    elif cli_mod.orjson is None:
+        pytest.skip("orjson not installed")
+
+    config = load_config()
+    run_id = create_run("wide", config)["run_id"]
+    # The NaN makes the reader fall back to stdlib json, which keeps the wide int an int.
+    wide = 2**70 + 1
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    ev = {"event_type": "TOOL_CALL", "payload": {"big": wide, "t": float("nan")}}
+    events_path.write_text(json.dumps(ev) + "\n", encoding="utf-8")
+    tmpfile = empty_data_dir / "wide.json"
+    result = runner.invoke(app, ["export", run_id, "--out", str(tmpfile)])
+    assert result.exit_code == 0, result.output
+    assert json.loads(tmpfile.read_text())["events"][0]["payload"]["big"] == wide
+
+    runs = [{"run_id": run_id, "big": wide, 1: "int key"}]
+    monkeypatch.setattr(storage_mod, "list_runs", lambda limit, config: runs)
+    result = runner.invoke(app, ["list", "--json"])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["runs"] == [
+        {"run_id": run_id, "big": wide, "1": "int key"}
+    ]
+
+
 def test_list_json_outputs_valid_json_spec_version_and_runs(empty_data_dir):
     """agentdbg list --json outputs valid JSON with keys spec_version and runs."""
     result = runner.invoke(app, ["list", "--json"])
@@ -114,6 +152,22 @@ def test_list_json_outputs_valid_json_spec_version_and_runs(empty_data_dir):
     assert isinstance(data["runs"], list)
 
 
+def test_list_json_writes_to_text_only_stdout(empty_data_dir, monkeypatch):
+    """list --json works when stdout is a text stream without .buffer (e.g. StringIO)."""
+    import io
+
+    from agentdbg.cli import list_cmd
+    from agentdbg.config import load_config
+    from agentdbg.storage import create_run
+
+    run_id = create_run("grüße", load_config())["run_id"]
+    out = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+    list_cmd(limit=20, json_out=True)
+    data = json.loads(out.getvalue())
+    assert [(r["run_id"], r["run_name"]) for r in data["runs"]] == [(run_id, "grüße")]
+
+
 def test_list_with_actual_runs_shows_runs(empty_data_dir):
     """agentdbg list with real runs shows run_id/run_name in text output and in --json runs."""
     from agentdbg.config import load_config
@@ -136,6 +190,41 @@ def test_list_with_actual_runs_shows_runs(empty_data_dir):
     assert data["runs"][0]["run_name"] == "list_me_run"
 
 
+def test_list_and_export_keep_non_ascii_unescaped(empty_data_dir):
+    """list --json and export write UTF-8 JSON without \\u escapes."""
+    from agentdbg.config import load_config
+    from agentdbg.storage import create_run
+    from tests.conftest import get_latest_run_id
+
+    config = load_config()
+    create_run("прогон-ü", config)
+    run_id = get_latest_run_id(config)
+
+    result = runner.invoke(app, ["list", "--json"])
+    assert result.exit_code == 0
+    assert "прогон-ü" in result.output
+    assert json.loads(result.output)["runs"][0]["run_name"] == "прогон-ü"
+
+    tmpfile = empty_data_dir / "export_utf8.json"
+    result = runner.invoke(app, ["export", run_id, "--out", str(tmpfile)])
+    assert result.exit_code == 0
+    text = tmpfile.read_text(encoding="utf-8")
+    assert "прогон-ü" in text
+    assert json.loads(text)["run"]["run_name"] == "прогон-ü"
+
+
+def test_cli_import_does_not_load_viewer_server():
+    """Importing the CLI (as list/export do) does not import fastapi, uvicorn, or the server."""
+    code = (
+        "import sys, agentdbg.cli; "
+        "print([m for m in ('fastapi', 'uvicorn', 'agentdbg.server') if m in sys.modules])"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "[]"
+
+
 # ---------------------------------------------------------------------------
 # _wait_for_port readiness-probe tests
 # ---------------------------------------------------------------------------
@@ -18,6 +18,8 @@ _ENV_KEYS = [
     "AGENTDBG_LOOP_WINDOW",
     "AGENTDBG_LOOP_REPETITIONS",
     "AGENTDBG_DATA_DIR",
+    "AGENTDBG_CAPTURE_STACKS",
+    "AGENTDBG_DISABLED_EVENT_TYPES",
     "AGENTDBG_STOP_ON_LOOP",
     "AGENTDBG_STOP_ON_LOOP_MIN_REPETITIONS",
     "AGENTDBG_MAX_LLM_CALLS",
@@ -134,3 +136,144 @@ def test_yaml_redact_off_disables_redaction(tmp_path, monkeypatch):
     # api_key must NOT be redacted because redact is off.
     assert result["api_key"] == "sk-secret-1234"
     assert result["data"] == "hello"
+
+
+def test_capture_stacks_from_yaml_and_env(tmp_path, monkeypatch):
+    """capture_stacks defaults on, can be disabled in YAML, and env overrides YAML."""
+    fake_home = tmp_path / "fakehome"
+    fake_home.mkdir()
+    monkeypatch.setattr(Path, "home", staticmethod(lambda: fake_home))
+
+    from agentdbg.config import load_config
+
+    assert load_config(project_root=tmp_path).capture_stacks is True
+
+    _write_yaml(tmp_path, "capture_stacks: false\n")
+    assert load_config(project_root=tmp_path).capture_stacks is False
+
+    monkeypatch.setenv("AGENTDBG_CAPTURE_STACKS", "1")
+    assert load_config(project_root=tmp_path).capture_stacks is True
+
+
+def test_disabled_event_types_from_yaml_and_env(tmp_path, monkeypatch):
+    """disabled_event_types defaults empty; YAML and env accept recorder types only."""
+    fake_home = tmp_path / "fakehome"
+    fake_home.mkdir()
+    monkeypatch.setattr(Path, "home", staticmethod(lambda: fake_home))
+
+    from agentdbg.config import load_config
+
+    assert load_config(project_root=tmp_path).disabled_event_types == frozenset()
+
+    _write_yaml(tmp_path, "disabled_event_types: [state_update, RUN_END, nope]\n")
+    assert load_config(project_root=tmp_path).disabled_event_types == {"STATE_UPDATE"}
+
+    monkeypatch.setenv("AGENTDBG_DISABLED_EVENT_TYPES", " llm_call , TOOL_CALL,")
+    assert load_config(project_root=tmp_path).disabled_event_types == {
+        "LLM_CALL",
+        "TOOL_CALL",
+    }
+
+    monkeypatch.setenv("AGENTDBG_DISABLED_EVENT_TYPES", "")
+    assert load_config(project_root=tmp_path).disabled_event_types == frozenset()
+
+
+def test_yaml_parse_cached_until_file_changes(tmp_path, monkeypatch):
+    """Unchanged YAML is parsed once; a rewrite (new mtime/size) is picked up."""
+    import agentdbg.config as config_mod
+
+    cfg_file = _write_yaml(tmp_path, "max_field_bytes: 500\n")
+    parses = []
+    real_load = config_mod.yaml.load
+
+    def counting_load(stream, Loader):
+        parses.append(1)
+        return real_load(stream, Loader=Loader)
+
+    monkeypatch.setattr(config_mod.yaml, "load", counting_load)
+
+    first = config_mod._load_yaml(cfg_file)
+    first["max_field_bytes"] = 1  # callers get a copy; the cache is unaffected
+    assert config_mod._load_yaml(cfg_file) == {"max_field_bytes": 500}
+    assert len(parses) == 1
+
+    cfg_file.write_text("max_field_bytes: 7000\n", encoding="utf-8")
+    assert config_mod._load_yaml(cfg_file) == {"max_field_bytes": 7000}
+    assert len(parses) == 2
+
+
+def test_yaml_json_sidecar_is_opt_in_and_follows_yaml(tmp_path, monkeypatch):
+    """AGENTDBG_YAML_JSON_CACHE=1 writes config.yaml.json and ignores it once stale."""
+    import os
+
+    import agentdbg.config as config_mod
+
+    cfg_file = _write_yaml(tmp_path, "loop_window: 9\n")
+    sidecar = cfg_file.with_name("config.yaml.json")
+
+    config_mod._YAML_CACHE.clear()
+    assert config_mod._load_yaml(cfg_file) == {"loop_window": 9}
+    assert not sidecar.exists()
+
+    monkeypatch.setenv("AGENTDBG_YAML_JSON_CACHE", "1")
+    config_mod._YAML_CACHE.clear()
+    assert config_mod._load_yaml(cfg_file) == {"loop_window": 9}
+    assert sidecar.exists()
+
+    # A fresh sidecar is preferred over the YAML.
+    sidecar.write_text('{"loop_window": 11}', encoding="utf-8")
+    config_mod._YAML_CACHE.clear()
+    assert config_mod._load_yaml(cfg_file) == {"loop_window": 11}
+
+    # Once the YAML is newer, the sidecar is ignored and rewritten.
+    yaml_mtime = sidecar.stat().st_mtime_ns + 1_000_000_000
+    os.utime(cfg_file, ns=(yaml_mtime, yaml_mtime))
+    config_mod._YAML_CACHE.clear()
+    assert config_mod._load_yaml(cfg_file) == {"loop_window": 9}
+    assert '"loop_window": 9' in sidecar.read_text(encoding="utf-8")
+
+
+def test_load_config_memoized_until_env_or_yaml_changes(tmp_path, monkeypatch):
+    """Unchanged inputs return the same instance; env or YAML changes produce a new one."""
+    fake_home = tmp_path / "fakehome"
+    fake_home.mkdir()
+    monkeypatch.setattr(Path, "home", staticmethod(lambda: fake_home))
+
+    from agentdbg.config import load_config
+
+    first = load_config(project_root=tmp_path)
+    assert load_config(project_root=tmp_path) is first
+
+    monkeypatch.setenv("AGENTDBG_MAX_EVENTS", "5")
+    with_env = load_config(project_root=tmp_path)
+    assert with_env is not first
+    assert with_env.guardrails.max_events == 5
+
+    _write_yaml(tmp_path, "loop_window: 20\n")
+    with_yaml = load_config(project_root=tmp_path)
+    assert with_yaml is not with_env
+    assert with_yaml.loop_window == 20
+    assert load_config(project_root=tmp_path) is with_yaml
+
+
+def test_reload_config_sees_same_stamp_yaml_rewrite(tmp_path, monkeypatch):
+    """reload_config() drops the memo, so a rewrite the (mtime, size) key misses is picked up."""
+    import os
+
+    fake_home = tmp_path / "fakehome"
+    fake_home.mkdir()
+    monkeypatch.setattr(Path, "home", staticmethod(lambda: fake_home))
+
+    from agentdbg.config import load_config, reload_config
+
+    cfg_file = _write_yaml(tmp_path, "loop_window: 20\n")
+    st = cfg_file.stat()
+    assert load_config(project_root=tmp_path).loop_window == 20
+
+    cfg_file.write_text("loop_window: 30\n", encoding="utf-8")
+    os.utime(cfg_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert load_config(project_root=tmp_path).loop_window == 20
+
+    reloaded = reload_config(project_root=tmp_path)
+    assert reloaded.loop_window == 30
+    assert load_config(project_root=tmp_path) is reloaded
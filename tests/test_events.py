@@ -1,7 +1,12 @@
 """Tests for event helpers: JSON-safety and depth limit (consistent with redaction)."""
 
 from agentdbg.constants import DEPTH_LIMIT, TRUNCATED_MARKER
-from agentdbg.events import _ensure_json_safe
+from agentdbg.events import (
+    EventType,
+    _ensure_json_safe,
+    make_event_factory,
+    new_event,
+)
 
 
 def test_json_safe_value_depth_exceeded_returns_truncated_marker():
@@ -33,3 +38,110 @@ def test_json_safe_value_at_limit_preserves_value():
         assert len(current) == 1
         current = current[0]
     assert current == "ok"
+
+
+def test_ensure_json_safe_returns_safe_input_unchanged():
+    """Already JSON-safe trees are returned as-is; anything else is converted to a new tree."""
+    safe = {"usage": {"prompt_tokens": 3, "ratio": 0.5}, "args": ["a", None, True]}
+    assert _ensure_json_safe(safe) is safe
+
+    unsafe = {"args": ("a", 1), 2: {1, 2}, "obj": object}
+    result = _ensure_json_safe(unsafe)
+    assert result is not unsafe
+    assert result["args"] == ["a", 1]
+    assert result["2"] == str({1, 2})
+    assert unsafe["args"] == ("a", 1)
+
+
+def test_event_factory_matches_new_event():
+    """make_event_factory builds the same fields, in the same key order, as new_event."""
+    factory = make_event_factory("run-1")
+    made = factory(EventType.TOOL_CALL, "t", {"x": (1, 2)}, {"k": object})
+    ref = new_event(
+        EventType.TOOL_CALL, "run-1", "t", {"x": (1, 2)}, meta={"k": object}
+    )
+    assert list(made) == list(ref)
+    for key in ("spec_version", "run_id", "parent_id", "event_type", "duration_ms"):
+        assert made[key] == ref[key]
+    assert made["payload"] == ref["payload"] == {"x": [1, 2]}
+    assert made["meta"] == ref["meta"]
+    assert made["event_id"] != factory("X", "t", None)["event_id"]
+    assert factory("STATE_UPDATE", "s", "plain")["payload"] == {"value": "plain"}
+
+
+def test_utc_now_iso_ms_z_formats_milliseconds(monkeypatch):
+    """Timestamps are ISO8601 UTC with zero-padded milliseconds and a trailing Z."""
+    import agentdbg.events as events_mod
+
+    # 2026-02-15T20:31:05Z plus 7.9 ms
+    ns = 1771187465 * 1_000_000_000 + 7_900_000
+    monkeypatch.setattr(events_mod.time, "time_ns", lambda: ns)
+    assert events_mod.utc_now_iso_ms_z() == "2026-02-15T20:31:05.007Z"
+    monkeypatch.setattr(events_mod.time, "time_ns", lambda: ns + 1_000_000_000)
+    assert events_mod.utc_now_iso_ms_z() == "2026-02-15T20:31:06.007Z"
+
+
+def test_event_ids_are_uuid4_strings():
+    """Event ids parse as RFC 4122 version-4 UUIDs in canonical string form."""
+    import uuid
+
+    from agentdbg.events import _fast_uuid4_str
+
+    ids = {_fast_uuid4_str() for _ in range(200)}
+    assert len(ids) == 200
+    ids.add(new_event(EventType.STATE_UPDATE, "run-1", "s", {})["event_id"])
+    ids.add(make_event_factory("run-1")(EventType.STATE_UPDATE, "s", {})["event_id"])
+    for event_id in ids:
+        u = uuid.UUID(event_id)
+        assert str(u) == event_id
+        assert u.version == 4
+        assert u.variant == uuid.RFC_4122
+
+
+def test_trusted_meta_skips_json_safety_walk():
+    """_trusted_meta keeps the caller's (already safe) meta dict; default still converts."""
+    meta = {"k": ("a", "b")}
+    trusted = new_event(
+        EventType.STATE_UPDATE, "run-1", "s", {}, meta=meta, _trusted_meta=True
+    )
+    assert trusted["meta"] is meta
+    assert new_event(EventType.STATE_UPDATE, "run-1", "s", {}, meta=meta)["meta"] == {
+        "k": ["a", "b"]
+    }
+    factory = make_event_factory("run-1")
+    assert (
+        factory(EventType.STATE_UPDATE, "s", {}, None, _trusted_meta=True)["meta"] == {}
+    )
+    assert factory(EventType.STATE_UPDATE, "s", {}, [1], _trusted_meta=True)[
+        "meta"
+    ] == {"value": [1]}
+
+
+def test_trusted_payload_skips_json_safety_walk():
+    """_trusted_payload keeps the caller's (already safe) payload dict; default still converts."""
+    payload = {"k": ("a", "b")}
+    trusted = new_event(
+        EventType.STATE_UPDATE, "run-1", "s", payload, _trusted_payload=True
+    )
+    assert trusted["payload"] is payload
+    assert new_event(EventType.STATE_UPDATE, "run-1", "s", payload)["payload"] == {
+        "k": ["a", "b"]
+    }
+    factory = make_event_factory("run-1")
+    ev = factory(EventType.STATE_UPDATE, "s", payload, None, _trusted_payload=True)
+    assert ev["payload"] is payload
+    assert (
+        factory(EventType.STATE_UPDATE, "s", None, _trusted_payload=True)["payload"]
+        == {}
+    )
+
+
+def test_event_type_str_returns_plain_wire_strings():
+    """Enum members and plain strings both map to plain str wire values."""
+    from agentdbg.events import _event_type_str
+
+    for value in (EventType.TOOL_CALL, "TOOL_CALL", "CUSTOM_TYPE"):
+        out = _event_type_str(value)
+        assert type(out) is str
+    assert _event_type_str(EventType.TOOL_CALL) == "TOOL_CALL"
+    assert _event_type_str("CUSTOM_TYPE") == "CUSTOM_TYPE"
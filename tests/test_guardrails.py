@@ -5,6 +5,8 @@ Deterministic: no network, no randomness. Uses temp_data_dir; max_duration_s tes
 use patched time.
 """
 
+import functools
+
 import pytest
 
 from agentdbg import record_llm_call, record_tool_call, record_state, trace, traced_run
@@ -215,6 +217,35 @@ def test_max_duration_s_triggers_after_timeout(temp_data_dir, monkeypatch):
     assert exc_info.value.actual >= 60
 
 
+def test_max_duration_s_parses_started_at_once_per_run(monkeypatch):
+    """The run's start timestamp is parsed once, not on every checked event."""
+    from agentdbg import guardrails as guardrails_mod
+    from agentdbg.guardrails import GuardrailParams, check_after_event
+
+    parsed = []
+    real = guardrails_mod._parse_iso_z
+
+    def counting(ts):
+        parsed.append(ts)
+        return real(ts)
+
+    monkeypatch.setattr(
+        guardrails_mod, "_parse_started_at", functools.lru_cache(8)(counting)
+    )
+    start_ts = "2026-01-01T12:00:00.000Z"
+    params = GuardrailParams(max_duration_s=60)
+    for i in range(5):
+        check_after_event(
+            {"event_type": "STATE_UPDATE"},
+            {},
+            i + 1,
+            start_ts,
+            params,
+            now_iso=f"2026-01-01T12:00:0{i}.000Z",
+        )
+    assert parsed == [start_ts]
+
+
 # ---------------------------------------------------------------------------
 # Lifecycle: ERROR + RUN_END and re-raise
 # ---------------------------------------------------------------------------
@@ -535,6 +566,27 @@ def test_stop_on_loop_re_raises_after_swallowed_abort(temp_data_dir):
 # ---------------------------------------------------------------------------
 
 
+def test_outer_run_params_live_on_run_ctx_and_nested_override_is_scoped(
+    temp_data_dir,
+):
+    """An outer run keeps its params on the run context; a nested block overrides them
+    through the override var only for its own duration."""
+    from agentdbg._tracing._context import _guardrail_params_var, _run_ctx_var
+
+    with traced_run(name="outer", max_tool_calls=5):
+        assert _guardrail_params_var.get() is None
+        assert _run_ctx_var.get().guardrail_params.max_tool_calls == 5
+        with traced_run(max_tool_calls=1):
+            assert _guardrail_params_var.get().max_tool_calls == 1
+            record_tool_call("t1")
+        assert _guardrail_params_var.get() is None
+        record_tool_call("t2")
+        record_tool_call("t3")
+        with pytest.raises(AgentDbgGuardrailExceeded):
+            for i in range(3):
+                record_tool_call(f"t{i + 4}")
+
+
 def test_nested_traced_run_applies_guardrail_params(temp_data_dir):
     """traced_run(stop_on_loop=True) inside @trace (which defaults to
     stop_on_loop=False) must apply the inner guardrail params."""
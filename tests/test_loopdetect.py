@@ -3,6 +3,8 @@ Loop detection tests: synthetic events with repeated tail pattern, detect_loop p
 No I/O; uses in-memory events. pattern_key stability and calling detect_loop again yields same payload.
 """
 
+from collections import deque
+
 from agentdbg.loopdetect import detect_loop, pattern_key
 
 
@@ -120,3 +122,192 @@ def test_loop_warning_does_not_trigger_when_below_repetitions():
         _make_event("e-1", "TOOL_CALL", {"tool_name": "search_db"}),
     ]
     assert detect_loop(events, window=12, repetitions=3) is None
+
+
+def test_detect_loop_accepts_bounded_deque_window():
+    """detect_loop accepts the tracer's bounded deque window; old events fall off the left."""
+    window = deque(maxlen=4)
+    window.append(_make_event("old", "LLM_CALL", {"model": "gpt"}))
+    for i in range(4):
+        window.append(_make_event(f"e-{i}", "TOOL_CALL", {"tool_name": "search_db"}))
+    assert len(window) == 4
+    payload = detect_loop(window, window=4, repetitions=3)
+    assert payload is not None
+    assert payload["pattern"] == "TOOL_CALL:search_db"
+    assert payload["window_size"] == 4
+    assert payload["evidence_event_ids"] == ["e-1", "e-2", "e-3"]
+
+
+def test_detect_loop_finds_smallest_block_in_large_window():
+    """Large window: noise then a 5-event block x3; the 5-block wins over its 10/15 multiples."""
+    events = [
+        _make_event(f"n-{i}", "TOOL_CALL", {"tool_name": f"noise{i}"})
+        for i in range(200)
+    ]
+    block = ["a", "b", "a", "c", "d"]
+    for rep in range(6):
+        for j, tool in enumerate(block):
+            events.append(_make_event(f"r{rep}-{j}", "TOOL_CALL", {"tool_name": tool}))
+    payload = detect_loop(events, window=500, repetitions=3)
+    assert payload is not None
+    assert payload["pattern"] == " -> ".join(f"TOOL_CALL:{t}" for t in block)
+    assert payload["window_size"] == 230
+    assert payload["evidence_event_ids"][0] == "r3-0"
+    assert len(payload["evidence_event_ids"]) == 15
+
+    # Break the last repetition: no loop at the tail.
+    events[-1] = _make_event("x", "TOOL_CALL", {"tool_name": "other"})
+    assert detect_loop(events, window=500, repetitions=3) is None
+
+
+def test_signature_window_ring_matches_detect_loop():
+    """Signatures pushed once into a SignatureWindow give the same payload as detect_loop."""
+    from agentdbg.loopdetect import SignatureWindow, detect_loop_signatures
+
+    events = [_make_event("e-0", "LLM_CALL", {"model": "gpt"})]
+    for i in range(1, 7):
+        events.append(
+            _make_event(f"e-{i}", "TOOL_CALL", {"tool_name": "a" if i % 2 else "b"})
+        )
+    win = SignatureWindow(6)
+    for ev in events:
+        win.push(ev)
+    assert len(win) == 6
+    # The LLM_CALL left the window, so its signature is forgotten.
+    assert set(win.interned) == {"TOOL_CALL:a", "TOOL_CALL:b"}
+    expected = detect_loop(events, window=6, repetitions=3)
+    assert expected is not None
+    assert detect_loop_signatures(win.ring, window=6, repetitions=3) == expected
+    assert detect_loop_signatures(win.snapshot(), window=6, repetitions=3) == expected
+
+
+def test_compute_signature_missing_fields_fall_back_to_unknown():
+    """Missing or empty model/tool_name (or payload) sign as UNKNOWN; other types use event_type."""
+    from agentdbg.loopdetect import compute_signature
+
+    assert (
+        compute_signature({"event_type": "LLM_CALL", "payload": {}})
+        == "LLM_CALL:UNKNOWN"
+    )
+    assert (
+        compute_signature({"event_type": "LLM_CALL", "payload": None})
+        == "LLM_CALL:UNKNOWN"
+    )
+    assert compute_signature({"event_type": "TOOL_CALL"}) == "TOOL_CALL:UNKNOWN"
+    assert (
+        compute_signature({"event_type": "TOOL_CALL", "payload": {"tool_name": ""}})
+        == "TOOL_CALL:UNKNOWN"
+    )
+    assert compute_signature({"event_type": "STATE_UPDATE"}) == "STATE_UPDATE"
+    assert compute_signature({}) == ""
+
+
+def test_signature_window_counts_follow_eviction_and_gate_detection():
+    """push() returns in-window occurrences; whenever it is below repetitions there is no loop."""
+    import random
+
+    from agentdbg.loopdetect import SignatureWindow, detect_loop_signatures
+
+    win = SignatureWindow(4)
+    counts = [
+        win.push(_make_event(f"e-{i}", "TOOL_CALL", {"tool_name": t}))
+        for i, t in enumerate("aabaa")
+    ]
+    # Fifth push evicts the first "a": window is a, b, a, a.
+    assert counts == [1, 2, 1, 3, 3]
+    assert len(win) == 4
+
+    rng = random.Random(0)
+    win = SignatureWindow(12)
+    events = []
+    for i in range(2000):
+        ev = _make_event(f"e-{i}", "TOOL_CALL", {"tool_name": rng.choice("abc")})
+        events.append(ev)
+        n = win.push(ev)
+        expected = detect_loop(events, window=12, repetitions=3)
+        assert detect_loop_signatures(win.ring, 12, 3) == expected
+        assert detect_loop_signatures(win.snapshot(), 12, 3) == expected
+        if n < 3:
+            assert expected is None
+
+
+def test_signature_window_forgets_signatures_that_leave_the_window():
+    """A run with ever-new tool names keeps interned/count state bounded by the window."""
+    from collections import deque
+
+    from agentdbg.loopdetect import SignatureWindow
+
+    win = SignatureWindow(5)
+    for i in range(1000):
+        win.push(_make_event(f"e-{i}", "TOOL_CALL", {"tool_name": f"tool{i}"}))
+    assert len(win.interned) == 5
+    assert set(win.interned) == {f"TOOL_CALL:tool{i}" for i in range(995, 1000)}
+    assert len({entry[0] for entry in win.ring}) == 5
+
+    events = deque(
+        (_make_event(f"e-{i}", "TOOL_CALL", {"tool_name": "t"}) for i in range(50)),
+        maxlen=50,
+    )
+    result = detect_loop(events, window=6, repetitions=3)
+    assert result is not None
+    assert result["evidence_event_ids"][-1] == "e-49"
+
+
+def test_loop_result_is_recomputed_when_a_loop_continues():
+    """
+    Extending a detected loop periodically can shrink its smallest block, so a probe
+    result cannot be reused for the next event: a a b a | a a b a, then a -> block "a".
+    """
+    from agentdbg.loopdetect import SignatureWindow, detect_loop_signatures
+
+    win = SignatureWindow(12)
+    results = []
+    for i, t in enumerate("aabaaabaa"):
+        win.push(_make_event(f"e-{i}", "TOOL_CALL", {"tool_name": t}))
+        results.append(detect_loop_signatures(win.ring, 12, 2))
+    assert results[7]["pattern"] == (
+        "TOOL_CALL:a -> TOOL_CALL:a -> TOOL_CALL:b -> TOOL_CALL:a"
+    )
+    assert results[8]["pattern"] == "TOOL_CALL:a"
+    assert results[8]["evidence_event_ids"] == ["e-7", "e-8"]
+
+
+def test_signature_window_snapshot_is_consistent_under_concurrent_pushes():
+    """Threads push while another scans snapshots; counts stay exact and scans never fail."""
+    import threading
+
+    from agentdbg.loopdetect import SignatureWindow, detect_loop_signatures
+
+    win = SignatureWindow(12)
+    stop = threading.Event()
+    errors = []
+
+    def pusher(tag):
+        for i in range(2000):
+            win.push(_make_event(f"{tag}-{i}", "TOOL_CALL", {"tool_name": tag}))
+
+    def scanner():
+        while not stop.is_set():
+            try:
+                snap = win.snapshot()
+                assert len(snap) <= 12
+                detect_loop_signatures(snap, 12, 3)
+            except Exception as e:  # pragma: no cover - failure path
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=pusher, args=(t,)) for t in "abcd"]
+    scan = threading.Thread(target=scanner)
+    scan.start()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stop.set()
+    scan.join()
+
+    assert errors == []
+    snap = win.snapshot()
+    assert len(snap) == 12
+    assert sum(win._counts.values()) == 12
+    assert set(win.interned) == {entry[1] for entry in snap}
@@ -10,11 +10,11 @@ import pytest
 
 from pathlib import Path
 
-from agentdbg.constants import REDACTED_MARKER, TRUNCATED_MARKER
+from agentdbg.constants import DEPTH_LIMIT, REDACTED_MARKER, TRUNCATED_MARKER
 from agentdbg.config import load_config, AgentDbgConfig
 from agentdbg.guardrails import GuardrailParams
 from agentdbg.events import EventType
-from agentdbg._tracing._redact import _redact_and_truncate
+from agentdbg._tracing._redact import _redact_and_truncate, _redact_argv
 from agentdbg.tracing import record_tool_call, trace, traced_run
 from agentdbg.storage import load_events, list_runs
 
@@ -54,6 +54,65 @@ def test_max_field_truncation():
     assert out["other"] == "short"
 
 
+def test_max_field_truncation_multibyte_strings():
+    """Byte limit applies to UTF-8 size, not character count, for non-ASCII strings."""
+    max_bytes = 100
+    cfg = AgentDbgConfig(
+        redact=False,
+        redact_keys=[],
+        max_field_bytes=max_bytes,
+        loop_window=12,
+        loop_repetitions=3,
+        data_dir=Path("."),
+        guardrails=GuardrailParams(),
+    )
+    # 60 chars but 120 bytes: fewer chars than the limit, still too many bytes.
+    wide = "é" * 60
+    result = _redact_and_truncate(wide, cfg)
+    assert result.endswith(TRUNCATED_MARKER)
+    assert len(result.encode("utf-8")) <= max_bytes
+
+    # 25 chars of up to 4 bytes each always fit.
+    emoji = "\U0001f600" * 25
+    assert _redact_and_truncate(emoji, cfg) == emoji
+
+    ascii_at_limit = "a" * max_bytes
+    assert _redact_and_truncate(ascii_at_limit, cfg) == ascii_at_limit
+
+    # Truncated output keeps a whole-character prefix of the input.
+    keep = max_bytes - len(TRUNCATED_MARKER)
+    assert result == "é" * (keep // 2) + TRUNCATED_MARKER
+    assert _redact_and_truncate("a" * 500, cfg) == "a" * keep + TRUNCATED_MARKER
+
+    # Far more code points than bytes allowed: same prefix as truncating the full encoding.
+    huge = "é€" * 50_000
+    expected = huge.encode("utf-8")[:keep].decode("utf-8", "ignore") + TRUNCATED_MARKER
+    assert _redact_and_truncate(huge, cfg) == expected
+
+
+def test_truncate_string_encodes_at_most_once():
+    """Non-ASCII truncation encodes the string at most once, never all of an oversized one."""
+    from agentdbg._tracing._redact import _truncate_string
+
+    encoded = []
+
+    class _CountingStr(str):
+        def encode(self, *args, **kwargs):
+            encoded.append(len(self))
+            return super().encode(*args, **kwargs)
+
+    keep = 100 - len(TRUNCATED_MARKER)
+    wide = _CountingStr("é" * 60)
+    assert _truncate_string(wide, 100) == "é" * (keep // 2) + TRUNCATED_MARKER
+    assert encoded == [60]
+
+    encoded.clear()
+    plain = "é€" * 50_000
+    expected = plain.encode("utf-8")[:keep].decode("utf-8", "ignore") + TRUNCATED_MARKER
+    assert _truncate_string(_CountingStr(plain), 100) == expected
+    assert encoded == []  # only a prefix slice (a plain str) is encoded
+
+
 @pytest.fixture
 def redact_token_env():
     """Set AGENTDBG_REDACT_KEYS=token for the test."""
@@ -181,6 +240,28 @@ def test_run_start_argv_redacted(temp_data_dir):
     assert argv == ["test_script.py", f"--api-key={REDACTED_MARKER}", "--verbose"]
 
 
+def test_redact_argv_only_redacts_sensitive_option_values():
+    """Only --opt=value items whose option name matches a redact key are rewritten."""
+    cfg = _redact_cfg(["api_key", "password"])
+    argv = [
+        "main.py",
+        "positional=value",
+        "--verbose",
+        "--API-KEY=sk-1",
+        "-password=hunter2",
+        "--mode=fast",
+    ]
+    assert _redact_argv(argv, cfg) == [
+        "main.py",
+        "positional=value",
+        "--verbose",
+        f"--API-KEY={REDACTED_MARKER}",
+        f"-password={REDACTED_MARKER}",
+        "--mode=fast",
+    ]
+    assert _redact_argv(argv, _redact_cfg([])) == argv
+
+
 def _redact_cfg(keys: list[str]) -> AgentDbgConfig:
     """Minimal config with redaction enabled and given redact_keys."""
     return AgentDbgConfig(
@@ -236,6 +317,62 @@ def test_redact_case_insensitive():
     assert out["normal_key"] == "keep"
 
 
+def test_redact_and_truncate_visits_containers_not_leaves(monkeypatch):
+    """The iterative walk makes one node call per container; short leaves are copied inline."""
+    from agentdbg._tracing import _redact
+
+    calls = []
+    real_scrub_node = _redact._scrub_node
+
+    def counting_scrub_node(obj, *args):
+        calls.append(type(obj).__name__)
+        return real_scrub_node(obj, *args)
+
+    monkeypatch.setattr(_redact, "_scrub_node", counting_scrub_node)
+    cfg = _redact_cfg(["token"])
+    payload = {f"k{i}": (i if i % 2 else f"v{i}") for i in range(500)}
+    payload["nested"] = {"items": [1, "two", 3.0, None], "token": "secret"}
+    out = _redact_and_truncate(payload, cfg)
+
+    assert calls == ["dict", "dict", "list"]
+    assert out["k1"] == 1 and out["k2"] == "v2"
+    assert out["nested"] == {"items": [1, "two", 3.0, None], "token": REDACTED_MARKER}
+
+
+def test_redact_and_truncate_depth_limit_and_container_types():
+    """Deep nesting hits the depth limit; tuples become lists; non-str keys and objects become strings."""
+    cfg = _redact_cfg(["token"])
+    deep: object = "leaf"
+    for _ in range(DEPTH_LIMIT + 1):
+        deep = {"k": deep}
+    out = _redact_and_truncate(deep, cfg)
+    for _ in range(DEPTH_LIMIT):
+        out = out["k"]
+    assert out == {"k": TRUNCATED_MARKER}
+
+    # Scalar leaves past the limit are cut the same way as strings.
+    deep_list: object = [7, None]
+    for _ in range(DEPTH_LIMIT):
+        deep_list = [deep_list]
+    out = _redact_and_truncate(deep_list, cfg)
+    for _ in range(DEPTH_LIMIT):
+        out = out[0]
+    assert out == [TRUNCATED_MARKER, TRUNCATED_MARKER]
+
+    payload = {
+        1: ("a", [None, True, 2.5]),
+        "nested": {"auth_token": {"deep": "x"}, "obj": Path("p")},
+    }
+    assert _redact_and_truncate(payload, cfg) == {
+        "1": ["a", [None, True, 2.5]],
+        "nested": {"auth_token": REDACTED_MARKER, "obj": "p"},
+    }
+    # The input is not mutated and the output shares no containers with it.
+    assert payload[1] == ("a", [None, True, 2.5])
+    out = _redact_and_truncate(payload, cfg)
+    assert out["1"][1] is not payload[1][1]
+
+
 def test_redact_substring_match():
     """Key matching is substring: my_api_key_here is redacted when redact_keys include api_key."""
     cfg = _redact_cfg(["api_key"])
@@ -252,6 +389,48 @@ def test_redact_substring_match():
     assert out["other"] == "unchanged"
 
 
+def test_redact_keys_with_regex_metacharacters_match_literally():
+    """Redact keys are matched as literal substrings, even if they contain regex metacharacters."""
+    cfg = _redact_cfg(["x.key", "Auth(1)"])
+    payload = {"x.key": "a", "xykey": "b", "my_auth(1)_header": "c"}
+    out = _redact_and_truncate(payload, cfg)
+    assert out["x.key"] == REDACTED_MARKER
+    assert out["xykey"] == "b"
+    assert out["my_auth(1)_header"] == REDACTED_MARKER
+
+
+def test_redact_keys_set_is_lowercased_and_deduplicated():
+    """redact_keys_set folds case and duplicates; exact and substring keys still redact."""
+    cfg = _redact_cfg(["Token", "token", "API_KEY"])
+    assert cfg.redact_keys_set == frozenset({"token", "api_key"})
+    out = _redact_and_truncate({"TOKEN": "a", "x_api_key": "b", "keep": "c"}, cfg)
+    assert out == {"TOKEN": REDACTED_MARKER, "x_api_key": REDACTED_MARKER, "keep": "c"}
+
+
+def test_redact_pattern_matches_keys_literally_with_one_compiled_matcher():
+    """Redact keys are escaped into one alternation: metacharacters match literally."""
+    cfg = _redact_cfg(["x.y", "a+b"] + [f"secret_{i}" for i in range(500)])
+    assert cfg.redact_pattern is cfg.redact_pattern
+    out = _redact_and_truncate(
+        {"X.Y": 1, "xzy": 2, "pre_a+b": 3, "aab": 4, "my_secret_499_id": 5}, cfg
+    )
+    assert out == {
+        "X.Y": REDACTED_MARKER,
+        "xzy": 2,
+        "pre_a+b": REDACTED_MARKER,
+        "aab": 4,
+        "my_secret_499_id": REDACTED_MARKER,
+    }
+
+
+def test_redact_empty_redact_keys_redacts_nothing():
+    """With no redact keys configured, no key is redacted."""
+    cfg = _redact_cfg([])
+    assert cfg.redact_pattern is None
+    out = _redact_and_truncate({"token": "t", "password": "p"}, cfg)
+    assert out == {"token": "t", "password": "p"}
+
+
 def test_exception_message_secret_not_in_events_jsonl(
     temp_data_dir, redact_message_and_stack_env
 ):
@@ -300,3 +479,256 @@ def test_argv_api_key_not_in_events_jsonl(temp_data_dir):
     assert secret not in raw_content, (
         f"API key value {secret!r} must not appear in events.jsonl"
     )
+
+
+def test_redact_fast_skip_returns_payload_unchanged():
+    """Redaction off plus unbounded max_field_bytes skips the walk entirely."""
+    cfg = AgentDbgConfig(
+        redact=False,
+        redact_keys=["token"],
+        max_field_bytes=1 << 30,
+        loop_window=12,
+        loop_repetitions=3,
+        data_dir=Path("/tmp"),
+        guardrails=GuardrailParams(),
+    )
+    assert cfg.redact_fast_skip is True
+    payload = {"token": "x" * 50_000, "nested": {"deep": [1, 2]}}
+    assert _redact_and_truncate(payload, cfg) is payload
+    # The copy-on-write variant skips too, even for values it would otherwise convert.
+    from agentdbg._tracing._redact import _redact_and_truncate_shared
+
+    converted = {"pair": (1, 2), "token": "x"}
+    assert _redact_and_truncate_shared(converted, cfg) is converted
+
+    cfg_bounded = AgentDbgConfig(
+        redact=False,
+        redact_keys=["token"],
+        max_field_bytes=100,
+        loop_window=12,
+        loop_repetitions=3,
+        data_dir=Path("/tmp"),
+        guardrails=GuardrailParams(),
+    )
+    assert cfg_bounded.redact_fast_skip is False
+    assert _redact_and_truncate(payload, cfg_bounded)["token"].endswith(
+        TRUNCATED_MARKER
+    )
+
+
+def test_redacted_stack_is_never_formatted(temp_data_dir, redact_message_and_stack_env):
+    """A stack under a redacted key is dropped without formatting the traceback."""
+    from agentdbg._tracing import _redact
+
+    with patch.object(
+        _redact.traceback, "format_exception", side_effect=AssertionError("formatted")
+    ):
+        with pytest.raises(ValueError, match="boom"):
+            with traced_run(name="lazy_stack"):
+                raise ValueError("boom")
+
+    config = load_config()
+    run_id = list_runs(limit=1, config=config)[0]["run_id"]
+    error_events = [
+        e
+        for e in load_events(run_id, config)
+        if e.get("event_type") == EventType.ERROR.value
+    ]
+    assert error_events[0]["payload"]["stack"] == REDACTED_MARKER
+
+
+def test_redacted_tool_error_stack_is_never_formatted(
+    temp_data_dir, redact_message_and_stack_env
+):
+    """Recorder error objects defer the stack the same way ERROR events do."""
+    from agentdbg._tracing import _redact
+
+    with patch.object(
+        _redact.traceback, "format_exception", side_effect=AssertionError("formatted")
+    ):
+        with traced_run(name="lazy_tool_stack"):
+            try:
+                raise RuntimeError("tool failed")
+            except RuntimeError as e:
+                record_tool_call("t", status="error", error=e)
+
+    config = load_config()
+    run_id = list_runs(limit=1, config=config)[0]["run_id"]
+    tool_ev = next(
+        e
+        for e in load_events(run_id, config)
+        if e.get("event_type") == EventType.TOOL_CALL.value
+    )
+    assert tool_ev["payload"]["error"]["stack"] == REDACTED_MARKER
+    assert tool_ev["payload"]["error"]["error_type"] == "RuntimeError"
+
+
+def test_capture_stacks_off_writes_null_stack(temp_data_dir):
+    """AGENTDBG_CAPTURE_STACKS=0 omits stacks from ERROR events and tool-call errors."""
+    with patch.dict(os.environ, {"AGENTDBG_CAPTURE_STACKS": "0"}):
+        with pytest.raises(ValueError, match="no stack"):
+            with traced_run(name="no_stacks"):
+                record_tool_call("t", status="error", error=RuntimeError("tool failed"))
+                raise ValueError("no stack")
+
+        config = load_config()
+    run_id = list_runs(limit=1, config=config)[0]["run_id"]
+    events = load_events(run_id, config)
+    error_ev = next(e for e in events if e.get("event_type") == EventType.ERROR.value)
+    tool_ev = next(
+        e for e in events if e.get("event_type") == EventType.TOOL_CALL.value
+    )
+    assert error_ev["payload"]["stack"] is None
+    assert tool_ev["payload"]["error"]["stack"] is None
+    assert tool_ev["payload"]["error"]["message"] == "tool failed"
+
+
+def test_redact_key_decisions_are_cached_per_config_and_bounded():
+    """Key match results are memoized on the config; the memo stops growing at its cap."""
+    from agentdbg._tracing import _redact
+
+    cfg = AgentDbgConfig(
+        redact=True,
+        redact_keys=["token"],
+        max_field_bytes=1000,
+        loop_window=12,
+        loop_repetitions=3,
+        data_dir=Path("/tmp"),
+        guardrails=GuardrailParams(),
+    )
+    out = _redact_and_truncate({"Auth_Token": "s", "query": "q"}, cfg)
+    assert out == {"Auth_Token": REDACTED_MARKER, "query": "q"}
+    assert cfg.redact_key_cache == {"Auth_Token": True, "query": False}
+    assert _redact_and_truncate({"Auth_Token": "s2"}, cfg) == {
+        "Auth_Token": REDACTED_MARKER
+    }
+
+    many = {f"k{i}": i for i in range(_redact._MAX_CACHED_KEYS + 50)}
+    many["my_token"] = "s"
+    out = _redact_and_truncate(many, cfg)
+    assert out["my_token"] == REDACTED_MARKER
+    assert len(cfg.redact_key_cache) == _redact._MAX_CACHED_KEYS
+
+
+def test_non_json_values_are_stringified_and_truncated():
+    """Values of other types become str(value), truncated to max_field_bytes like strings."""
+
+    class Blob:
+        def __init__(self, text):
+            self.text = text
+
+        def __str__(self):
+            return self.text
+
+    cfg = AgentDbgConfig(
+        redact=False,
+        redact_keys=[],
+        max_field_bytes=100,
+        loop_window=12,
+        loop_repetitions=3,
+        data_dir=Path("/tmp"),
+        guardrails=GuardrailParams(),
+    )
+    out = _redact_and_truncate({"small": Blob("ok"), "big": Blob("é" * 80)}, cfg)
+    assert out["small"] == "ok"
+    assert out["big"].endswith(TRUNCATED_MARKER)
+    assert len(out["big"].encode("utf-8")) <= 100
+
+
+def test_clean_payload_skips_the_copy():
+    """Payloads the walk would not change are passed through; anything else is scrubbed."""
+    from agentdbg._tracing._redact import _apply_redaction_truncation, _needs_scrub
+
+    cfg = _redact_cfg(["token"])
+    clean = {"args": {"query": "q", "k": [1, 2.5, None, True]}, "result": "r" * 900}
+    meta = {"source": "test"}
+    out, out_meta = _apply_redaction_truncation(clean, meta, cfg)
+    assert out is clean and out_meta is meta
+    assert _redact_and_truncate(clean, cfg) == clean
+
+    for dirty in (
+        {"args": {"auth_token": "s"}},
+        {"result": "r" * 1001},
+        {"result": "é" * 300},
+        {1: "non-str key"},
+        {"args": ("tuple",)},
+        {"obj": Path("p")},
+    ):
+        assert _needs_scrub(dirty, cfg)
+        out, _ = _apply_redaction_truncation(dirty, None, cfg)
+        assert out == _redact_and_truncate(dirty, cfg)
+
+    deep: object = 1
+    for _ in range(DEPTH_LIMIT + 1):
+        deep = [deep]
+    assert _needs_scrub(deep, cfg)
+    assert not _needs_scrub(deep[0], cfg)
+    assert _needs_scrub({"ok": "x"}, cfg) is False
+    assert _needs_scrub({"ok": "x"}, _redact_cfg([])) is False
+
+
+def test_truncate_string_measures_ascii_without_encoding():
+    """ASCII byte length is its code point count; only non-ASCII strings are encoded."""
+    from agentdbg._tracing._redact import _truncate_string
+
+    class NoEncode(str):
+        def encode(self, *args, **kwargs):
+            raise AssertionError("ascii string was encoded")
+
+    for n in (10, 99, 100, 101, 5000):
+        s = NoEncode("a" * n)
+        out = _truncate_string(s, 100)
+        if n <= 100:
+            assert out == s
+        else:
+            assert out.endswith(TRUNCATED_MARKER)
+            assert len(out) == 100
+
+    assert _truncate_string("é" * 40, 100) == "é" * 40
+    out = _truncate_string("é" * 60, 100)
+    assert out.endswith(TRUNCATED_MARKER)
+    assert len(out.encode("utf-8")) <= 100
+
+
+def test_redacted_key_past_depth_limit_is_truncated():
+    """Past the depth limit a redacted key is cut like its siblings, matching the JSON-safety pass."""
+    from agentdbg.events import _safe_dict
+
+    cfg = _redact_cfg(["token"])
+    deep: object = {"auth_token": "s", "other": "x"}
+    for _ in range(DEPTH_LIMIT):
+        deep = {"k": deep}
+    out = _redact_and_truncate(deep, cfg)
+    inner = out
+    for _ in range(DEPTH_LIMIT):
+        inner = inner["k"]
+    assert inner == {"auth_token": TRUNCATED_MARKER, "other": TRUNCATED_MARKER}
+    assert _safe_dict(out) == out
+
+
+def test_shared_scrub_copies_only_changed_paths():
+    """Copy-on-write scrub: unchanged subtrees are shared, changed paths are rebuilt."""
+    from agentdbg._tracing._redact import _redact_and_truncate_shared
+
+    cfg = _redact_cfg(["token"])
+    untouched = {"query": "q", "ids": [1, 2, 3]}
+    payload = {
+        "args": untouched,
+        "result": [{"text": "ok"}, {"text": "x" * 2000}],
+        "auth": {"api_token": "s", "user": "u"},
+        "pair": ("a", 1),
+    }
+    out = _redact_and_truncate_shared(payload, cfg)
+    assert out == _redact_and_truncate(payload, cfg)
+    assert out["args"] is untouched
+    assert out["result"] is not payload["result"]
+    assert out["result"][0] is payload["result"][0]
+    assert out["result"][1]["text"].endswith(TRUNCATED_MARKER)
+    assert out["auth"] == {"api_token": REDACTED_MARKER, "user": "u"}
+    assert out["pair"] == ["a", 1]
+    # The input is not mutated.
+    assert payload["auth"]["api_token"] == "s"
+    assert len(payload["result"][1]["text"]) == 2000
+
+    clean = {"a": [1, {"b": "c"}]}
+    assert _redact_and_truncate_shared(clean, cfg) is clean
@@ -34,6 +34,7 @@ def test_run_id_rejects_path_traversal_strings():
         "x" * 64,
         "00000000-0000-0000-0000-000000000001",  # UUID but v1, not v4
         "A0EEBC99-9C0B-4EF8-BB6D-6BB9BD380A11",  # valid v4 but not canonical (uppercase)
+        "a0eebc99-9c0b-4ef8-cb6d-6bb9bd380a11",  # version 4 digit but not RFC 4122 variant
     ]
     for run_id in invalid:
         with pytest.raises(ValueError, match="invalid run_id"):
@@ -100,6 +101,31 @@ def test_server_returns_200_for_valid_run_id(temp_data_dir):
     assert r.json().get("run_id") == run_id
 
 
+def test_server_run_and_events_honor_if_none_match(temp_data_dir):
+    """Run meta and events carry an ETag; a matching If-None-Match gets 304 until the file changes."""
+    config = load_config()
+    run_id = storage.create_run(run_name="etag_test", config=config)["run_id"]
+    client = TestClient(create_app())
+
+    for url in (f"/api/runs/{run_id}", f"/api/runs/{run_id}/events"):
+        r = client.get(url)
+        assert r.status_code == 200
+        etag = r.headers["etag"]
+        r2 = client.get(url, headers={"If-None-Match": etag})
+        assert r2.status_code == 304
+        assert r2.headers["etag"] == etag
+        assert r2.content == b""
+        r3 = client.get(url, headers={"If-None-Match": '"stale"'})
+        assert r3.status_code == 200
+
+    events_etag = client.get(f"/api/runs/{run_id}/events").headers["etag"]
+    storage.append_event(run_id, {"event_type": "RUN_START"}, config)
+    r = client.get(f"/api/runs/{run_id}/events", headers={"If-None-Match": events_etag})
+    assert r.status_code == 200
+    assert len(r.json()["events"]) == 1
+    assert r.headers["etag"] != events_etag
+
+
 def test_server_paths_endpoint_returns_run_json_path(temp_data_dir):
     """GET /api/runs/{run_id}/paths returns local run.json path."""
     config = load_config()
@@ -192,3 +218,149 @@ def test_server_delete_invalid_and_missing_run_id(temp_data_dir):
     r2 = client.delete("/api/runs/a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11")
     assert r2.status_code == 404
     assert "run not found" in (r2.json().get("detail") or "")
+
+
+def test_static_assets_served_from_memory_with_etag(temp_data_dir):
+    """UI assets carry an ETag and revalidate to 304; content matches the files on disk."""
+    from agentdbg.server import UI_APP_JS_PATH, UI_INDEX_PATH
+
+    client = TestClient(create_app())
+    for url, path in (("/", UI_INDEX_PATH), ("/app.js", UI_APP_JS_PATH)):
+        r = client.get(url)
+        assert r.status_code == 200
+        assert r.content == path.read_bytes()
+        assert r.headers["cache-control"] == "no-cache"
+        etag = r.headers["etag"]
+        r2 = client.get(url, headers={"If-None-Match": etag})
+        assert r2.status_code == 304
+        assert r2.content == b""
+
+
+def test_events_response_is_gzipped_when_accepted(temp_data_dir):
+    """Large JSON responses are gzip-encoded for clients sending Accept-Encoding: gzip."""
+    config = load_config()
+    run_id = storage.create_run(run_name="gzip_test", config=config)["run_id"]
+    for i in range(50):
+        storage.append_event(run_id, {"event_type": "STATE_UPDATE", "i": i}, config)
+    client = TestClient(create_app())
+    r = client.get(f"/api/runs/{run_id}/events", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert len(r.json()["events"]) == 50
+    assert "etag" in r.headers
+
+
+def test_runs_endpoint_serializes_non_ascii_run_names(temp_data_dir):
+    """Run list is returned as UTF-8 JSON with non-ASCII names intact."""
+    config = load_config()
+    storage.create_run(run_name="übung ✓", config=config)
+    r = TestClient(create_app()).get("/api/runs")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    assert [run["run_name"] for run in r.json()["runs"]] == ["übung ✓"]
+
+
+def test_events_endpoint_does_not_parse_run_json(temp_data_dir, monkeypatch):
+    """/events checks run existence by stat only; run.json is never loaded."""
+    config = load_config()
+    run_id = storage.create_run(run_name="exists", config=config)["run_id"]
+    assert storage.run_exists(run_id, config)
+    assert not storage.run_exists("a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11", config)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("run.json parsed")
+
+    monkeypatch.setattr(storage, "load_run_meta", fail)
+    monkeypatch.setattr(storage, "_read_run_meta", fail)
+    r = TestClient(create_app()).get(f"/api/runs/{run_id}/events")
+    assert r.status_code == 200
+    assert r.json()["events"] == []
+
+
+def test_events_body_cached_until_events_file_changes(temp_data_dir, monkeypatch):
+    """Repeat unconditional GETs of unchanged events reuse the serialized body."""
+    config = load_config()
+    run_id = storage.create_run(run_name="body_cache", config=config)["run_id"]
+    storage.append_event(run_id, {"event_type": "RUN_START"}, config)
+    calls = []
+    real_load = storage.load_events
+
+    def counting_load(*args, **kwargs):
+        calls.append(args[0])
+        return real_load(*args, **kwargs)
+
+    monkeypatch.setattr(storage, "load_events", counting_load)
+    client = TestClient(create_app())
+    url = f"/api/runs/{run_id}/events"
+    first = client.get(url)
+    assert client.get(url).content == first.content
+    assert len(calls) == 1
+
+    storage.append_event(run_id, {"event_type": "RUN_END"}, config)
+    assert len(client.get(url).json()["events"]) == 2
+    assert len(calls) == 2
+
+
+def test_events_endpoint_pages_with_offset_and_limit(temp_data_dir):
+    """offset/limit return one page plus total and next_offset; bad params are 422."""
+    config = load_config()
+    run_id = storage.create_run(run_name="pages", config=config)["run_id"]
+    for i in range(5):
+        storage.append_event(run_id, {"event_type": "STATE_UPDATE", "i": i}, config)
+    client = TestClient(create_app())
+    url = f"/api/runs/{run_id}/events"
+
+    data = client.get(url, params={"offset": 1, "limit": 3}).json()
+    assert [e["i"] for e in data["events"]] == [1, 2, 3]
+    assert (data["total"], data["next_offset"]) == (5, 4)
+    data = client.get(url, params={"offset": 4, "limit": 3}).json()
+    assert [e["i"] for e in data["events"]] == [4]
+    assert data["next_offset"] is None
+    assert "total" not in client.get(url).json()
+    assert client.get(url, params={"offset": -1}).status_code == 422
+    assert client.get(url, params={"limit": 0}).status_code == 422
+
+
+@pytest.mark.parametrize("use_orjson", [True, False], ids=["orjson", "json"])
+def test_events_endpoint_serves_data_orjson_rejects(
+    temp_data_dir, monkeypatch, use_orjson
+):
+    """A wide int (kept as int by the stdlib reader) is served, not a 500, either way."""
+    import json
+
+    import agentdbg.server as server_mod
+
+    if not use_orjson:
+        monkeypatch.setattr(server_mod, "orjson", None)
+    elif server_mod.orjson is None:
+        pytest.skip("orjson not installed")
+    config = load_config()
+    run_id = storage.create_run(run_name="wide", config=config)["run_id"]
+    wide = 2**70 + 1
+    # The NaN makes the reader fall back to stdlib json, which keeps the wide int an int.
+    ev = {"event_type": "TOOL_CALL", "payload": {"big": wide, "t": float("nan")}}
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    events_path.write_text(json.dumps(ev) + "\n", encoding="utf-8")
+    client = TestClient(create_app())
+    url = f"/api/runs/{run_id}/events"
+
+    for params in ({}, {"offset": 0, "limit": 10}):
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        assert response.json()["events"][0]["payload"]["big"] == wide
+
+
+def test_missing_static_asset_logged_once_and_served_as_404(
+    temp_data_dir, monkeypatch, caplog
+):
+    """A UI asset missing at startup is logged once; its route 404s without re-reading."""
+    import agentdbg.server as server_mod
+
+    monkeypatch.setattr(
+        server_mod, "UI_STYLES_PATH", server_mod.UI_STATIC_DIR / "missing.css"
+    )
+    with caplog.at_level("WARNING", logger="agentdbg.server"):
+        client = TestClient(server_mod.create_app())
+    assert sum("missing.css" in r.getMessage() for r in caplog.records) == 1
+    assert client.get("/styles.css").status_code == 404
+    assert client.get("/app.js").status_code == 200
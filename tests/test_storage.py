@@ -12,6 +12,8 @@ from agentdbg.config import load_config
 from agentdbg.events import EventType, new_event
 from agentdbg.storage import (
     append_event,
+    append_event_lines,
+    event_to_line,
     create_run,
     finalize_run,
     load_events,
@@ -21,6 +23,19 @@ from agentdbg.storage import (
 )
 
 
+@pytest.fixture(params=["orjson", "json"])
+def serializer(request, monkeypatch):
+    """Run the test with orjson (skipped when not installed) and with stdlib json."""
+    import agentdbg.storage as storage_mod
+
+    if request.param == "orjson":
+        if storage_mod.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(storage_mod, "orjson", None)
+    return request.param
+
+
 def test_create_run_writes_run_json_with_status_running(temp_data_dir):
     """create_run writes run.json with status 'running'."""
     config = load_config()
@@ -33,7 +48,9 @@ def test_create_run_writes_run_json_with_status_running(temp_data_dir):
     assert data.get("run_id") == run_id
 
 
-def test_append_event_writes_events_jsonl_load_events_reads_back(temp_data_dir):
+def test_append_event_writes_events_jsonl_load_events_reads_back(
+    temp_data_dir, serializer
+):
     """append_event writes to events.jsonl and load_events reads it back."""
     config = load_config()
     meta = create_run("test_run", config)
@@ -48,6 +65,101 @@ def test_append_event_writes_events_jsonl_load_events_reads_back(temp_data_dir):
     assert loaded[0].get("payload", {}).get("tool_name") == "tool1"
 
 
+def test_append_event_lines_writes_batch_in_order_with_one_fsync(
+    temp_data_dir, serializer
+):
+    """append_event_lines writes all lines in order with a single fsync."""
+    config = load_config()
+    run_id = create_run("test_run", config)["run_id"]
+    lines = [
+        event_to_line(
+            new_event(
+                EventType.TOOL_CALL, run_id, f"tool{i}", {"tool_name": f"tool{i}"}
+            )
+        )
+        for i in range(5)
+    ]
+    with patch("agentdbg.storage.os.fsync") as fsync:
+        append_event_lines(run_id, lines, config)
+    assert fsync.call_count == 1
+    loaded = load_events(run_id, config)
+    assert [e["name"] for e in loaded] == [f"tool{i}" for i in range(5)]
+
+
+def test_append_event_lines_handles_partial_and_oversized_gather_writes(temp_data_dir):
+    """A short writev is completed, batches beyond IOV_MAX fall back to one write, and
+    short plain writes are continued until every byte is written."""
+    import agentdbg.storage as storage_mod
+
+    config = load_config()
+    run_id = create_run("test_run", config)["run_id"]
+    lines = [event_to_line({"name": f"e{i}"}) for i in range(6)]
+    real_writev = storage_mod._writev or (
+        lambda fd, bufs: storage_mod.os.write(fd, b"".join(bufs))
+    )
+
+    def short_writev(fd, bufs):
+        return real_writev(fd, bufs[:1])
+
+    with patch.object(storage_mod, "_writev", short_writev):
+        append_event_lines(run_id, lines[:3], config, fsync=False)
+    with patch.object(storage_mod, "_IOV_MAX", 2):
+        append_event_lines(run_id, lines[3:], config, fsync=False)
+    assert [e["name"] for e in load_events(run_id, config)] == [
+        f"e{i}" for i in range(6)
+    ]
+
+    real_write = storage_mod.os.write
+    more = [event_to_line({"name": f"e{i}"}) for i in range(6, 12)]
+    with (
+        patch.object(storage_mod.os, "write", lambda fd, b: real_write(fd, b[:5])),
+        patch.object(storage_mod, "_writev", short_writev),
+    ):
+        append_event_lines(run_id, more[:3], config, fsync=False)
+        with patch.object(storage_mod, "_IOV_MAX", 2):
+            append_event_lines(run_id, more[3:], config, fsync=False)
+    assert [e["name"] for e in load_events(run_id, config)] == [
+        f"e{i}" for i in range(12)
+    ]
+
+
+def test_event_to_line_is_one_utf8_json_line(serializer):
+    """event_to_line returns UTF-8 bytes: one JSON object, raw non-ASCII, trailing newline."""
+    line = event_to_line({"name": "прогон", 1: "non-str key", "obj": {1, 2}})
+    assert isinstance(line, bytes)
+    assert line.endswith(b"\n") and line.count(b"\n") == 1
+    assert "прогон".encode("utf-8") in line
+    assert json.loads(line) == {
+        "name": "прогон",
+        "1": "non-str key",
+        "obj": str({1, 2}),
+    }
+
+
+def test_event_round_trip_with_values_json_cannot_represent(temp_data_dir, serializer):
+    """Wide ints, non-str keys and non-JSON values round-trip; NaN differs by serializer."""
+    import math
+
+    config = load_config()
+    run_id = create_run("edge", config)["run_id"]
+    wide = {"big": 2**70, 3: "int key", "when": {1, 2}, "text": "naïve"}
+    append_event(run_id, {"name": "wide", "payload": wide}, config)
+    append_event(run_id, {"name": "nan", "payload": {"t": float("nan")}}, config)
+
+    loaded = load_events(run_id, config)
+    assert loaded[0]["payload"] == {
+        "big": 2**70,
+        "3": "int key",
+        "when": str({1, 2}),
+        "text": "naïve",
+    }
+    # orjson writes non-finite floats as null; stdlib json writes NaN, read back as nan.
+    if serializer == "orjson":
+        assert loaded[1]["payload"]["t"] is None
+    else:
+        assert math.isnan(loaded[1]["payload"]["t"])
+
+
 def test_finalize_run_sets_status_ok_ended_at_duration_ms(temp_data_dir):
     """finalize_run sets status 'ok' and sets ended_at and duration_ms not None."""
     config = load_config()
@@ -126,6 +238,23 @@ def test_resolve_run_id_prefix_multiple_matches_returns_most_recent_by_started_a
     assert resolve_run_id("c2aade11", config) == newer_id
 
 
+def test_resolve_and_load_meta_returns_run_id_and_run_json(temp_data_dir):
+    """resolve_and_load_meta returns the resolved run_id with that run's run.json."""
+    from agentdbg.storage import resolve_and_load_meta
+
+    config = load_config()
+    runs_base = config.data_dir / "runs"
+    runs_base.mkdir(parents=True, exist_ok=True)
+    older_id = "e4ccf033-1b2d-4ef8-bb6d-6bb9bd380a11"
+    newer_id = "e4ccf033-2c3e-4ef8-8b6d-6bb9bd380a22"
+    _write_run_json(runs_base / older_id, older_id, "old", "2026-01-01T10:00:00.000Z")
+    _write_run_json(runs_base / newer_id, newer_id, "new", "2026-01-01T14:00:00.000Z")
+    run_id, meta = resolve_and_load_meta("e4ccf033", config)
+    assert run_id == newer_id
+    assert meta == load_run_meta(newer_id, config)
+    assert meta["run_name"] == "new"
+
+
 def test_resolve_run_id_no_match_raises_file_not_found(temp_data_dir):
     """resolve_run_id with no matching run raises FileNotFoundError."""
     config = load_config()
@@ -182,6 +311,29 @@ def test_list_runs_returns_runs_ordered_by_started_at_descending(temp_data_dir):
     ]
 
 
+def test_list_runs_orders_mixed_timestamp_shapes_and_puts_missing_last(temp_data_dir):
+    """Seconds-only Z and +00:00 timestamps interleave correctly; invalid sorts last."""
+    config = load_config()
+    runs_base = config.data_dir / "runs"
+    ids_and_times = [
+        ("f5ddaa44-1a2b-4ef8-8b6d-6bb9bd380a11", "2026-01-01T12:00:05Z"),
+        ("f5ddaa44-2b3c-4ef8-8b6d-6bb9bd380a11", "2026-01-01T12:00:05.100Z"),
+        ("f5ddaa44-3c4d-4ef8-8b6d-6bb9bd380a11", "2026-01-01T13:00:00.000+01:00"),
+        ("f5ddaa44-4d5e-4ef8-8b6d-6bb9bd380a11", "not a timestamp"),
+        ("f5ddaa44-5e6f-4ef8-8b6d-6bb9bd380a11", "2026-01-01T12:00:04.999Z"),
+    ]
+    for run_id, started_at in ids_and_times:
+        _write_run_json(runs_base / run_id, run_id, "run", started_at)
+    assert [r["run_id"][:13] for r in list_runs(limit=10, config=config)] == [
+        "f5ddaa44-2b3c",
+        "f5ddaa44-1a2b",
+        "f5ddaa44-5e6f",
+        "f5ddaa44-3c4d",
+        "f5ddaa44-4d5e",
+    ]
+    assert resolve_run_id("f5ddaa44", config).startswith("f5ddaa44-2b3c")
+
+
 # ---------------------------------------------------------------------------
 # load_events corrupt JSONL
 # ---------------------------------------------------------------------------
@@ -204,6 +356,38 @@ def test_load_events_skips_invalid_json_lines(temp_data_dir):
     assert loaded[1].get("event_type") == "RUN_END"
 
 
+def test_load_events_reads_nan_and_infinity_written_by_stdlib_json(temp_data_dir):
+    """Lines with NaN/Infinity (stdlib json output) load even when orjson is installed."""
+    import math
+
+    import agentdbg.storage as storage_mod
+
+    config = load_config()
+    run_id = create_run("nan", config)["run_id"]
+    llm = new_event(EventType.LLM_CALL, run_id, "m", {"temperature": float("nan")})
+    tool = new_event(EventType.TOOL_CALL, run_id, "t", {"args": {"score": math.inf}})
+    with patch.object(storage_mod, "orjson", None):
+        append_event(run_id, llm, config)
+        append_event(run_id, tool, config)
+    assert b"NaN" in (config.data_dir / "runs" / run_id / "events.jsonl").read_bytes()
+
+    loaded = load_events(run_id, config)
+    assert [e["event_type"] for e in loaded] == ["LLM_CALL", "TOOL_CALL"]
+    assert math.isnan(loaded[0]["payload"]["temperature"])
+    assert loaded[1]["payload"]["args"]["score"] == math.inf
+
+
+def test_load_events_handles_crlf_blank_and_non_utf8_lines(temp_data_dir):
+    """CRLF endings and blank lines are tolerated; a line with invalid UTF-8 is skipped."""
+    config = load_config()
+    run_id = create_run("bytes_test", config)["run_id"]
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    events_path.write_bytes(
+        b'{"name": "a"}\r\n\n{"name": "\xff"}\n{"name": "\xc3\xbc"}'
+    )
+    assert [e["name"] for e in load_events(run_id, config)] == ["a", "ü"]
+
+
 def test_load_events_logs_warning_for_corrupt_jsonl_lines(temp_data_dir):
     """load_events logs a warning for each skipped corrupt JSONL line."""
     config = load_config()
@@ -233,3 +417,252 @@ def test_load_events_logs_warning_for_corrupt_jsonl_lines(temp_data_dir):
     assert call2[0][1] == run_id
     assert call2[0][2] == 3
     assert isinstance(call2[0][3], json.JSONDecodeError)
+
+
+def test_load_events_reassembles_lines_spanning_read_chunks(temp_data_dir):
+    """Events larger than the read chunk, and lines split across chunks, load intact."""
+    config = load_config()
+    run_id = create_run("chunk_test", config)["run_id"]
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    big = "x" * (200 * 1024)
+    events_path.write_text(
+        json.dumps({"name": "a"}) + "\n" + json.dumps({"name": big}) + "\n"
+        '{"name": "tail"}',
+        encoding="utf-8",
+    )
+    assert [e["name"] for e in load_events(run_id, config)] == ["a", big, "tail"]
+
+
+def test_run_meta_cache_reuses_parse_until_run_json_changes(temp_data_dir):
+    """Unchanged run.json is parsed once; edits invalidate; returned dicts are copies."""
+    import agentdbg.storage as storage_mod
+
+    config = load_config()
+    run_id = create_run("meta_cache", config)["run_id"]
+    calls = []
+    real_loads = storage_mod.json.loads
+
+    def counting_loads(raw, **kwargs):
+        if isinstance(
+            raw, bytes
+        ):  # run.json reads; json.load in finalize_run passes str
+            calls.append(raw)
+        return real_loads(raw, **kwargs)
+
+    with (
+        patch.object(storage_mod, "orjson", None),
+        patch.object(storage_mod.json, "loads", counting_loads),
+    ):
+        storage_mod._META_CACHE.clear()
+        first = load_run_meta(run_id, config)
+        first["counts"]["llm_calls"] = 99
+        first["run_name"] = "mutated"
+        assert list_runs(limit=5, config=config)[0]["run_name"] == "meta_cache"
+        assert load_run_meta(run_id, config)["counts"]["llm_calls"] == 0
+        assert len(calls) == 1
+
+        finalize_run(run_id, "ok", {"llm_calls": 2}, config)
+        assert load_run_meta(run_id, config)["counts"]["llm_calls"] == 2
+        assert len(calls) == 2
+
+
+def test_list_runs_skips_stray_files_and_handles_missing_runs_dir(temp_data_dir):
+    """Files and dirs without run.json under runs/ are ignored; no runs/ dir lists nothing."""
+    config = load_config()
+    assert list_runs(limit=5, config=config) == []
+    run_id = create_run("scan", config)["run_id"]
+    runs_dir = config.data_dir / "runs"
+    (runs_dir / "notes.txt").write_text("x", encoding="utf-8")
+    (runs_dir / "empty_dir").mkdir()
+    assert [r["run_id"] for r in list_runs(limit=5, config=config)] == [run_id]
+
+
+def test_run_json_is_indented_utf8_and_leaves_no_temp_files(temp_data_dir, serializer):
+    """run.json is written as indented UTF-8 JSON (non-ASCII unescaped) via atomic replace."""
+    config = load_config()
+    run_id = create_run("grüße", config)["run_id"]
+    run_dir = config.data_dir / "runs" / run_id
+    raw = (run_dir / "run.json").read_bytes()
+    assert '"run_name": "grüße"'.encode("utf-8") in raw
+    assert raw.startswith(b'{\n  "')
+    assert not list(run_dir.glob("*.tmp"))
+
+
+def test_finalize_run_uses_caller_duration_when_given(temp_data_dir):
+    """An explicit duration_ms is stored as-is; without it, duration comes from started_at."""
+    config = load_config()
+    run_id = create_run("timed", config)["run_id"]
+    finalize_run(run_id, "ok", {}, config, duration_ms=1234)
+    assert load_run_meta(run_id, config)["duration_ms"] == 1234
+
+    run_id2 = create_run("untimed", config)["run_id"]
+    finalize_run(run_id2, "ok", {}, config)
+    assert 0 <= load_run_meta(run_id2, config)["duration_ms"] < 60_000
+
+
+def test_list_runs_parallel_cold_scan_matches_serial(temp_data_dir):
+    """A cold scan of many runs (thread pool path) returns the same order as a cached one."""
+    import agentdbg.storage as storage_mod
+
+    config = load_config()
+    for i in range(20):
+        create_run(f"run{i}", config)
+    runs_dir = config.data_dir / "runs"
+    (runs_dir / next(p.name for p in runs_dir.iterdir()) / "run.json").write_text(
+        "{broken", encoding="utf-8"
+    )
+    storage_mod._META_CACHE.clear()
+    cold = list_runs(limit=50, config=config)
+    warm = list_runs(limit=50, config=config)
+    assert len(cold) == 19
+    assert [r["run_id"] for r in cold] == [r["run_id"] for r in warm]
+
+
+def test_list_runs_keeps_more_runs_than_the_cache_floor_warm(temp_data_dir):
+    """A scan of more runs than _META_CACHE_MAX does not evict itself; gone runs are pruned."""
+    import shutil
+
+    import agentdbg.storage as storage_mod
+
+    config = load_config()
+    run_ids = [create_run(f"run{i}", config)["run_id"] for i in range(12)]
+    reads = []
+    real_loads = storage_mod._json_loads
+
+    def counting_loads(raw):
+        reads.append(raw)
+        return real_loads(raw)
+
+    with (
+        patch.object(storage_mod, "_META_CACHE_MAX", 5),
+        patch.object(storage_mod, "_json_loads", counting_loads),
+    ):
+        storage_mod._META_CACHE.clear()
+        assert len(list_runs(limit=50, config=config)) == 12
+        assert len(reads) == 12
+        assert len(list_runs(limit=50, config=config)) == 12
+        assert len(reads) == 12
+
+        shutil.rmtree(config.data_dir / "runs" / run_ids[0])
+        assert len(list_runs(limit=50, config=config)) == 11
+        assert len(reads) == 12
+        assert not any(run_ids[0] in p for p in storage_mod._META_CACHE)
+
+
+def test_run_dir_joins_validated_id_without_resolving(temp_data_dir):
+    """_run_dir is a pure join of the runs base and the validated (stripped) run_id."""
+    from pathlib import Path
+
+    import agentdbg.storage as storage_mod
+
+    config = load_config()
+    run_id = "a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11"
+    with patch.object(Path, "resolve", side_effect=AssertionError("resolve called")):
+        path = storage_mod._run_dir(f" {run_id} ", config)
+    assert path == config.data_dir / "runs" / run_id
+    with pytest.raises(ValueError, match="invalid run_id"):
+        storage_mod._run_dir("../etc", config)
+
+
+def test_parse_iso8601_utc_accepts_canonical_and_variant_shapes():
+    """Canonical .sssZ, seconds-only Z and explicit offsets parse to aware UTC datetimes."""
+    from datetime import datetime, timezone
+
+    from agentdbg.storage import _parse_iso8601_utc
+
+    expected = datetime(2026, 2, 15, 20, 31, 5, 123000, tzinfo=timezone.utc)
+    assert _parse_iso8601_utc("2026-02-15T20:31:05.123Z") == expected
+    assert _parse_iso8601_utc(" 2026-02-15T20:31:05.123+00:00 ") == expected
+    assert _parse_iso8601_utc("2026-02-15T20:31:05Z") == expected.replace(microsecond=0)
+    assert _parse_iso8601_utc("2026-02-15T25:31:05.123Z") is None
+    assert _parse_iso8601_utc("") is None
+
+
+def test_load_events_falls_back_to_chunked_reads_when_mmap_fails(temp_data_dir):
+    """If the file cannot be memory-mapped, the chunked reader yields the same events."""
+    import agentdbg.storage as storage_mod
+
+    config = load_config()
+    run_id = create_run("no_mmap", config)["run_id"]
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    events_path.write_bytes(b'{"name": "a"}\n\n{"name": "b"}\r\n{"name": "c"}')
+    mapped = [e["name"] for e in load_events(run_id, config)]
+    with patch.object(storage_mod.mmap, "mmap", side_effect=OSError("no mmap")):
+        streamed = [e["name"] for e in load_events(run_id, config)]
+    assert mapped == streamed == ["a", "b", "c"]
+
+
+def test_load_events_page_slices_and_extends_index_as_file_grows(temp_data_dir):
+    """Pages count non-blank lines, include an unterminated tail, and see appended lines."""
+    from agentdbg.storage import load_events_page
+
+    config = load_config()
+    run_id = create_run("paged", config)["run_id"]
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    assert load_events_page(run_id, config, 0, 10) == ([], 0)
+
+    events_path.write_bytes(b'{"i": 0}\n\n{"i": 1}\r\n{"i": 2}\n{"i": 3}')
+    page, total = load_events_page(run_id, config, 1, 2)
+    assert ([e["i"] for e in page], total) == ([1, 2], 4)
+    assert [e["i"] for e in load_events_page(run_id, config, 3, 5)[0]] == [3]
+
+    with open(events_path, "ab") as f:
+        f.write(b'\n{"i": 4}\nnot json\n{"i": 6}\n')
+    page, total = load_events_page(run_id, config, 3, 10)
+    assert ([e["i"] for e in page], total) == ([3, 4, 6], 7)
+    assert load_events_page(run_id, config, 9, 10) == ([], 7)
+
+
+def test_load_events_page_matches_load_events_on_blank_and_nan_lines(temp_data_dir):
+    """Whitespace-only lines of any length are skipped, and NaN/Infinity lines decode."""
+    import math
+
+    from agentdbg.storage import load_events_page
+
+    config = load_config()
+    run_id = create_run("paged_blank", config)["run_id"]
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    events_path.write_bytes(
+        b'{"i": 0}\n      \n{"i": 1, "x": NaN}\n\t \t\r\n'
+        b'  {"i": 2, "y": -Infinity}\n{"i": 3}\n'
+    )
+    full = load_events(run_id, config)
+    assert [e["i"] for e in full] == [0, 1, 2, 3]
+    for offset in range(5):
+        page, total = load_events_page(run_id, config, offset, 2)
+        assert total == len(full)
+        assert [e["i"] for e in page] == [e["i"] for e in full[offset : offset + 2]]
+    page, _ = load_events_page(run_id, config, 1, 2)
+    assert math.isnan(page[0]["x"]) and page[1]["y"] == -math.inf
+
+
+def test_load_events_page_scans_outside_the_index_lock(temp_data_dir):
+    """The line scan does not hold the global index lock, and overlapping scans merge."""
+    import agentdbg.storage as storage_mod
+    from agentdbg.storage import load_events_page
+
+    config = load_config()
+    run_id = create_run("paged_unlocked", config)["run_id"]
+    events_path = config.data_dir / "runs" / run_id / "events.jsonl"
+    events_path.write_bytes(b'{"i": 0}\n{"i": 1}\n')
+    assert load_events_page(run_id, config, 0, 10)[1] == 2
+    with open(events_path, "ab") as f:
+        f.write(b'{"i": 2}\n\n{"i": 3}\n')
+
+    real_scan = storage_mod._scan_line_starts
+    nested = []
+
+    def scan(mm, pos):
+        assert not storage_mod._line_index_lock.locked()
+        if not nested:
+            # Another request pages the same file while this scan is in flight.
+            nested.append(None)
+            nested[0] = load_events_page(run_id, config, 0, 10)
+        return real_scan(mm, pos)
+
+    with patch.object(storage_mod, "_scan_line_starts", side_effect=scan):
+        page, total = load_events_page(run_id, config, 1, 10)
+    assert ([e["i"] for e in page], total) == ([1, 2, 3], 4)
+    assert [e["i"] for e in nested[0][0]] == [0, 1, 2, 3]
+    _, _, starts = storage_mod._LINE_INDEX[str(events_path)]
+    assert starts == [0, 9, 18, 28]
@@ -7,10 +7,12 @@ Uses temp dir via AGENTDBG_DATA_DIR; env restored by fixture.
 import pytest
 
 from agentdbg import (
+    bind_trace_context,
     has_active_run,
     record_llm_call,
     record_state,
     record_tool_call,
+    submit_traced,
     trace,
     traced_run,
 )
@@ -77,6 +79,41 @@ def test_has_active_run_true_inside_traced_run_and_false_after(temp_data_dir):
     assert has_active_run() is False
 
 
+def test_active_run_count_returns_to_zero_after_ok_and_error_runs(temp_data_dir):
+    """The open-run counter used by the recorder fast path is balanced on every exit path."""
+    from agentdbg._tracing import _context
+
+    assert _context._active_run_count == 0
+    with traced_run(name="outer"):
+        assert _context._active_run_count == 1
+        ctx = _context._ensure_run()
+        with traced_run(name="nested"):
+            assert _context._active_run_count == 1
+            # Nested blocks reuse the outer run's state object.
+            assert _context._ensure_run() is ctx
+    assert _context._active_run_count == 0
+
+    with pytest.raises(ValueError):
+        _traced_raises()
+    assert _context._active_run_count == 0
+    assert _context._ensure_run() is None
+
+
+def test_recorders_outside_a_run_do_not_read_the_context_var(monkeypatch):
+    """With no run open and implicit runs off, record_* return before any ContextVar lookup."""
+    from agentdbg._tracing import _context
+
+    class _NoGet:
+        def get(self):
+            raise AssertionError("run context var read outside a run")
+
+    monkeypatch.setattr(_context, "_implicit_run_enabled", False)
+    monkeypatch.setattr(_context, "_run_ctx_var", _NoGet())
+    record_tool_call("t", args={"x": 1})
+    record_llm_call("m", prompt="p", response="r")
+    record_state({"step": 1})
+
+
 @trace
 def _traced_loop_pattern():
     """Emit (TOOL_CALL:foo, LLM_CALL:gpt) x 3 so loop detection fires once."""
@@ -85,6 +122,275 @@ def _traced_loop_pattern():
         record_llm_call("gpt", prompt="p", response="r")
 
 
+def test_submit_traced_and_bind_trace_context_record_into_active_run(temp_data_dir):
+    """Recorder calls in worker threads attach to the caller's run; counts are shared."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _tool(i):
+        record_tool_call(f"worker_tool_{i}", args={"i": i})
+        return i
+
+    with traced_run(name="workers"):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [submit_traced(pool, _tool, i) for i in range(8)]
+            assert sorted(f.result() for f in futures) == list(range(8))
+        t = threading.Thread(target=bind_trace_context(_tool), args=(8,))
+        t.start()
+        t.join()
+        # Without a copied context the worker sees no active run.
+        t = threading.Thread(target=_tool, args=(9,))
+        t.start()
+        t.join()
+
+    config = load_config()
+    run_id = get_latest_run_id(config)
+    tool_names = {
+        e["name"]
+        for e in load_events(run_id, config)
+        if e.get("event_type") == EventType.TOOL_CALL.value
+    }
+    assert tool_names == {f"worker_tool_{i}" for i in range(9)}
+    assert load_run_meta(run_id, config)["counts"]["tool_calls"] == 9
+
+
+def test_asyncio_thread_offload_records_into_active_run(temp_data_dir):
+    """asyncio.to_thread copies the context itself; run_in_executor needs bind_trace_context."""
+    import asyncio
+
+    def _tool(name):
+        record_tool_call(name, args={})
+
+    async def _main():
+        with traced_run(name="async_workers"):
+            await asyncio.gather(*(asyncio.to_thread(_tool, f"t{i}") for i in range(4)))
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, bind_trace_context(_tool), "bound")
+            await loop.run_in_executor(None, _tool, "unbound")
+
+    asyncio.run(_main())
+
+    config = load_config()
+    run_id = get_latest_run_id(config)
+    tool_names = {
+        e["name"]
+        for e in load_events(run_id, config)
+        if e.get("event_type") == EventType.TOOL_CALL.value
+    }
+    assert tool_names == {"t0", "t1", "t2", "t3", "bound"}
+
+
+def test_recorded_payload_is_snapshotted_at_record_time(temp_data_dir):
+    """Mutating args after record_tool_call returns does not change the written event."""
+    args = {"query": "before", "items": [1, 2]}
+    with traced_run(name="snapshot"):
+        record_tool_call("t", args=args, result=None)
+        args["query"] = "after"
+        args["items"].append(3)
+
+    config = load_config()
+    run_id = get_latest_run_id(config)
+    tool_ev = next(
+        e
+        for e in load_events(run_id, config)
+        if e.get("event_type") == EventType.TOOL_CALL.value
+    )
+    assert tool_ev["payload"]["args"] == {"query": "before", "items": [1, 2]}
+
+
+def test_disabled_event_types_skip_recorders(temp_data_dir, monkeypatch):
+    """Disabled recorder types write nothing and count nothing; others are unaffected."""
+    from agentdbg._tracing import _recorders
+
+    monkeypatch.setenv("AGENTDBG_DISABLED_EVENT_TYPES", "STATE_UPDATE,LLM_CALL")
+    scrubbed = []
+    real_apply = _recorders._apply_redaction_truncation
+
+    def counting_apply(payload, meta, config):
+        scrubbed.append(payload)
+        return real_apply(payload, meta, config)
+
+    monkeypatch.setattr(_recorders, "_apply_redaction_truncation", counting_apply)
+    with traced_run(name="disabled"):
+        record_state({"step": 1})
+        record_llm_call("m", prompt="p", response="r")
+        record_tool_call("t", args={})
+
+    config = load_config()
+    run_id = get_latest_run_id(config)
+    types = [e["event_type"] for e in load_events(run_id, config)]
+    assert types == ["RUN_START", "TOOL_CALL", "RUN_END"]
+    assert len(scrubbed) == 1
+    counts = load_run_meta(run_id, config)["counts"]
+    assert counts["llm_calls"] == 0 and counts["tool_calls"] == 1
+
+
+def test_event_buffer_drains_in_background_and_flushes_in_order(temp_data_dir):
+    """Buffered events reach events.jsonl without an explicit flush, in enqueue order."""
+    import time
+
+    from agentdbg._tracing._buffer import _EventBuffer
+    from agentdbg.events import new_event
+    from agentdbg.storage import create_run
+
+    config = load_config()
+    run_id = create_run("buffered", config)["run_id"]
+    buf = _EventBuffer(max_batch=4, max_delay_s=0.005)
+    for i in range(10):
+        buf.put(run_id, new_event(EventType.STATE_UPDATE, run_id, f"s{i}", {}), config)
+
+    deadline = time.monotonic() + 2.0
+    while len(load_events(run_id, config)) < 10 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    buf.put(run_id, new_event(EventType.STATE_UPDATE, run_id, "s10", {}), config)
+    buf.flush()
+    assert [e["name"] for e in load_events(run_id, config)] == [
+        f"s{i}" for i in range(11)
+    ]
+    thread = buf._thread
+    buf.put(run_id, new_event(EventType.STATE_UPDATE, run_id, "s11", {}), config)
+    buf.close()
+    assert not thread.is_alive()
+    assert load_events(run_id, config)[-1]["name"] == "s11"
+
+
+def test_event_buffer_throttles_fsync_until_flush(temp_data_dir, monkeypatch):
+    """Background batches within the fsync interval skip fsync; flush() syncs the file."""
+    import agentdbg.storage as storage_mod
+    from agentdbg._tracing._buffer import _EventBuffer
+    from agentdbg.events import new_event
+    from agentdbg.storage import create_run
+
+    config = load_config()
+    run_id = create_run("fsync", config)["run_id"]
+    synced = []
+    monkeypatch.setattr(storage_mod.os, "fsync", lambda fd: synced.append(fd))
+    # No writer thread: drive the background path by hand.
+    buf = _EventBuffer(fsync_interval_s=3600.0, start_thread=False)
+
+    for i in range(3):
+        buf.put(run_id, new_event(EventType.STATE_UPDATE, run_id, f"s{i}", {}), config)
+        buf.flush(sync=False)
+    assert len(load_events(run_id, config)) == 3
+    assert len(synced) == 1  # first batch of the run syncs, the rest are throttled
+
+    buf.flush()
+    assert len(synced) == 2
+    buf.flush()
+    assert len(synced) == 2
+
+
+def test_event_buffer_writes_a_burst_with_one_append_per_run(
+    temp_data_dir, monkeypatch
+):
+    """A burst of queued events costs one append per consecutive run, not one per event."""
+    from agentdbg._tracing import _buffer as buffer_mod
+    from agentdbg.events import new_event
+    from agentdbg.storage import create_run
+
+    config = load_config()
+    run_a = create_run("a", config)["run_id"]
+    run_b = create_run("b", config)["run_id"]
+    appends = []
+    real_append = buffer_mod.append_event_lines
+
+    def counting_append(run_id, lines, cfg, **kwargs):
+        appends.append((run_id, len(lines)))
+        return real_append(run_id, lines, cfg, **kwargs)
+
+    monkeypatch.setattr(buffer_mod, "append_event_lines", counting_append)
+    buf = buffer_mod._EventBuffer(start_thread=False)
+    for run_id, n in ((run_a, 50), (run_b, 30), (run_a, 20)):
+        for i in range(n):
+            buf.put(run_id, new_event(EventType.STATE_UPDATE, run_id, "s", {}), config)
+    buf.flush()
+
+    assert appends == [(run_a, 50), (run_b, 30), (run_a, 20)]
+    assert len(load_events(run_a, config)) == 70
+    assert len(load_events(run_b, config)) == 30
+
+
+def test_run_end_flushes_buffered_events_before_finalize(temp_data_dir, monkeypatch):
+    """By the time run.json is finalized, every event of the run, RUN_END included, is on disk."""
+    from agentdbg._tracing import _lifecycle
+
+    on_disk_at_finalize = []
+    real_finalize = _lifecycle.finalize_run
+
+    def checking_finalize(run_id, status, counts, config, **kwargs):
+        on_disk_at_finalize.extend(e["event_type"] for e in load_events(run_id, config))
+        return real_finalize(run_id, status, counts, config, **kwargs)
+
+    monkeypatch.setattr(_lifecycle, "finalize_run", checking_finalize)
+    with traced_run(name="flushed"):
+        for i in range(200):
+            record_tool_call(f"t{i % 7}", args={"i": i})
+
+    assert on_disk_at_finalize[0] == "RUN_START"
+    assert on_disk_at_finalize[-1] == "RUN_END"
+    assert on_disk_at_finalize.count("TOOL_CALL") == 200
+
+
+def test_event_buffer_failing_run_does_not_drop_other_runs(temp_data_dir):
+    """One run's failed append still lets the rest of the batch be written, then raises."""
+    import shutil
+
+    from agentdbg._tracing._buffer import _EventBuffer
+    from agentdbg.events import new_event
+    from agentdbg.storage import create_run
+
+    config = load_config()
+    run_a = create_run("a", config)["run_id"]
+    run_b = create_run("b", config)["run_id"]
+    shutil.rmtree(config.data_dir / "runs" / run_b)
+    buf = _EventBuffer(start_thread=False)
+    for run_id, name in ((run_a, "a0"), (run_b, "b0"), (run_a, "a1")):
+        buf.put(run_id, new_event(EventType.STATE_UPDATE, run_id, name, {}), config)
+
+    with pytest.raises(FileNotFoundError):
+        buf.flush()
+    assert [e["name"] for e in load_events(run_a, config)] == ["a0", "a1"]
+    buf.flush()  # nothing left queued
+
+
+def test_every_distinct_loop_pattern_warns_exactly_once(temp_data_dir):
+    """Dedup is exact: hundreds of distinct patterns each get one LOOP_WARNING, none lost."""
+    with traced_run(name="many_loops"):
+        for i in range(300):
+            for _ in range(4):
+                record_tool_call(f"tool{i}", args={})
+
+    config = load_config()
+    run_id = get_latest_run_id(config)
+    warnings = [
+        e["payload"]["pattern"]
+        for e in load_events(run_id, config)
+        if e.get("event_type") == EventType.LOOP_WARNING.value
+    ]
+    assert warnings == [f"TOOL_CALL:tool{i}" for i in range(300)]
+    assert load_run_meta(run_id, config)["counts"]["loop_warnings"] == 300
+
+
+def test_loop_detector_skipped_until_window_can_hold_a_loop(temp_data_dir, monkeypatch):
+    """The loop detector runs only once the newest signature occurs loop_repetitions times."""
+    from agentdbg._tracing import _recorders
+
+    calls = []
+    real_detect = _recorders.detect_loop_signatures
+
+    def counting_detect(*args, **kwargs):
+        calls.append(len(args[0]))
+        return real_detect(*args, **kwargs)
+
+    monkeypatch.setattr(_recorders, "detect_loop_signatures", counting_detect)
+    with traced_run(name="short"):
+        for name in ("a", "b", "c", "a", "b", "c"):
+            record_tool_call(name)
+        assert calls == []
+        record_tool_call("a")  # third "a" in the window
+    assert calls == [7]
+
+
 def test_loop_warning_emitted_once_for_repeated_pattern(temp_data_dir):
     """Repeated pattern (tool+llm x3) triggers exactly one LOOP_WARNING and counts.loop_warnings == 1."""
     _traced_loop_pattern()
@@ -255,6 +561,83 @@ def test_normalize_usage_accepts_floats_and_mixed_types():
     assert out["total_tokens"] == 30
 
 
+def test_entrypoint_is_relative_to_current_cwd(tmp_path, monkeypatch):
+    """Memoized entrypoint strings still follow the current working directory."""
+    import os
+
+    from agentdbg._tracing._context import _entrypoint
+
+    filename = _traced_ok.__wrapped__.__code__.co_filename
+    here = _entrypoint(_traced_ok.__wrapped__)
+    assert here == f"{os.path.relpath(filename)}:_traced_ok"
+
+    monkeypatch.chdir(tmp_path)
+    there = _entrypoint(_traced_ok.__wrapped__)
+    assert there == f"{os.path.relpath(filename, str(tmp_path))}:_traced_ok"
+    assert _entrypoint(_traced_ok.__wrapped__) == there
+
+
+def test_entrypoint_repeat_calls_hit_cache():
+    """Repeated naming of the same function reuses the memoized relpath string."""
+    from agentdbg._tracing._context import _entrypoint, _entrypoint_cached
+
+    func = _traced_ok.__wrapped__
+    first = _entrypoint(func)
+    hits = _entrypoint_cached.cache_info().hits
+    for _ in range(3):
+        assert _entrypoint(func) is first
+    assert _entrypoint_cached.cache_info().hits == hits + 3
+
+
+def test_run_start_payload_reads_cwd_per_run(tmp_path, monkeypatch):
+    """Interpreter fields are precomputed; cwd is read at each run start."""
+    import os
+    import sys
+
+    from agentdbg._tracing._context import _run_start_payload
+
+    first = _run_start_payload("r")
+    assert first["python_version"] == "{}.{}.{}".format(*sys.version_info[:3])
+    assert first["platform"] == sys.platform
+    assert first["cwd"] == os.getcwd()
+
+    monkeypatch.chdir(tmp_path)
+    assert os.path.samefile(_run_start_payload("r")["cwd"], tmp_path)
+
+
+def test_default_run_name_timestamp_reformats_once_per_minute(monkeypatch):
+    """The run-name timestamp is cached per wall-clock minute and matches local time."""
+    import time as time_mod
+
+    from agentdbg._tracing import _context
+
+    base = 1_800_000_000.0 - (1_800_000_000.0 % 60)
+    monkeypatch.setattr(_context, "_run_name_ts_cache", (-1, ""))
+    monkeypatch.setattr(_context.time, "time", lambda: base + 5)
+    first = _context._default_run_name_timestamp()
+    assert first == time_mod.strftime("%Y-%m-%d %H:%M", time_mod.localtime(base))
+
+    monkeypatch.setattr(_context.time, "time", lambda: base + 59)
+    assert _context._default_run_name_timestamp() is first
+
+    monkeypatch.setattr(_context.time, "time", lambda: base + 60)
+    assert _context._default_run_name_timestamp() == time_mod.strftime(
+        "%Y-%m-%d %H:%M", time_mod.localtime(base + 60)
+    )
+
+
+def test_run_end_duration_uses_monotonic_start(monkeypatch):
+    """duration_ms is the monotonic-clock delta since the run's start reading, floored at 0."""
+    from agentdbg._tracing import _context
+
+    monkeypatch.setattr(_context.time, "monotonic_ns", lambda: 5_250_000_000)
+    payload = _context._run_end_payload("ok", {}, 2_000_000_000)
+    assert payload["summary"]["duration_ms"] == 3250
+
+    clamped = _context._run_end_payload("ok", {}, 6_000_000_000)
+    assert clamped["summary"]["duration_ms"] == 0
+
+
 @pytest.mark.parametrize("name", [None, "", "passed_name"])
 @pytest.mark.parametrize("as_kwarg", [False, True])
 def test_trace_sets_name(monkeypatch, name, as_kwarg):
@@ -415,6 +798,63 @@ def test_trace_nested_decorated_uses_outer_run(temp_data_dir):
     assert tool_names == ["outer_tool", "inner_tool", "after_inner"]
 
 
+def test_nested_trace_skips_run_context_but_applies_its_guardrails(
+    temp_data_dir, monkeypatch
+):
+    """A nested @trace call does not enter _run_context, yet its guardrail kwargs still apply."""
+    from agentdbg import AgentDbgGuardrailExceeded
+    from agentdbg._tracing import _lifecycle
+
+    @trace(max_tool_calls=1)
+    def inner():
+        record_tool_call("t1")
+        record_tool_call("t2")
+
+    entered = []
+    real_run_context = _lifecycle._run_context
+
+    def counting_run_context(*args, **kwargs):
+        entered.append(kwargs.get("name"))
+        return real_run_context(*args, **kwargs)
+
+    with traced_run(name="outer"):
+        monkeypatch.setattr(_lifecycle, "_run_context", counting_run_context)
+        with pytest.raises(AgentDbgGuardrailExceeded):
+            inner()
+        monkeypatch.setattr(_lifecycle, "_run_context", real_run_context)
+        record_tool_call("after_inner")
+    assert entered == []
+
+
+def test_run_name_env_read_per_outer_run_not_when_nested(temp_data_dir, monkeypatch):
+    """AGENTDBG_RUN_NAME is resolved once per new run (so changes apply), never for nested runs."""
+    from agentdbg._tracing import _lifecycle
+
+    resolved = []
+    real_resolve = _lifecycle._resolve_run_name
+
+    def counting_resolve(*args, **kwargs):
+        resolved.append(args)
+        return real_resolve(*args, **kwargs)
+
+    monkeypatch.setattr(_lifecycle, "_resolve_run_name", counting_resolve)
+
+    @trace(name="inner")
+    def inner():
+        record_tool_call("t")
+
+    config = load_config()
+    for env_name in ("first-name", "second-name"):
+        monkeypatch.setenv("AGENTDBG_RUN_NAME", env_name)
+        with traced_run(name="outer"):
+            inner()
+            with traced_run(name="nested"):
+                inner()
+        run_meta = load_run_meta(get_latest_run_id(config), config)
+        assert run_meta["run_name"] == env_name
+    assert len(resolved) == 2
+
+
 def test_record_state_inside_trace_writes_state_update_event(temp_data_dir):
     """record_state inside @trace writes one STATE_UPDATE with state and meta to storage."""
 
@@ -553,3 +993,20 @@ def test_trace_async_with_guardrails(temp_data_dir):
         e for e in events if e.get("event_type") == EventType.LOOP_WARNING.value
     ]
     assert len(loop_warnings) >= 1
+
+
+def test_run_json_duration_matches_run_end_summary(temp_data_dir):
+    """run.json duration_ms is the same monotonic measurement as the RUN_END summary."""
+    with traced_run(name="duration"):
+        record_state({"step": 1})
+    config = load_config()
+    run_id = get_latest_run_id(config)
+    run_end = [
+        e
+        for e in load_events(run_id, config)
+        if e["event_type"] == EventType.RUN_END.value
+    ][0]
+    assert (
+        load_run_meta(run_id, config)["duration_ms"]
+        == run_end["payload"]["summary"]["duration_ms"]
+    )